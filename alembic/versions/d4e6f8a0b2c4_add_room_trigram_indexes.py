@@ -0,0 +1,44 @@
+"""add trigram indexes for room search
+
+Revision ID: d4e6f8a0b2c4
+Revises: c3d5e7f9a1b3
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e6f8a0b2c4'
+down_revision: Union[str, Sequence[str], None] = 'c3d5e7f9a1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm faqat PostgreSQL da; boshqa bazalarda qidiruv ILIKE bilan ishlaydi
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # GIN trigram: ILIKE '%q%', similarity() va % operatorlari indeksdan foydalanadi
+    op.create_index(
+        'ix_rooms_name_trgm', 'rooms', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_rooms_keywords_trgm', 'rooms', ['keywords'], unique=False,
+        postgresql_using='gin', postgresql_ops={'keywords': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_rooms_keywords_trgm', table_name='rooms')
+    op.drop_index('ix_rooms_name_trgm', table_name='rooms')
+    # Extension boshqa obyektlar tomonidan ishlatilishi mumkin - o'chirilmaydi
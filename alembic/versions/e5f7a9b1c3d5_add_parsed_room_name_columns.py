@@ -0,0 +1,96 @@
+"""add parsed room name columns
+
+Revision ID: e5f7a9b1c3d5
+Revises: d4e6f8a0b2c4
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.room_parser import room_name_columns
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f7a9b1c3d5'
+down_revision: Union[str, Sequence[str], None] = 'd4e6f8a0b2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BACKFILL_CHUNK = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rooms', sa.Column('floor_number', sa.Integer(), nullable=True))
+    op.add_column('rooms', sa.Column('room_number', sa.String(length=10), nullable=True))
+    op.add_column('rooms', sa.Column('building', sa.String(length=5), nullable=True))
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Bitta set-based UPDATE; regex app.utils.room_parser.parse_room_name bilan bir xil.
+        # Qavat raqami INTEGER ga sig'maydigan nomlar (room_name_columns kabi) NULL qoladi:
+        # bigint ga faqat 10 raqamgacha (boshidagi nollarsiz) qism o'tkaziladi, CASE tartibni kafolatlaydi
+        op.execute(r"""
+            UPDATE rooms
+            SET floor_number = CAST(floors.floor_value AS integer),
+                room_number = right(floors.m[1], 2),
+                building = upper(floors.m[2])
+            FROM (
+                SELECT id, m,
+                       CASE WHEN length(floor_digits) <= 10 THEN CAST(floor_digits AS bigint) END AS floor_value
+                FROM (
+                    SELECT id, m, coalesce(nullif(ltrim(left(m[1], -2), '0'), ''), '0') AS floor_digits
+                    FROM (
+                        SELECT id, regexp_match(name, '^\s*(\d{3,})\s*-\s*([A-Za-z])\s*(?:blok|block)\s*$', 'i') AS m
+                        FROM rooms
+                    ) AS matched
+                    WHERE m IS NOT NULL
+                ) AS parsed
+            ) AS floors
+            WHERE rooms.id = floors.id AND floors.floor_value <= 2147483647
+        """)
+    else:
+        # SQLite da regex yo'q: Python parser, bo'laklab executemany
+        rooms = sa.table(
+            'rooms', sa.column('id', sa.Integer), sa.column('name', sa.String),
+            sa.column('floor_number', sa.Integer), sa.column('room_number', sa.String),
+            sa.column('building', sa.String),
+        )
+        update = (
+            rooms.update()
+            .where(rooms.c.id == sa.bindparam('room_id'))
+            .values(
+                floor_number=sa.bindparam('floor_number'),
+                room_number=sa.bindparam('room_number'),
+                building=sa.bindparam('building'),
+            )
+        )
+        batch = []
+        for room_id, name in bind.execute(sa.select(rooms.c.id, rooms.c.name)).all():
+            columns = room_name_columns(name)
+            if columns['floor_number'] is None:
+                continue
+            batch.append({'room_id': room_id, **columns})
+            if len(batch) >= _BACKFILL_CHUNK:
+                bind.execute(update, batch)
+                batch = []
+        if batch:
+            bind.execute(update, batch)
+
+    # Indekslar backfilldan keyin: har bir yangilangan qator uchun indeks saqlanmaydi
+    op.create_index(op.f('ix_rooms_floor_number'), 'rooms', ['floor_number'], unique=False)
+    op.create_index(op.f('ix_rooms_room_number'), 'rooms', ['room_number'], unique=False)
+    op.create_index(op.f('ix_rooms_building'), 'rooms', ['building'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_rooms_building'), table_name='rooms')
+    op.drop_index(op.f('ix_rooms_room_number'), table_name='rooms')
+    op.drop_index(op.f('ix_rooms_floor_number'), table_name='rooms')
+    op.drop_column('rooms', 'building')
+    op.drop_column('rooms', 'room_number')
+    op.drop_column('rooms', 'floor_number')
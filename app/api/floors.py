@@ -13,6 +13,7 @@ from app.models.waypoint import Waypoint
 from app.schemas.floor import Floor as FloorSchema, FloorCreate, FloorUpdate
 from app.core.config import settings
 from app.core.auth import verify_admin_token  # ✅ Admin auth
+from app.services.pathfinding import GraphCache
 from PIL import Image, UnidentifiedImageError
 
 router = APIRouter()
@@ -59,6 +60,7 @@ def create_floor(
     db.add(db_floor)
     db.commit()
     db.refresh(db_floor)
+    GraphCache.get_instance().clear(reason="create_floor")
     return db_floor
 
 @router.put("/{floor_id}", response_model=FloorSchema)
@@ -78,6 +80,7 @@ def update_floor(
     
     db.commit()
     db.refresh(db_floor)
+    GraphCache.get_instance().clear(reason="update_floor")
     return db_floor
 
 @router.delete("/{floor_id}")
@@ -114,6 +117,7 @@ def delete_floor(
     
     db.delete(db_floor)
     db.commit()
+    GraphCache.get_instance().clear(reason="delete_floor")
     return {"message": "Floor deleted successfully"}
 
 @router.post("/{floor_id}/upload-image")
@@ -193,6 +197,8 @@ async def upload_floor_image(
     db_floor.image_height = height # type: ignore
     db.commit()
     db.refresh(db_floor)
+    # Image size feeds the room anchor fallback (floor centre)
+    GraphCache.get_instance().clear(reason="upload_floor_image")
 
     # Best-effort: delete previous image after successfully saving and updating DB
     if old_image_filename and old_image_filename != filename:
@@ -8,6 +8,7 @@ from app.models.kiosk import Kiosk
 from app.models.floor import Floor
 from app.models.waypoint import Waypoint
 from app.schemas.kiosk import Kiosk as KioskSchema, KioskCreate, KioskUpdate
+from app.services.pathfinding import GraphCache
 from app.core.auth import verify_admin_token  # ✅ Admin auth
 
 router = APIRouter()
@@ -78,6 +79,7 @@ def create_kiosk(
     db.add(db_kiosk)
     db.commit()
     db.refresh(db_kiosk)
+    GraphCache.get_instance().clear(reason="create_kiosk")
     return db_kiosk
 
 
@@ -114,6 +116,7 @@ def update_kiosk(
 
     db.commit()
     db.refresh(db_kiosk)
+    GraphCache.get_instance().clear(reason="update_kiosk")
     return db_kiosk
 
 
@@ -129,4 +132,5 @@ def delete_kiosk(
 
     db.delete(db_kiosk)
     db.commit()
+    GraphCache.get_instance().clear(reason="delete_kiosk")
     return {"message": "Kiosk deleted successfully"}
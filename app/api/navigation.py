@@ -1,29 +1,191 @@
 
 # app/api/navigation.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any, List, Set
+import hashlib
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Literal, Optional, Tuple, Union
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.services.pathfinding import PathFinder
-from app.schemas.navigation import NavigationRequest, NavigationResponse, PathStep
 from app.models.kiosk import Kiosk
-from app.models.floor import Floor
-from app.models.waypoint import Waypoint, WaypointType
-from app.models.connection import Connection
-from app.core.auth import verify_admin_token
 from app.models.room import Room
-import math
+from app.services.pathfinding import Endpoint, PathFinder, GraphCache
+from app.schemas.navigation import (
+    CompactNavigationResponse,
+    FloorPoint,
+    NavigationRequest,
+    NavigationResponse,
+    PathStep,
+)
+from app.services import map_audit
+from app.services.route_encoding import compact_route
+from app.core.auth import verify_admin_token
+from app.core import server_timing
+from app.core.config import settings
+from app.core.metrics import (
+    ROUTE_FLOOR_CHANGES,
+    ROUTE_NODES_EXPANDED,
+    ROUTE_PATH_LENGTH,
+    ROUTE_REQUESTS,
+    ROUTE_RESOLUTION_SECONDS,
+    ROUTE_SEARCH_SECONDS,
+    ROUTE_SERIALIZE_SECONDS,
+)
+from app.utils.singleflight import SingleFlight
     
 router = APIRouter()
 
-@router.post("/find-path", response_model=NavigationResponse)
-def find_navigation_path(request: NavigationRequest, db: Session = Depends(get_db)):
-    """Yo'l topish"""
+# Bir xil yo'nalish bo'yicha bir vaqtda kelgan so'rovlar bitta qidiruvni bo'lishadi
+_route_flights = SingleFlight()
+
+
+@router.post("/find-path", response_model=Union[NavigationResponse, CompactNavigationResponse])
+def find_navigation_path(
+    request: NavigationRequest,
+    format: Literal["full", "compact"] = Query("full"),
+    db: Session = Depends(get_db),
+):
+    """
+    Yo'l topish
+    - format=compact: qavat bo'yicha polyline + siyrak yo'riqnomalar (kichik javob)
+    - bir xil (start, end, format, graf versiyasi) bo'yicha parallel so'rovlar
+      bitta hisoblash va bitta tayyor JSON javobni bo'lishadi
+    """
     pathfinder = PathFinder(db)
-    
+    start, end = _resolve_endpoints(pathfinder, request)
+    body = _coalesced_route(pathfinder, start, end, format, _request_kind(request))
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/route", response_model=Union[NavigationResponse, CompactNavigationResponse])
+def get_navigation_route(
+    request: Request,
+    from_: str = Query(..., alias="from", description="room:ID | kiosk:ID | wp:ID | point:FLOOR,X,Y"),
+    to: str = Query(..., description="room:ID | kiosk:ID | wp:ID | point:FLOOR,X,Y"),
+    format: Literal["full", "compact"] = Query("full"),
+    db: Session = Depends(get_db),
+):
+    """
+    find-path ning keshlanadigan GET varianti (brauzer / nginx / CDN uchun).
+    - ETag (start, end, graf versiyasi, format) dan hosil qilinadi
+    - If-None-Match mos kelsa, qidiruvsiz 304 qaytadi
+    """
+    pathfinder = PathFinder(db)
+    fields = {**_parse_route_ref(pathfinder, from_, "start"), **_parse_route_ref(pathfinder, to, "end")}
+    try:
+        nav_request = NavigationRequest(**fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+    start, end = _resolve_endpoints(pathfinder, nav_request)
+
+    # So'rov yuklagan graf versiyasi (umumiy kesh parallel clear() da None bo'lib qolishi mumkin)
+    headers = {}
+    if pathfinder.version is not None:
+        etag = _route_etag(start, end, format, pathfinder.version)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={settings.ROUTE_CACHE_MAX_AGE}",
+        }
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    body = _coalesced_route(pathfinder, start, end, format, _request_kind(nav_request))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _parse_route_ref(pathfinder: PathFinder, value: str, role: str) -> Dict[str, Any]:
+    """`from` / `to` qiymatini NavigationRequest maydonlariga aylantirish"""
+    kind, _, arg = value.partition(":")
+    try:
+        if kind == "wp" and arg:
+            return {f"{role}_waypoint_id": arg}
+        if kind == "room":
+            return {f"{role}_room_id": int(arg)}
+        if kind == "point":
+            floor_id, x, y = arg.split(",")
+            # Validated by NavigationRequest (inf/NaN/range -> 422 with details)
+            return {f"{role}_point": {"floor_id": int(floor_id), "x": float(x), "y": float(y)}}
+        if kind == "kiosk":
+            kiosk_id = int(arg)
+            if role == "start":
+                return {"kiosk_id": kiosk_id}
+            pathfinder.reload_if_unknown(Kiosk, kiosk_id)
+            kiosks = pathfinder.kiosk_waypoint_by_id
+            if kiosk_id not in kiosks:
+                raise HTTPException(status_code=404, detail="Kiosk not found")
+            if not kiosks[kiosk_id]:
+                raise HTTPException(status_code=400, detail="Kiosk has no waypoint assigned")
+            return {"end_waypoint_id": kiosks[kiosk_id]}
+    except ValueError:
+        pass
+    param = "from" if role == "start" else "to"
+    raise HTTPException(status_code=422, detail=f"Invalid '{param}': expected room:ID, kiosk:ID, wp:ID or point:FLOOR,X,Y")
+
+
+def _endpoint_key(endpoint: Endpoint) -> str:
+    if isinstance(endpoint, str):
+        return f"wp:{endpoint}"
+    return f"edge:{endpoint.from_id}:{endpoint.to_id}:{endpoint.t!r}"
+
+
+def _route_etag(start: Endpoint, end: Endpoint, format: str, version: str) -> str:
+    raw = "|".join((_endpoint_key(start), _endpoint_key(end), format, version))
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match (weak comparison, RFC 9110). "*" hisobga olinmaydi: 304 yo'l
+    hisoblanmasdan qaytadi, "*" esa yo'l topilmaydigan juftlarga ham mos kelardi.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _request_kind(request: NavigationRequest) -> str:
+    """Metrika yorlig'i: yo'l boshlanishi qanday berilgan (_resolve_endpoints tartibida)"""
+    if request.start_waypoint_id:
+        return "waypoint"
+    if request.start_room_id is not None:
+        return "room"
+    if request.start_point is not None:
+        return "point"
+    return "kiosk"
+
+
+def _resolve_endpoints(pathfinder: PathFinder, request: NavigationRequest) -> Tuple[Endpoint, Endpoint]:
+    """So'rovdagi room/kiosk/nuqta/waypoint ni graf nuqtalariga aylantirish"""
+    started = time.perf_counter()
+    try:
+        return _resolve_request_endpoints(pathfinder, request)
+    finally:
+        elapsed = time.perf_counter() - started
+        ROUTE_RESOLUTION_SECONDS.labels(kind=_request_kind(request)).observe(elapsed)
+        server_timing.record("resolve", elapsed)
+
+
+def _resolve_request_endpoints(pathfinder: PathFinder, request: NavigationRequest) -> Tuple[Endpoint, Endpoint]:
+    # Keshda yo'q, lekin DB da bor xona/kiosk (boshqa worker'da yaratilgan): graf
+    # nuqtalar bog'lanishidan oldin qayta yuklanadi, so'rov bitta versiyada qoladi
+    for model, entity_id in (
+        (Room, request.start_room_id),
+        (Room, request.end_room_id),
+        (Kiosk, request.kiosk_id),
+    ):
+        if entity_id is not None:
+            pathfinder.reload_if_unknown(model, entity_id)
+
     # Start va End waypoint larni aniqlash
     start_waypoint_id = request.start_waypoint_id
     end_waypoint_id = request.end_waypoint_id
+    start_snap = None
+    end_snap = None
     
     # Agar room_id berilgan bo'lsa, waypoint ga o'tkazish
     if request.start_room_id is not None and not start_waypoint_id:
@@ -36,25 +198,83 @@ def find_navigation_path(request: NavigationRequest, db: Session = Depends(get_d
         if not end_waypoint_id:
             raise HTTPException(status_code=404, detail="End room not found or has no waypoint")
     
-    # Agar kiosk_id berilgan bo'lsa, kiosk ning waypoint ini ishlatish
-    if request.kiosk_id and not start_waypoint_id:
-        kiosk = db.query(Kiosk).filter(Kiosk.id == request.kiosk_id).first()
-        if kiosk and kiosk.waypoint_id:
-            start_waypoint_id = kiosk.waypoint_id
-        elif kiosk:
-            raise HTTPException(status_code=400, detail="Kiosk has no waypoint assigned")
-        else:
+    # Koordinata berilgan bo'lsa, eng yaqin koridor qirrasiga bog'lash
+    if request.start_point is not None and not start_waypoint_id:
+        point = request.start_point
+        _check_point_on_floor(pathfinder, point, "start_point")
+        start_snap = pathfinder.snap_to_edge(point.floor_id, point.x, point.y)
+        if start_snap is None:
+            raise HTTPException(status_code=404, detail="No walkable edge near start point")
+    
+    if request.end_point is not None and not end_waypoint_id:
+        point = request.end_point
+        _check_point_on_floor(pathfinder, point, "end_point")
+        end_snap = pathfinder.snap_to_edge(point.floor_id, point.x, point.y)
+        if end_snap is None:
+            raise HTTPException(status_code=404, detail="No walkable edge near end point")
+    
+    # Agar kiosk_id berilgan bo'lsa, kiosk ning waypoint ini ishlatish (keshdan)
+    if request.kiosk_id and not start_waypoint_id and start_snap is None:
+        kiosks = pathfinder.kiosk_waypoint_by_id
+        if request.kiosk_id not in kiosks:
             raise HTTPException(status_code=404, detail="Kiosk not found")
+        start_waypoint_id = kiosks[request.kiosk_id]
+        if not start_waypoint_id:
+            raise HTTPException(status_code=400, detail="Kiosk has no waypoint assigned")
     
-    if not start_waypoint_id or not end_waypoint_id:
+    start = start_waypoint_id or start_snap
+    end = end_waypoint_id or end_snap
+    if not start or not end:
         raise HTTPException(status_code=400, detail="Start and end waypoints required")
-    
+    return start, end
+
+
+def _check_point_on_floor(pathfinder: PathFinder, point: FloorPoint, field: str) -> None:
+    """Nuqta qavat rasmi ichida bo'lishi kerak (rasm o'lchami ma'lum bo'lsa)"""
+    width, height = pathfinder.floor_size_by_id.get(point.floor_id, (None, None))
+    if (width and not 0 <= point.x <= width) or (height and not 0 <= point.y <= height):
+        raise HTTPException(
+            status_code=422,
+            detail=f"{field} ({point.x}, {point.y}) is outside the floor image ({width}x{height})",
+        )
+
+
+def _coalesced_route(pathfinder: PathFinder, start: Endpoint, end: Endpoint, format: str, kind: str) -> bytes:
+    # So'rov yuklagan graf versiyasi: tahrirdan oldingi va keyingi so'rovlar natijani bo'lishmaydi
+    if pathfinder.version is None:
+        body, shared = _route_body(pathfinder, start, end, format, kind), False
+    else:
+        key = (start, end, format, pathfinder.version)
+        body, shared = _route_flights.do(key, lambda: _route_body(pathfinder, start, end, format, kind))
+    ROUTE_REQUESTS.labels(outcome="coalesced" if shared else "computed").inc()
+    return body
+
+
+def _route_body(pathfinder: PathFinder, start: Endpoint, end: Endpoint, format: str, kind: str) -> bytes:
+    """Yo'lni hisoblab, tayyor JSON javobga aylantirish"""
     # Yo'l topish
-    path, total_distance = pathfinder.find_path(start_waypoint_id, end_waypoint_id)
+    started = time.perf_counter()
+    path, total_distance = pathfinder.find_path_between(start, end)
+    search_seconds = time.perf_counter() - started
+    labels = {"engine": pathfinder.last_engine, "kind": kind}
+    ROUTE_SEARCH_SECONDS.labels(**labels).observe(search_seconds)
+    server_timing.record("search", search_seconds)
+    ROUTE_NODES_EXPANDED.labels(**labels).observe(pathfinder.last_expanded)
     
     if not path:
         raise HTTPException(status_code=404, detail="No path found")
     
+    started = time.perf_counter()
+    try:
+        return _render_route(pathfinder, path, total_distance, format, kind)
+    finally:
+        elapsed = time.perf_counter() - started
+        ROUTE_SERIALIZE_SECONDS.labels(format=format).observe(elapsed)
+        server_timing.record("serialize", elapsed)
+
+
+def _render_route(pathfinder: PathFinder, path: List[Dict], total_distance: float, format: str, kind: str) -> bytes:
+    """Yo'riqnomalar qo'shib, javob JSON ini yaratish"""
     # Yo'riqnomalar qo'shish
     path = pathfinder.add_instructions(path)
     
@@ -64,9 +284,16 @@ def find_navigation_path(request: NavigationRequest, db: Session = Depends(get_d
         if path[i]['floor_id'] != path[i-1]['floor_id']:
             floor_changes += 1
     
+    ROUTE_PATH_LENGTH.labels(kind=kind).observe(total_distance)
+    ROUTE_FLOOR_CHANGES.labels(kind=kind).observe(floor_changes)
+    
     # Vaqtni taxminiy hisoblash (50 units = 1 minut deb hisoblaymiz)
     estimated_time = total_distance / 50.0
     
+    if format == "compact":
+        compact = compact_route(path, total_distance, floor_changes, estimated_time)
+        return CompactNavigationResponse(**compact).model_dump_json().encode()
+    
     # PathStep objectlariga o'tkazish
     path_steps = [PathStep(**step) for step in path]
     
@@ -75,33 +302,61 @@ def find_navigation_path(request: NavigationRequest, db: Session = Depends(get_d
         total_distance=total_distance,
         floor_changes=floor_changes,
         estimated_time_minutes=estimated_time
-    )
+    ).model_dump_json().encode()
 
 @router.get("/nearby-rooms/{waypoint_id}")
-def get_nearby_rooms(waypoint_id: str, radius: int = 100, db: Session = Depends(get_db)):
-    """Waypoint atrofidagi xonalarni topish"""
-    waypoint = db.query(Waypoint).filter(Waypoint.id == waypoint_id).first()
-    if not waypoint:
+def get_nearby_rooms(
+    waypoint_id: str,
+    radius: int = Query(100, gt=0, le=10000, description="Qidiruv radiusi (koordinata birliklarida)"),
+    mode: Literal["straight", "walking"] = "straight",
+    cross_floors: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Waypoint atrofidagi xonalarni topish.
+    - mode=straight: to'g'ri chiziq masofasi (qavat spatial indeksidan)
+    - mode=walking: graf bo'yicha haqiqiy yurish masofasi (cheklangan Dijkstra)
+    """
+    pathfinder = PathFinder(db)
+    cache = pathfinder.cache
+    # Parallel clear() umumiy keshni bo'shatadi - so'rov yuklagan snapshot ishlatiladi
+    rooms_by_waypoint = pathfinder.rooms_by_waypoint
+    waypoint = pathfinder.waypoints_dict.get(waypoint_id)
+    if waypoint is None:
         raise HTTPException(status_code=404, detail="Waypoint not found")
-    
-    # Bir xil qavatdagi barcha xonalar va ularning waypointlarini olish (JOIN)
-    # N+1 query muammosini oldini olish
-    rooms_data = (
-        db.query(Room, Waypoint)
-        .join(Waypoint, Room.waypoint_id == Waypoint.id)
-        .filter(Room.floor_id == waypoint.floor_id)
-        .all()
-    )
+    floor_id = waypoint.floor_id
+
+    if mode == "walking":
+        # So'rov yuklagan graf versiyasi (parallel clear() da umumiy kesh versiyasi None)
+        key = (waypoint_id, radius, cross_floors, pathfinder.version)
+        cached = cache.nearby_cache.get(key)
+        if cached is not None:
+            return cached
+        reached = pathfinder.distances_within(waypoint_id, radius, cross_floors=cross_floors)
+        nearby = []
+        for room_wp_id, distance in sorted(reached.items(), key=lambda item: item[1]):
+            room_wp_floor = pathfinder.waypoints_dict[room_wp_id].floor_id
+            for room_id, name, room_floor_id in rooms_by_waypoint.get(room_wp_id, ()):
+                if room_floor_id != room_wp_floor:
+                    continue
+                nearby.append({
+                    'room_id': room_id,
+                    'name': name,
+                    'distance': distance,
+                    'floor_id': room_floor_id,
+                })
+        if pathfinder.version is not None:
+            cache.nearby_cache.set(key, nearby)
+        return nearby
     
     nearby = []
-    for room, room_wp in rooms_data:
-        distance = math.sqrt(
-            (room_wp.x - waypoint.x)**2 + (room_wp.y - waypoint.y)**2
-        )
-        if distance <= radius:
+    for distance, room_wp_id in pathfinder.snapshot.waypoints_within(floor_id, waypoint.x, waypoint.y, radius):
+        for room_id, name, room_floor_id in rooms_by_waypoint.get(room_wp_id, ()):
+            if room_floor_id != floor_id:
+                continue
             nearby.append({
-                'room_id': room.id,
-                'name': room.name,
+                'room_id': room_id,
+                'name': name,
                 'distance': distance
             })
     
@@ -115,232 +370,45 @@ def audit_map(db: Session = Depends(get_db), _token: str = Depends(verify_admin_
     - Check disconnected components
     - Detect one-way legacy connects_to_waypoint links
     - Find stairs/elevators without cross-floor links
+    GraphCache snapshotidan hisoblanadi va graf versiyasi bo'yicha keshlanadi.
     """
-    floors = db.query(Floor).all()
-    waypoints = db.query(Waypoint).all()
-    connections = db.query(Connection).all()
-
-    floor_by_id: Dict[int, Floor] = {f.id: f for f in floors}
-    wp_by_id: Dict[str, Waypoint] = {w.id: w for w in waypoints}
-
-    def floor_info(fid: int) -> Dict[str, Any]:
-        floor = floor_by_id.get(fid)
-        return {
-            "id": fid,
-            "floor_number": floor.floor_number if floor else None,
-            "name": floor.name if floor else None,
-        }
+    body = map_audit.get_audit_json(GraphCache.get_instance(), db)
+    return Response(content=body, media_type="application/json")
 
-    # Build undirected adjacency for component detection
-    adjacency: Dict[str, Set[str]] = {w.id: set() for w in waypoints}
-    connections_by_wp: Dict[str, Set[str]] = {w.id: set() for w in waypoints}
-    missing_waypoints_in_connections: List[Dict[str, Any]] = []
-
-    for conn in connections:
-        if conn.from_waypoint_id not in wp_by_id or conn.to_waypoint_id not in wp_by_id:
-            missing_waypoints_in_connections.append(
-                {
-                    "connection_id": conn.id,
-                    "from_waypoint_id": conn.from_waypoint_id,
-                    "to_waypoint_id": conn.to_waypoint_id,
-                }
-            )
-            continue
-        adjacency[conn.from_waypoint_id].add(conn.to_waypoint_id)
-        adjacency[conn.to_waypoint_id].add(conn.from_waypoint_id)
-        connections_by_wp[conn.from_waypoint_id].add(conn.to_waypoint_id)
-        connections_by_wp[conn.to_waypoint_id].add(conn.from_waypoint_id)
-
-    legacy_one_way_links: List[Dict[str, Any]] = []
-    for wp in waypoints:
-        if not wp.connects_to_waypoint:
-            continue
-        target = wp_by_id.get(wp.connects_to_waypoint)
-        if not target:
-            legacy_one_way_links.append(
-                {
-                    "waypoint_id": wp.id,
-                    "floor": floor_info(wp.floor_id),
-                    "connects_to_waypoint": wp.connects_to_waypoint,
-                    "issue": "target_missing",
-                }
-            )
-            continue
-        # Add undirected edge for component detection
-        adjacency[wp.id].add(target.id)
-        adjacency[target.id].add(wp.id)
-        if target.connects_to_waypoint != wp.id:
-            legacy_one_way_links.append(
-                {
-                    "waypoint_id": wp.id,
-                    "floor": floor_info(wp.floor_id),
-                    "connects_to_waypoint": target.id,
-                    "issue": "reverse_missing",
-                }
-            )
-
-    # Connected components (undirected)
-    visited: Set[str] = set()
-    components: List[Dict[str, Any]] = []
-    for wp_id in adjacency.keys():
-        if wp_id in visited:
-            continue
-        stack = [wp_id]
-        comp_nodes: List[str] = []
-        while stack:
-            current = stack.pop()
-            if current in visited:
-                continue
-            visited.add(current)
-            comp_nodes.append(current)
-            for nxt in adjacency.get(current, set()):
-                if nxt not in visited:
-                    stack.append(nxt)
-        comp_floor_ids = sorted({wp_by_id[n].floor_id for n in comp_nodes if n in wp_by_id})
-        comp_floor_numbers = [
-            floor_by_id[fid].floor_number for fid in comp_floor_ids if fid in floor_by_id
-        ]
-        components.append(
-            {
-                "component_id": len(components) + 1,
-                "waypoint_count": len(comp_nodes),
-                "waypoint_ids": comp_nodes,
-                "floor_ids": comp_floor_ids,
-                "floor_numbers": comp_floor_numbers,
-            }
-        )
 
-    floors_with_no_waypoints = [
-        floor_info(f.id) for f in floors if not any(w.floor_id == f.id for w in waypoints)
-    ]
-
-    # Floors not connected to the largest component
-    disconnected_floors: List[Dict[str, Any]] = []
-    if components:
-        largest = max(components, key=lambda c: c["waypoint_count"])
-        connected_floor_ids = set(largest["floor_ids"])
-        for f in floors:
-            if f.id not in connected_floor_ids and any(w.floor_id == f.id for w in waypoints):
-                disconnected_floors.append(floor_info(f.id))
-
-    # Stairs/elevators without cross-floor links (connections or legacy)
-    stairs_without_vertical_links: List[Dict[str, Any]] = []
-    for wp in waypoints:
-        if wp.type not in (WaypointType.STAIRS, WaypointType.ELEVATOR):
-            continue
-        has_vertical = False
-        for other_id in connections_by_wp.get(wp.id, set()):
-            other = wp_by_id.get(other_id)
-            if other and other.floor_id != wp.floor_id:
-                has_vertical = True
-                break
-        if not has_vertical and wp.connects_to_waypoint:
-            target = wp_by_id.get(wp.connects_to_waypoint)
-            if target and target.floor_id != wp.floor_id:
-                has_vertical = True
-        if not has_vertical:
-            stairs_without_vertical_links.append(
-                {
-                    "waypoint_id": wp.id,
-                    "type": wp.type.value,
-                    "floor": floor_info(wp.floor_id),
-                }
-            )
-
-    unattached_waypoints: List[Dict[str, Any]] = []
-    vertical_connections: List[Dict[str, Any]] = []
-    seen_vertical = set()
-    
-    for wp in waypoints:
-        if len(adjacency.get(wp.id, set())) == 0:
-            unattached_waypoints.append({
-                "waypoint_id": wp.id,
-                "label": wp.label,
-                "type": wp.type.value,
-                "floor": floor_info(wp.floor_id),
-            })
-            
-        if wp.type in (WaypointType.STAIRS, WaypointType.ELEVATOR):
-            if wp.connects_to_waypoint:
-                target = wp_by_id.get(wp.connects_to_waypoint)
-                if target:
-                    pair = tuple(sorted([wp.id, target.id]))
-                    if pair not in seen_vertical:
-                        vertical_connections.append({
-                            "from_id": wp.id,
-                            "from_floor": floor_info(wp.floor_id),
-                            "to_id": target.id,
-                            "to_floor": floor_info(target.floor_id),
-                            "type": wp.type.value
-                        })
-                        seen_vertical.add(pair)
-            
-            for other_id in connections_by_wp.get(wp.id, set()):
-                other = wp_by_id.get(other_id)
-                if other and other.floor_id != wp.floor_id:
-                    pair = tuple(sorted([wp.id, other.id]))
-                    if pair not in seen_vertical:
-                        vertical_connections.append({
-                            "from_id": wp.id,
-                            "from_floor": floor_info(wp.floor_id),
-                            "to_id": other.id,
-                            "to_floor": floor_info(other.floor_id),
-                            "type": wp.type.value
-                        })
-                        seen_vertical.add(pair)
+@router.get("/audit/stream")
+def audit_map_stream(
+    page_size: int = Query(1000, ge=1, le=100000, description="Komponent sahifasidagi waypoint id lar soni"),
+    db: Session = Depends(get_db),
+    _token: str = Depends(verify_admin_token),
+):
+    """
+    Xarita auditi NDJSON oqimi sifatida (application/x-ndjson).
+    Har bir qator alohida yozuv, turi `record` maydonida: summary, component
+    (+ component_waypoints sahifalari), vertical_connection, unattached_waypoint,
+    issue, end.
+    Butun hisobot xotirada yig'ilmaydi - katta xaritalarda admin UI
+    natijani kelgan sari chizadi.
+    """
+    # Snapshot so'rov ichida olinadi; oqim DB sessiyasiga bog'liq emas
+    snapshot = map_audit.take_snapshot(GraphCache.get_instance(), db)
+    return StreamingResponse(
+        map_audit.ndjson_chunks(map_audit.iter_audit_ndjson(snapshot, page_size)),
+        media_type="application/x-ndjson",
+    )
+
 
-    return {
-        "summary": {
-            "floors": len(floors),
-            "waypoints": len(waypoints),
-            "connections": len(connections),
-            "components": len(components),
-            "disconnected_floors": disconnected_floors,
-            "floors_with_no_waypoints": floors_with_no_waypoints,
-            "legacy_one_way_links": len(legacy_one_way_links),
-            "stairs_without_vertical_links": len(stairs_without_vertical_links),
-            "unattached_waypoints": len(unattached_waypoints),
-            "vertical_connections": len(vertical_connections),
-        },
-        "components": components,
-        "vertical_connections": vertical_connections,
-        "unattached_waypoints": unattached_waypoints,
-        "issues": {
-            "legacy_one_way_links": legacy_one_way_links,
-            "stairs_without_vertical_links": stairs_without_vertical_links,
-            "missing_waypoints_in_connections": missing_waypoints_in_connections,
-        },
-    }
 @router.get("/debug/graph")
-def get_debug_graph(db: Session = Depends(get_db)):
-    """GraphCache holatini tahlil qilish uchun yopiq/debug endpoint"""
-    pf = PathFinder(db)
-    
-    # Generic vertical connections count
-    multi_floor_edges = 0
-    for node_id, edges in pf.graph.items():
-        node_wp = pf.waypoints_dict.get(node_id)
-        if not node_wp: continue
-        
-        for edge_target, _ in edges:
-            target_wp = pf.waypoints_dict.get(edge_target)
-            if target_wp and target_wp.floor_id != node_wp.floor_id:
-                multi_floor_edges += 1
-                
-    # Barcha connections tabledagi qavatlararo ulanishlarni hisoblash
-    conns = db.query(Connection).all()
-    v_conns_db = []
-    for c in conns:
-        w1 = pf.waypoints_dict.get(c.from_waypoint_id)
-        w2 = pf.waypoints_dict.get(c.to_waypoint_id)
-        if w1 and w2 and w1.floor_id != w2.floor_id:
-            v_conns_db.append(c.id)
-            
+def get_debug_graph(_token: str = Depends(verify_admin_token)):
+    """
+    GraphCache holati (faqat admin).
+    Statistika graf qurilganda bir marta hisoblanadi - endpoint DB ga murojaat
+    qilmaydi va grafni aylanib chiqmaydi.
+    """
+    cache = GraphCache.get_instance()
     return {
-        "is_initialized": pf.cache.initialized,
-        "total_nodes_in_cache": len(pf.graph),
-        "total_edges_in_graph": sum(len(edges) for edges in pf.graph.values()),
-        "multi_floor_edges_in_cache": multi_floor_edges,
-        "multi_floor_edges_in_db": len(v_conns_db),
+        "initialized": cache.initialized,
+        "stats": dict(cache.stats),
+        "last_invalidation": cache.last_invalidation,
+        "nearby_cache_entries": len(cache.nearby_cache),
     }
-
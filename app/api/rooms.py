@@ -1,14 +1,18 @@
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Path, Query, UploadFile
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from app.database import get_db
 from app.models.room import Room
 from app.models.floor import Floor
+from app.models.kiosk import Kiosk
 from app.models.waypoint import Waypoint
-from app.schemas.room import Room as RoomSchema, RoomCreate, RoomUpdate
-from app.utils.room_parser import parse_room_name
+from app.schemas.room import Room as RoomSchema, RoomCreate, RoomUpdate, RoomSearchResult, RoomSuggestion
 from app.core.auth import verify_admin_token  # ✅ Admin auth
+from app.services import room_import, room_search
+from app.services.room_autocomplete import MAX_SUGGESTIONS, room_autocomplete
+from app.services.pathfinding import GraphCache, PathFinder
 
 router = APIRouter()
 
@@ -24,6 +28,8 @@ def get_rooms(
     limit: int = 1000,
     floor_id: Optional[int] = None,
     building: Optional[str] = None,
+    floor_number: Optional[int] = None,
+    room_number: Optional[str] = None,
     without_waypoint: bool = False,  # ← NEW: Nuqtasi yo'q xonalar
     db: Session = Depends(get_db)
 ):
@@ -35,11 +41,15 @@ def get_rooms(
         _get_floor_or_404(db, floor_id)
         query = query.filter(Room.floor_id == floor_id)
     
-    # Bino bo'yicha filter
+    # Nomdan ajratilgan ustunlar bo'yicha filterlar (indekslangan)
     if building:
         b = building.strip()
         if b:
-            query = query.filter(Room.name.ilike(f"%-{b}% blok%"))
+            query = query.filter(Room.building == b.upper())
+    if floor_number is not None:
+        query = query.filter(Room.floor_number == floor_number)
+    if room_number:
+        query = query.filter(Room.room_number == room_number.strip())
     
     # Nuqtasi yo'q xonalar
     if without_waypoint:
@@ -62,28 +72,50 @@ def get_unassigned_rooms(
     
     return query.all()
 
-@router.get("/search", response_model=List[RoomSchema])
-def search_rooms(query: str, db: Session = Depends(get_db)):
-    """Xonalarni qidirish (nom va kalit so'zlar bo'yicha)"""
-    from sqlalchemy import or_
-    normalized = query.strip()
-    room_id = int(normalized) if normalized.isdigit() else None
-    if room_id is not None:
-        rooms = db.query(Room).filter(
-            or_(
-                Room.id == room_id,
-                Room.name.ilike(f"%{normalized}%"),
-                Room.keywords.ilike(f"%{normalized}%")
-            )
-        ).all()
-    else:
-        rooms = db.query(Room).filter(
-            or_(
-                Room.name.ilike(f"%{normalized}%"),
-                Room.keywords.ilike(f"%{normalized}%")
-            )
-        ).all()
-    return rooms
+@router.get("/search", response_model=List[RoomSearchResult])
+def search_rooms(
+    query: str,
+    limit: int = Query(50, ge=1, le=200),
+    kiosk_id: Optional[int] = Query(None, gt=0),
+    waypoint_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Xonalarni qidirish (nom, kalit so'zlar yoki ID bo'yicha), eng mosi birinchi.
+    PostgreSQL da pg_trgm o'xshashligi bo'yicha tartiblanadi (imlo xatolariga chidamli).
+    kiosk_id yoki waypoint_id berilsa, natijalar u yerdan yurish masofasi bo'yicha
+    tartiblanadi va har biriga masofa, taxminiy vaqt va qavat qo'shiladi.
+    """
+    if kiosk_id is None and waypoint_id is None:
+        # Faqat Room maydonlari: ORM dagi (nomdan ajratilgan) floor_number javobga
+        # o'tmasin - floor_number/floor_name faqat origin bilan (Floor jadvalidan)
+        rooms = room_search.search_rooms(db, query, limit)
+        return [RoomSchema.model_validate(room).model_dump() for room in rooms]
+
+    pathfinder = PathFinder(db)
+    if kiosk_id is not None:
+        pathfinder.reload_if_unknown(Kiosk, kiosk_id)
+        kiosks = pathfinder.kiosk_waypoint_by_id
+        if kiosk_id not in kiosks:
+            raise HTTPException(status_code=404, detail="Kiosk not found")
+        waypoint_id = kiosks[kiosk_id]
+        if not waypoint_id:
+            raise HTTPException(status_code=400, detail="Kiosk has no waypoint assigned")
+    elif waypoint_id not in pathfinder.waypoints_dict:
+        raise HTTPException(status_code=404, detail="Waypoint not found")
+    return room_search.search_rooms_near(db, pathfinder, query, waypoint_id, limit)
+
+@router.get("/autocomplete", response_model=List[RoomSuggestion])
+def autocomplete_rooms(
+    q: str = "",
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    db: Session = Depends(get_db),
+):
+    """
+    Kiosk qidiruv maydoni uchun tezkor takliflar (xotiradagi indeks, DB faqat qayta qurishda).
+    Kirill/lotin yozuvi va katta-kichik harf farqlanmaydi.
+    """
+    return room_autocomplete.suggest(db, q, limit)
 
 @router.get("/{room_id}", response_model=RoomSchema)
 def get_room(room_id: int = Path(..., gt=0), db: Session = Depends(get_db)):
@@ -100,10 +132,10 @@ def create_room(
     _token: str = Depends(verify_admin_token)
 ):
     """Yangi xona yaratish"""
-    # Parse qilish
-    parsed = parse_room_name(room.name)
+    # floor_number/room_number/building nomdan avtomatik to'ldiriladi
+    db_room = Room(name=room.name, waypoint_id=room.waypoint_id)
     
-    # Agar floor_id berilmagan bo'lsa, parse dan olish
+    # Agar floor_id berilmagan bo'lsa, nomdagi qavat raqamidan olish
     floor_id = room.floor_id
     if room.waypoint_id:
         waypoint = db.query(Waypoint).filter(Waypoint.id == room.waypoint_id).first()
@@ -113,26 +145,50 @@ def create_room(
             raise HTTPException(status_code=400, detail="Waypoint does not belong to the room floor")
         if floor_id is None:
             floor_id = waypoint.floor_id
-    if not floor_id and parsed['floor_number']:
-        # Floor_number ga mos keladigan qavatni topish
+    if not floor_id and db_room.floor_number is not None:
+        # Floor_number ga mos keladigan qavatni topish (0-qavat ham; eng kichik id,
+        # auto_assign_floors va import kabi)
         floor = db.query(Floor).filter(
-            Floor.floor_number == parsed['floor_number']
-        ).first()
+            Floor.floor_number == db_room.floor_number
+        ).order_by(Floor.id).first()
         if floor:
             floor_id = floor.id
     if floor_id:
         _get_floor_or_404(db, floor_id)
     
-    db_room = Room(
-        name=room.name,
-        waypoint_id=room.waypoint_id,
-        floor_id=floor_id
-    )
+    db_room.floor_id = floor_id
     db.add(db_room)
     db.commit()
     db.refresh(db_room)
+    GraphCache.get_instance().clear(reason="create_room")
     return db_room
 
+@router.post("/import")
+def import_rooms(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson", "xlsx"]] = Query(None),
+    dry_run: bool = False,
+    skip_invalid: bool = False,
+    db: Session = Depends(get_db),
+    _token: str = Depends(verify_admin_token)
+):
+    """
+    Xonalarni fayldan ommaviy import qilish (CSV, NDJSON yoki XLSX; ustunlar:
+    name, floor_id, floor_number, waypoint_id, keywords). Bitta tranzaksiya:
+    xatoli qator bo'lsa hech narsa yozilmaydi (skip_invalid=true - to'g'ri
+    qatorlar yoziladi). Javobda qatorlar bo'yicha xatolar hisoboti qaytadi.
+    """
+    try:
+        fmt = room_import.detect_format(file.filename, format)
+        report = room_import.import_rooms(
+            db, file.file, fmt, dry_run=dry_run, skip_invalid=skip_invalid
+        )
+    except room_import.RoomImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report.committed:
+        GraphCache.get_instance().clear(reason="import_rooms")
+    return report.to_dict()
+
 @router.put("/{room_id}", response_model=RoomSchema)
 def update_room(
     room: RoomUpdate,
@@ -147,13 +203,13 @@ def update_room(
     
     update_data = room.model_dump(exclude_unset=True)
     
-    # Agar name yangilansa, floor_id ni ham yangilash
+    # Agar name yangilansa, floor_id ni ham yangilash (ajratilgan ustunlar modelda to'ldiriladi)
     if 'name' in update_data:
-        parsed = parse_room_name(update_data['name'])
-        if parsed['floor_number'] and 'floor_id' not in update_data:
+        db_room.name = update_data.pop('name')
+        if db_room.floor_number is not None and 'floor_id' not in update_data:
             floor = db.query(Floor).filter(
-                Floor.floor_number == parsed['floor_number']
-            ).first()
+                Floor.floor_number == db_room.floor_number
+            ).order_by(Floor.id).first()
             if floor:
                 update_data['floor_id'] = floor.id
     if 'floor_id' in update_data and update_data['floor_id'] is not None:
@@ -174,6 +230,7 @@ def update_room(
     
     db.commit()
     db.refresh(db_room)
+    GraphCache.get_instance().clear(reason="update_room")
     return db_room
 
 @router.patch("/{room_id}/assign-waypoint", response_model=RoomSchema)
@@ -199,6 +256,7 @@ def assign_waypoint_to_room(
     room.waypoint_id = waypoint_id
     db.commit()
     db.refresh(room)
+    GraphCache.get_instance().clear(reason="assign_waypoint_to_room")
     return room
 
 @router.get("/floor/{floor_id}", response_model=List[RoomSchema])
@@ -221,37 +279,62 @@ def delete_room(
     
     db.delete(room)
     db.commit()
+    GraphCache.get_instance().clear(reason="delete_room")
     return {"message": "Room deleted successfully"}
 
 @router.post("/auto-assign-floors")
 def auto_assign_floors(
+    sample_size: int = Query(20, ge=0, le=200),
     db: Session = Depends(get_db),
     _token: str = Depends(verify_admin_token)
 ):
     """
     Barcha xonalarga avtomatik qavat belgilash
-    Xona nomini parse qilib, mos keladigan qavatga biriktiradi
+    Nomdan ajratilgan floor_number bo'yicha mos qavatga biriktiradi: bitta
+    UPDATE ... FROM (har bir floor_number uchun eng kichik id li qavat).
+    Biriktirilmay qolgan xonalar soni va namunalari (sababi bilan) qaytariladi.
     """
-    rooms = db.query(Room).filter(Room.floor_id == None).all()
-    floors = db.query(Floor).all()
-    
-    updated_count = 0
-    
-    for room in rooms:
-        parsed = parse_room_name(room.name)
-        if parsed['floor_number']:
-            # Mos keladigan qavatni topish
-            floor = next(
-                (f for f in floors if f.floor_number == parsed['floor_number']),
-                None
-            )
-            if floor:
-                room.floor_id = floor.id
-                updated_count += 1
-    
+    first_floor = (
+        select(Floor.floor_number, func.min(Floor.id).label("floor_id"))
+        .group_by(Floor.floor_number)
+        .subquery()
+    )
+    result = db.execute(
+        update(Room)
+        .where(Room.floor_id.is_(None), Room.floor_number == first_floor.c.floor_number)
+        .values(floor_id=first_floor.c.floor_id)
+        .execution_options(synchronize_session=False)
+    )
+    updated_count = result.rowcount
     db.commit()
+    GraphCache.get_instance().clear(reason="auto_assign_floors")
+
+    unassigned = db.query(Room).filter(Room.floor_id.is_(None))
+    unparsed_count = unassigned.filter(Room.floor_number.is_(None)).count()
+    no_floor_count = unassigned.filter(Room.floor_number.is_not(None)).count()
+    samples = (
+        db.query(Room.id, Room.name, Room.floor_number)
+        .filter(Room.floor_id.is_(None))
+        .order_by(Room.id)
+        .limit(sample_size)
+        .all()
+    )
     
     return {
         "message": f"{updated_count} xonaga qavat biriktirildi",
-        "updated_count": updated_count
+        "updated_count": updated_count,
+        "unmatched_count": unparsed_count + no_floor_count,
+        "unmatched_by_reason": {
+            "unparsed_name": unparsed_count,
+            "no_matching_floor": no_floor_count,
+        },
+        "unmatched_samples": [
+            {
+                "id": room_id,
+                "name": name,
+                "floor_number": floor_number,
+                "reason": "unparsed_name" if floor_number is None else "no_matching_floor",
+            }
+            for room_id, name, floor_number in samples
+        ],
     }
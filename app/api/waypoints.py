@@ -73,7 +73,7 @@ def create_waypoint(
     db.add(db_waypoint)
     db.commit()
     db.refresh(db_waypoint)
-    GraphCache.get_instance().clear()
+    GraphCache.get_instance().clear(reason="create_waypoint")
     return db_waypoint
 
 @router.post("/batch", response_model=List[WaypointSchema])
@@ -94,7 +94,7 @@ def create_waypoints_batch(
     db.commit()
     for wp in db_waypoints:
         db.refresh(wp)
-    GraphCache.get_instance().clear()
+    GraphCache.get_instance().clear(reason="create_waypoints_batch")
     return db_waypoints
 
 @router.put("/{waypoint_id}", response_model=WaypointSchema)
@@ -116,7 +116,7 @@ def update_waypoint(
     
     db.commit()
     db.refresh(db_waypoint)
-    GraphCache.get_instance().clear()
+    GraphCache.get_instance().clear(reason="update_waypoint")
     return db_waypoint
 
 @router.delete("/{waypoint_id}")
@@ -132,7 +132,7 @@ def delete_waypoint(
     
     db.delete(db_waypoint)
     db.commit()
-    GraphCache.get_instance().clear()
+    GraphCache.get_instance().clear(reason="delete_waypoint")
     return {"message": "Waypoint deleted successfully"}
 
 # Connections
@@ -158,7 +158,7 @@ def create_connection(
     db.add(db_connection)
     db.commit()
     db.refresh(db_connection)
-    GraphCache.get_instance().clear()
+    GraphCache.get_instance().clear(reason="create_connection")
     return db_connection
 
 @router.post("/connections/batch", response_model=List[ConnectionSchema])
@@ -190,7 +190,7 @@ def create_connections_batch(
     db.commit()
     for conn in db_connections:
         db.refresh(conn)
-    GraphCache.get_instance().clear()
+    GraphCache.get_instance().clear(reason="create_connections_batch")
     return db_connections
 
 @router.get("/connections/floor/{floor_id}", response_model=List[ConnectionSchema])
@@ -218,5 +218,5 @@ def delete_connection(
     
     db.delete(db_connection)
     db.commit()
-    GraphCache.get_instance().clear()
+    GraphCache.get_instance().clear(reason="delete_connection")
     return {"message": "Connection deleted successfully"}
@@ -38,6 +38,28 @@ class Settings(BaseSettings):
     LOGIN_FAILURE_WINDOW_SECONDS: int = 15 * 60
     LOGIN_LOCK_SECONDS: int = 5 * 60
     
+    # Navigation graph
+    GRAPH_WARMUP_ON_STARTUP: bool = True
+    # Failed startup warm-up (e.g. DB not up yet) is retried: pause doubles up to the max
+    GRAPH_WARMUP_RETRY_INITIAL_SECONDS: float = 1.0
+    GRAPH_WARMUP_RETRY_MAX_SECONDS: float = 30.0
+    # Max graph snapshot age: other workers' map edits show up after this (0 = never expire)
+    GRAPH_CACHE_TTL_SECONDS: float = 60.0
+    # >0: run A* searches in a pool of this many processes (shared-memory graph)
+    PATHFINDING_PROCESS_WORKERS: int = 0
+    # Cache-Control max-age (seconds) for GET /api/navigation/route
+    ROUTE_CACHE_MAX_AGE: int = 60
+
+    # Rebuild graph + map audit in the background after edits (debounced)
+    MAP_AUDIT_BACKGROUND_REFRESH: bool = False
+    MAP_AUDIT_REFRESH_DELAY_SECONDS: float = 2.0
+
+    # Server-Timing response header (db/cache/resolve/search/serialize phases)
+    SERVER_TIMING_ENABLED: bool = False
+
+    # In-memory room autocomplete: max index age (other workers' room edits)
+    ROOM_AUTOCOMPLETE_TTL_SECONDS: float = 300.0
+
     # Upload Configuration
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_MB: int = 15
@@ -0,0 +1,72 @@
+# app/core/metrics.py
+"""
+Application-level Prometheus metrics.
+
+HTTP request metrics come from prometheus-fastapi-instrumentator (see main.py);
+this module holds the domain counters and the route phase histograms.
+Everything registers in the default registry, so it is served by the same
+/metrics endpoint.
+"""
+from prometheus_client import Counter, Histogram
+
+# outcome: "computed" - this request ran the search;
+#          "coalesced" - it shared the result of an identical in-flight request
+ROUTE_REQUESTS = Counter(
+    "navigation_route_requests_total",
+    "Route (find-path) requests by how the response was produced",
+    ["outcome"],
+)
+
+# Route phases. kind = how the route start was given (kiosk / room / waypoint / point);
+# engine = which search served it ("inprocess" A*, "pool" process-pool A*,
+# "multi_seed" A* from snapped coordinates). Only computed routes are observed,
+# coalesced requests reuse the leader's work.
+_FAST_SECONDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+GRAPH_LOAD_SECONDS = Histogram(
+    "navigation_graph_load_seconds",
+    "Time to build GraphCache from the database",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+# result: "hit" - graph already built; "miss" - this call built it
+GRAPH_CACHE_LOOKUPS = Counter(
+    "navigation_graph_cache_lookups_total",
+    "GraphCache lookups by whether the graph had to be built",
+    ["result"],
+)
+ROUTE_RESOLUTION_SECONDS = Histogram(
+    "navigation_route_resolution_seconds",
+    "Time to resolve request rooms/kiosks/points to graph endpoints",
+    ["kind"],
+    buckets=_FAST_SECONDS,
+)
+ROUTE_SEARCH_SECONDS = Histogram(
+    "navigation_route_search_seconds",
+    "Path search duration",
+    ["engine", "kind"],
+    buckets=_FAST_SECONDS,
+)
+ROUTE_NODES_EXPANDED = Histogram(
+    "navigation_route_nodes_expanded",
+    "Nodes expanded by one path search",
+    ["engine", "kind"],
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000),
+)
+ROUTE_SERIALIZE_SECONDS = Histogram(
+    "navigation_route_serialize_seconds",
+    "Time to add instructions and render the route JSON",
+    ["format"],
+    buckets=_FAST_SECONDS,
+)
+ROUTE_PATH_LENGTH = Histogram(
+    "navigation_route_path_length",
+    "Total distance of found routes (map units)",
+    ["kind"],
+    buckets=(25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000),
+)
+ROUTE_FLOOR_CHANGES = Histogram(
+    "navigation_route_floor_changes",
+    "Floor changes per found route",
+    ["kind"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12),
+)
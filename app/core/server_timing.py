@@ -0,0 +1,125 @@
+# app/core/server_timing.py
+"""
+Per-request phase timings reported in the `Server-Timing` response header.
+
+With SERVER_TIMING_ENABLED the middleware puts a fresh collector into a
+context variable for each HTTP request; code on the request path adds to it
+with `timer("search")` / `record(...)`, and SQL statement time is added by
+SQLAlchemy engine events (`install_db_timing`). Sync endpoints run in the
+thread pool with a copy of the request context, which still points at the
+same collector.
+
+When disabled, no collector is set: the middleware passes requests straight
+through and every timer/event hook is a single ContextVar lookup.
+"""
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# phase name -> [total seconds, count]
+_collector: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("server_timing", default=None)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add `seconds` to phase `name` of the current request (no-op when off)."""
+    timings = _collector.get()
+    if timings is None:
+        return
+    entry = timings.get(name)
+    if entry is None:
+        timings[name] = [seconds, 1]
+    else:
+        entry[0] += seconds
+        entry[1] += 1
+
+
+class timer:
+    """`with timer("search"): ...` - time a block into the current request."""
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> "timer":
+        if _collector.get() is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.started:
+            record(self.name, time.perf_counter() - self.started)
+
+
+def format_header(timings: Dict[str, List[float]], total: float) -> str:
+    """`db;dur=1.20;desc="3 calls", search;dur=0.41, app;dur=2.00` (milliseconds)."""
+    parts = []
+    for name, (seconds, count) in timings.items():
+        part = f"{name};dur={seconds * 1000:.2f}"
+        if count > 1:
+            part += f';desc="{int(count)} calls"'
+        parts.append(part)
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware task/stream overhead)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, List[float]] = {}
+        token = _collector.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = format_header(timings, time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1")),
+                    (b"timing-allow-origin", b"*"),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _collector.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collector.get() is not None:
+        conn.info.setdefault("server_timing_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("server_timing_started")
+    if started:
+        record("db", time.perf_counter() - started.pop())
+
+
+def _handle_error(context):
+    # after_cursor_execute is skipped for failed statements
+    started = context.connection.info.get("server_timing_started") if context.connection else None
+    if started:
+        record("db", time.perf_counter() - started.pop())
+
+
+def install_db_timing(engine: Engine) -> None:
+    """Count SQL statement time into the `db` phase (idempotent)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
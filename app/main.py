@@ -1,13 +1,19 @@
 
 
 # app/main.py
+import asyncio
 import logging
+import math
 import os
+import threading
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Depends, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from prometheus_fastapi_instrumentator import Instrumentator
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -15,7 +21,10 @@ from sqlalchemy.orm import Session
 from app.api import floors, waypoints, navigation, rooms, kiosks, auth
 from app.core.config import settings
 from app.core.logging_config import setup_logging
+from app.core.server_timing import ServerTimingMiddleware
 from app.database import get_db
+from app.services import graph_warmup, map_audit
+from app.services.pathfinding_pool import shutdown_pathfinding_executor
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -26,9 +35,26 @@ async def lifespan(app: FastAPI):
     # Startup: load resources
     logger.info("Starting University Navigation API...")
     instrumentator.expose(app)
+    warmup_task = None
+    warmup_stop = threading.Event()
+    if settings.GRAPH_WARMUP_ON_STARTUP:
+        # Run in the background: liveness answers immediately, readiness waits.
+        # Retried with backoff until the DB is reachable.
+        warmup_task = asyncio.create_task(
+            run_in_threadpool(graph_warmup.warm_up_graph_with_retry, stop=warmup_stop)
+        )
+    else:
+        graph_warmup.mark_ready()
+    if settings.MAP_AUDIT_BACKGROUND_REFRESH:
+        map_audit.enable_background_refresh(settings.MAP_AUDIT_REFRESH_DELAY_SECONDS)
     yield
     # Shutdown: clean up resources (if any)
     logger.info("Shutting down University Navigation API...")
+    if warmup_task is not None:
+        warmup_stop.set()
+        await warmup_task
+    map_audit.disable_background_refresh()
+    shutdown_pathfinding_executor()
 
 app = FastAPI(
     title="University Navigation API",
@@ -40,7 +66,8 @@ app = FastAPI(
 )
 
 CORS_ALLOW_METHODS = "GET,POST,PUT,PATCH,DELETE,OPTIONS,HEAD"
-CORS_ALLOW_HEADERS = "Authorization,Content-Type,Accept,Origin,User-Agent,DNT,Cache-Control,X-Requested-With,If-Modified-Since"
+CORS_ALLOW_HEADERS = "Authorization,Content-Type,Accept,Origin,User-Agent,DNT,Cache-Control,X-Requested-With,If-Modified-Since,If-None-Match"
+CORS_EXPOSE_HEADERS = "ETag,Cache-Control,Server-Timing"
 
 
 @app.middleware("http")
@@ -67,9 +94,30 @@ async def permissive_cors_middleware(request: Request, call_next):
     response.headers["Access-Control-Allow-Headers"] = request.headers.get(
         "Access-Control-Request-Headers", CORS_ALLOW_HEADERS
     )
+    response.headers["Access-Control-Expose-Headers"] = CORS_EXPOSE_HEADERS
     response.headers["Access-Control-Max-Age"] = "86400"
     return response
 
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """
+    FastAPI ning standart 422 javobi, faqat inf/NaN kiritilgan qiymat (`input`)
+    olib tashlanadi - u JSON ga aylanmaydi va 500 beradi.
+    """
+    errors = []
+    for error in exc.errors():
+        value = error.get("input")
+        if isinstance(value, float) and not math.isfinite(value):
+            error = {k: v for k, v in error.items() if k != "input"}
+        errors.append(error)
+    return JSONResponse(
+        status_code=422,
+        content={"detail": jsonable_encoder(errors)},
+    )
+
+# Outermost: timings cover CORS handling too; pass-through when SERVER_TIMING_ENABLED=false
+app.add_middleware(ServerTimingMiddleware)
+
 # Uploads papkani yaratish
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 app.mount("/api/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
@@ -119,6 +167,19 @@ def health_check_api(db: Session = Depends(get_db)):
     return _build_health_response(db)
 
 
+@app.get("/api/health/ready")
+def readiness_check():
+    """
+    Readiness endpoint: 503 until the navigation graph is warmed up.
+    """
+    if not graph_warmup.is_ready():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming_up"},
+        )
+    return {"status": "ready"}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -2,8 +2,9 @@
 # app/models/room.py
 
 from sqlalchemy import Column, Integer, String, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from app.database import Base
+from app.utils.room_parser import room_name_columns
 
 class Room(Base):
     __tablename__ = "rooms"
@@ -16,6 +17,17 @@ class Room(Base):
     waypoint_id = Column(String(50), ForeignKey("waypoints.id", ondelete="SET NULL"), nullable=True)
     floor_id = Column(Integer, ForeignKey("floors.id", ondelete="SET NULL"), nullable=True, index=True)
     keywords = Column(Text, nullable=True)  # Kalit so'zlar (masalan: "dekanat kutubxona")
+
+    # Nomdan ajratilgan qismlar ("106-B blok" → 1, "06", "B"); name yozilganda to'ldiriladi
+    floor_number = Column(Integer, nullable=True, index=True)
+    room_number = Column(String(10), nullable=True, index=True)
+    building = Column(String(5), nullable=True, index=True)
     
     # Relationships
     floor = relationship("Floor", back_populates="rooms")
+
+    @validates("name")
+    def _fill_name_columns(self, _key, name):
+        for column, value in room_name_columns(name).items():
+            setattr(self, column, value)
+        return name
@@ -1,19 +1,31 @@
 
 # app/schemas/navigation.py
-from pydantic import BaseModel, conint
-from typing import List, Optional
+from pydantic import BaseModel, Field, conint
+from typing import List, Optional, Tuple
 
 PositiveInt = conint(gt=0)
+# Qavat rasmi koordinatalari (piksel) uchun yuqori chegara
+MAX_FLOOR_COORDINATE = 100_000
+
+class FloorPoint(BaseModel):
+    """Qavat rasmidagi ixtiyoriy nuqta (masalan, foydalanuvchi bosgan joy)"""
+    floor_id: PositiveInt
+    # inf/NaN va rasmdan tashqaridagi qiymatlar 422 (qavat rasmi o'lchami API da tekshiriladi)
+    x: float = Field(ge=-MAX_FLOOR_COORDINATE, le=MAX_FLOOR_COORDINATE, allow_inf_nan=False)
+    y: float = Field(ge=-MAX_FLOOR_COORDINATE, le=MAX_FLOOR_COORDINATE, allow_inf_nan=False)
 
 class NavigationRequest(BaseModel):
     start_waypoint_id: Optional[str] = None
     start_room_id: Optional[PositiveInt] = None
+    start_point: Optional[FloorPoint] = None
     end_waypoint_id: Optional[str] = None
     end_room_id: Optional[PositiveInt] = None
+    end_point: Optional[FloorPoint] = None
     kiosk_id: Optional[PositiveInt] = None
 
 class PathStep(BaseModel):
-    waypoint_id: str
+    # None for a projected coordinate (type == "point")
+    waypoint_id: Optional[str] = None
     floor_id: int
     x: int
     y: int
@@ -26,3 +38,17 @@ class NavigationResponse(BaseModel):
     total_distance: float
     floor_changes: int
     estimated_time_minutes: float
+
+class CompactLeg(BaseModel):
+    floor_id: int
+    start: int  # global index of the leg's first point
+    polyline: str  # delta-encoded (polyline algorithm, precision 1) x/y points
+
+class CompactNavigationResponse(BaseModel):
+    start_waypoint_id: Optional[str] = None
+    end_waypoint_id: Optional[str] = None
+    legs: List[CompactLeg]
+    instructions: List[Tuple[int, str]]  # (point index, text), sparse
+    total_distance: float
+    floor_changes: int
+    estimated_time_minutes: float
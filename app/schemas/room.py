@@ -23,3 +23,18 @@ class Room(RoomBase):
     id: PositiveInt  # ← Integer
     
     model_config = ConfigDict(from_attributes=True)
+
+class RoomSearchResult(Room):
+    # Faqat kiosk_id/waypoint_id bilan qidirilganda: yurish masofasi va qavat
+    distance: Optional[float] = None
+    estimated_time_minutes: Optional[float] = None
+    floor_number: Optional[int] = None
+    floor_name: Optional[str] = None
+
+class RoomSuggestion(BaseModel):
+    id: PositiveInt
+    name: str
+    floor_id: Optional[int] = None
+    waypoint_id: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
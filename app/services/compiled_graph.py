@@ -0,0 +1,208 @@
+# app/services/compiled_graph.py
+"""
+Index-based (CSR) snapshot of the navigation graph.
+
+GraphCache keeps the graph as dicts keyed by waypoint id, which is convenient
+but cannot be shared between processes. CompiledGraph packs the same data into
+flat 8-byte arrays (node coordinates/floors + CSR adjacency), so it can be
+copied into one shared-memory block and searched from other processes by
+node index.
+
+Only the standard library is imported here: spawned pathfinding workers import
+this module without pulling in the app (settings, DB engine, ...).
+"""
+import heapq
+import math
+from array import array
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (array name, typecode, length kind) in shared-memory layout order
+_LAYOUT = (
+    ("xs", "d", "n"),
+    ("ys", "d", "n"),
+    ("floor_ids", "q", "n"),
+    ("floor_numbers", "q", "n"),
+    ("offsets", "q", "n1"),
+    ("targets", "q", "m"),
+    ("weights", "d", "m"),
+)
+
+
+@dataclass(frozen=True)
+class SharedGraphHandle:
+    """Picklable reference to a CompiledGraph published in shared memory."""
+    name: str
+    node_count: int
+    edge_count: int
+    version: Optional[str]
+    heuristic_scale: float = 1.0
+    floor_cost: float = 0.0
+
+
+class CompiledGraph:
+    """CSR adjacency: edges of node i are targets/weights[offsets[i]:offsets[i+1]]."""
+
+    def __init__(
+        self,
+        node_ids: List[str],
+        arrays: Dict[str, Sequence],
+        heuristic_scale: float = 1.0,
+        floor_cost: float = 0.0,
+    ):
+        self.node_ids = node_ids
+        self.index_of: Dict[str, int] = {wp_id: i for i, wp_id in enumerate(node_ids)}
+        self.xs = arrays["xs"]
+        self.ys = arrays["ys"]
+        self.floor_ids = arrays["floor_ids"]
+        self.floor_numbers = arrays["floor_numbers"]
+        self.offsets = arrays["offsets"]
+        self.targets = arrays["targets"]
+        self.weights = arrays["weights"]
+        # Same calibration as GraphCache (see pathfinding._calibrate_heuristic)
+        self.heuristic_scale = heuristic_scale
+        self.floor_cost = floor_cost
+
+    @property
+    def node_count(self) -> int:
+        return len(self.xs)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph,
+        waypoints_dict,
+        floor_number_by_id: Dict[int, int],
+        heuristic_scale: float = 1.0,
+        floor_cost: float = 0.0,
+    ) -> "CompiledGraph":
+        """Compile GraphCache containers (adjacency order is preserved)."""
+        node_ids = list(graph.keys())
+        index_of = {wp_id: i for i, wp_id in enumerate(node_ids)}
+        arrays = {name: array(code) for name, code, _kind in _LAYOUT}
+        arrays["offsets"].append(0)
+        for wp_id in node_ids:
+            wp = waypoints_dict[wp_id]
+            arrays["xs"].append(float(wp.x))
+            arrays["ys"].append(float(wp.y))
+            arrays["floor_ids"].append(int(wp.floor_id))
+            arrays["floor_numbers"].append(int(floor_number_by_id.get(wp.floor_id, wp.floor_id)))
+            for neighbor_id, distance in graph[wp_id]:
+                index = index_of.get(neighbor_id)
+                if index is None:
+                    continue
+                arrays["targets"].append(index)
+                arrays["weights"].append(float(distance))
+            arrays["offsets"].append(len(arrays["targets"]))
+        return cls(node_ids, arrays, heuristic_scale, floor_cost)
+
+    def nbytes(self) -> int:
+        return sum(len(getattr(self, name)) * 8 for name, _code, _kind in _LAYOUT)
+
+    def to_shared_memory(self, version: Optional[str]) -> Tuple[SharedGraphHandle, shared_memory.SharedMemory]:
+        """Copy the arrays into a new shared-memory block (caller owns/unlinks it)."""
+        shm = shared_memory.SharedMemory(create=True, size=max(self.nbytes(), 8))
+        offset = 0
+        for name, _code, _kind in _LAYOUT:
+            data = getattr(self, name)
+            raw = memoryview(data).cast("B")
+            shm.buf[offset:offset + len(raw)] = raw
+            offset += len(raw)
+            raw.release()
+        handle = SharedGraphHandle(
+            shm.name, self.node_count, self.edge_count, version, self.heuristic_scale, self.floor_cost
+        )
+        return handle, shm
+
+    @classmethod
+    def attach(cls, handle: SharedGraphHandle) -> Tuple["CompiledGraph", shared_memory.SharedMemory]:
+        """Zero-copy view over a published block (node ids are not shared)."""
+        shm = shared_memory.SharedMemory(name=handle.name)
+        lengths = {"n": handle.node_count, "n1": handle.node_count + 1, "m": handle.edge_count}
+        arrays = {}
+        offset = 0
+        for name, code, kind in _LAYOUT:
+            size = lengths[kind] * 8
+            arrays[name] = shm.buf[offset:offset + size].cast(code)
+            offset += size
+        return cls([], arrays, handle.heuristic_scale, handle.floor_cost), shm
+
+    def release(self) -> None:
+        """Drop memoryviews so an attached block can be closed."""
+        for name, _code, _kind in _LAYOUT:
+            value = getattr(self, name, None)
+            if isinstance(value, memoryview):
+                value.release()
+
+
+def heuristic(g: CompiledGraph, a: int, b: int) -> float:
+    """Same estimate as PathFinder.heuristic, by node index."""
+    base = math.sqrt((g.xs[b] - g.xs[a]) ** 2 + (g.ys[b] - g.ys[a]) ** 2) * g.heuristic_scale
+    if g.floor_ids[a] == g.floor_ids[b]:
+        return base
+    return base + abs(g.floor_numbers[b] - g.floor_numbers[a]) * g.floor_cost
+
+
+def astar(g: CompiledGraph, start: int, goal: int) -> Tuple[List[int], float, int]:
+    """
+    A* over the CSR arrays.
+    Returns (node indices from start to goal, distance, nodes expanded);
+    ([], inf, expanded) if unreachable.
+    """
+    if start == goal:
+        return [start], 0.0, 0
+    offsets, targets, weights = g.offsets, g.targets, g.weights
+    g_scores = {start: 0.0}
+    parents = {start: -1}
+    closed = set()
+    open_set = [(heuristic(g, start, goal), 0.0, start)]
+    expanded = 0
+    while open_set:
+        _f, dist, node = heapq.heappop(open_set)
+        if node == goal:
+            path = [node]
+            while parents[path[-1]] != -1:
+                path.append(parents[path[-1]])
+            path.reverse()
+            return path, dist, expanded
+        if node in closed:
+            continue
+        closed.add(node)
+        expanded += 1
+        for e in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[e]
+            if neighbor in closed:
+                continue
+            tentative = dist + weights[e]
+            if tentative < g_scores.get(neighbor, math.inf):
+                g_scores[neighbor] = tentative
+                parents[neighbor] = node
+                heapq.heappush(open_set, (tentative + heuristic(g, neighbor, goal), tentative, neighbor))
+    return [], math.inf, expanded
+
+
+def dijkstra(g: CompiledGraph, source: int) -> array:
+    """
+    Shortest-path tree from `source`: walking distance to every node by
+    index (inf if unreachable), 8 bytes per node.
+    """
+    offsets, targets, weights = g.offsets, g.targets, g.weights
+    dist = [math.inf] * g.node_count
+    dist[source] = 0.0
+    open_set = [(0.0, source)]
+    while open_set:
+        d, node = heapq.heappop(open_set)
+        if d > dist[node]:
+            continue
+        for e in range(offsets[node], offsets[node + 1]):
+            candidate = d + weights[e]
+            neighbor = targets[e]
+            if candidate < dist[neighbor]:
+                dist[neighbor] = candidate
+                heapq.heappush(open_set, (candidate, neighbor))
+    return array("d", dist)
@@ -0,0 +1,126 @@
+# app/services/graph_warmup.py
+"""
+Startup warm-up for the navigation graph.
+
+Loads GraphCache (and every index built alongside it) before traffic arrives,
+so the first /find-path after a deploy doesn't pay the full build cost. Kiosk
+shortest-path trees (distance-ranked room search) are computed here too.
+
+When gunicorn runs with `preload_app`, the warm-up happens once in the master
+and the loaded objects are moved into the permanent GC generation
+(`gc.freeze()`), so forked workers share those pages copy-on-write instead of
+each touching (and therefore copying) them on the first collection.
+
+At startup the warm-up is retried with capped exponential backoff
+(`warm_up_graph_with_retry`): if the DB isn't accepting connections yet, the
+process still becomes ready once it is, instead of waiting for a request the
+readiness gate keeps away.
+"""
+import gc
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.services.pathfinding import GraphCache
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+
+
+def is_ready() -> bool:
+    """True once the graph has been warmed at least once in this process."""
+    if _ready.is_set():
+        return True
+    # A request may have loaded the graph lazily after a failed warm-up.
+    if GraphCache.get_instance().initialized:
+        _ready.set()
+        return True
+    return False
+
+
+def mark_ready() -> None:
+    _ready.set()
+
+
+def reset() -> None:
+    """Forget readiness (tests only)."""
+    _ready.clear()
+
+
+def warm_up_graph(
+    session_factory: Optional[Callable[[], Session]] = None,
+    freeze: bool = False,
+) -> bool:
+    """
+    Load and compile the graph with a dedicated DB session.
+
+    Returns True on success. Failures are logged, not raised: the API still
+    serves requests and the graph is built lazily on first use.
+    """
+    if session_factory is None:
+        from app.database import SessionLocal
+        session_factory = SessionLocal
+
+    started = time.perf_counter()
+    db = None
+    try:
+        db = session_factory()
+        cache = GraphCache.get_instance()
+        cache.load_graph(db)
+        kiosk_trees = cache.warm_kiosk_trees()
+    except Exception as e:
+        logger.error("Graph warm-up failed: %s", e)
+        return False
+    finally:
+        if db is not None:
+            db.close()
+
+    if freeze:
+        # Don't hand pooled DB sockets to forked workers.
+        from app.database import engine
+        engine.dispose()
+        gc.collect()
+        gc.freeze()
+
+    mark_ready()
+    logger.info(
+        "Graph warm-up finished in %.1f ms (kiosk trees=%d, frozen=%s)",
+        (time.perf_counter() - started) * 1000,
+        kiosk_trees,
+        freeze,
+    )
+    return True
+
+
+def warm_up_graph_with_retry(
+    session_factory: Optional[Callable[[], Session]] = None,
+    stop: Optional[threading.Event] = None,
+    initial_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> bool:
+    """
+    Run warm_up_graph until it succeeds, doubling the pause between attempts
+    up to `max_delay` (GRAPH_WARMUP_RETRY_* settings by default).
+
+    Returns False only if `stop` is set first (shutdown). Also returns once a
+    request has loaded the graph lazily in the meantime.
+    """
+    from app.core.config import settings
+    delay = settings.GRAPH_WARMUP_RETRY_INITIAL_SECONDS if initial_delay is None else initial_delay
+    max_delay = settings.GRAPH_WARMUP_RETRY_MAX_SECONDS if max_delay is None else max_delay
+    stop = stop or threading.Event()
+
+    attempt = 1
+    while not warm_up_graph(session_factory):
+        if is_ready():
+            return True
+        logger.warning("Graph warm-up attempt %d failed; retrying in %.1f s", attempt, delay)
+        if stop.wait(delay):
+            return False
+        delay = min(delay * 2, max_delay)
+        attempt += 1
+    return True
@@ -0,0 +1,414 @@
+# app/services/map_audit.py
+"""
+Admin map audit computed from the GraphCache snapshot.
+
+The audit used to reload every floor/waypoint/connection and run its own DFS
+on each request. Everything it needs is already in GraphCache (graph
+adjacency, waypoint rows, floor names, dangling and cross-floor connections),
+so it is derived from there with union-find and per-floor counters, and the
+rendered JSON is cached per graph version.
+
+With MAP_AUDIT_BACKGROUND_REFRESH, every GraphCache.clear() schedules a
+debounced rebuild of the graph and the audit, so the admin page finds a
+fresh result after a burst of edits.
+"""
+import json
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.waypoint import Waypoint, WaypointType
+from app.services.pathfinding import GraphCache
+from app.utils.lru import BoundedLRU
+from app.utils.union_find import UnionFind
+
+logger = logging.getLogger(__name__)
+
+_VERTICAL = (WaypointType.STAIRS, WaypointType.ELEVATOR)
+
+# graph version -> rendered audit JSON (current version plus one previous)
+_audit_cache = BoundedLRU(max_entries=2)
+
+
+@dataclass(frozen=True)
+class AuditSnapshot:
+    """Consistent references to one GraphCache build (containers are never mutated after build)."""
+    version: Optional[str]
+    graph: Dict[str, List[Tuple[str, float]]]
+    waypoints: Dict[str, Waypoint]
+    floor_number_by_id: Dict[int, int]
+    floor_name_by_id: Dict[int, Optional[str]]
+    dangling_connections: List[Tuple[str, str, str]]
+    cross_floor_connections: List[Tuple[str, str]]
+
+
+def take_snapshot(cache: GraphCache, db: Session) -> AuditSnapshot:
+    """Load the graph if needed and capture the fields of that one build."""
+    graph = cache.load_graph(db)
+    return AuditSnapshot(
+        version=graph.version,
+        graph=graph.graph,
+        waypoints=graph.waypoints_dict,
+        floor_number_by_id=graph.floor_number_by_id,
+        floor_name_by_id=graph.floor_name_by_id,
+        dangling_connections=graph.dangling_connections,
+        cross_floor_connections=graph.cross_floor_connections,
+    )
+
+
+def _floor_info(snap: AuditSnapshot, fid: int) -> Dict[str, Any]:
+    return {
+        "id": fid,
+        "floor_number": snap.floor_number_by_id.get(fid),
+        "name": snap.floor_name_by_id.get(fid),
+    }
+
+
+def _legacy_issues(snap: AuditSnapshot) -> Iterator[Dict[str, Any]]:
+    """One-way or broken connects_to_waypoint links."""
+    waypoints = snap.waypoints
+    for wp in waypoints.values():
+        if not wp.connects_to_waypoint:
+            continue
+        target = waypoints.get(wp.connects_to_waypoint)
+        if target is None:
+            yield {
+                "waypoint_id": wp.id,
+                "floor": _floor_info(snap, wp.floor_id),
+                "connects_to_waypoint": wp.connects_to_waypoint,
+                "issue": "target_missing",
+            }
+        elif target.connects_to_waypoint != wp.id:
+            yield {
+                "waypoint_id": wp.id,
+                "floor": _floor_info(snap, wp.floor_id),
+                "connects_to_waypoint": target.id,
+                "issue": "reverse_missing",
+            }
+
+
+def _legacy_pairs(snap: AuditSnapshot) -> List[Tuple[str, str]]:
+    """Every connects_to_waypoint link whose target exists (any waypoint type)."""
+    waypoints = snap.waypoints
+    return [
+        (wp.id, wp.connects_to_waypoint) for wp in waypoints.values()
+        if wp.connects_to_waypoint and wp.connects_to_waypoint in waypoints
+    ]
+
+
+def component_sets(snap: AuditSnapshot, legacy_links: List[Tuple[str, str]]) -> UnionFind:
+    """
+    Connected components over connections + every legacy link.
+    The graph already holds connections and stairs/elevator links; links set on
+    other waypoint types are only joined here (the router ignores them).
+    """
+    components = UnionFind(snap.waypoints)
+    for from_id, neighbors in snap.graph.items():
+        for to_id, _distance in neighbors:
+            components.union(from_id, to_id)
+    for a, b in legacy_links:
+        components.union(a, b)
+    return components
+
+
+def _component_floors(snap: AuditSnapshot, members: List[str]) -> Tuple[List[int], List[int]]:
+    floor_ids = sorted({snap.waypoints[wp_id].floor_id for wp_id in members})
+    floor_numbers = [snap.floor_number_by_id[fid] for fid in floor_ids if fid in snap.floor_number_by_id]
+    return floor_ids, floor_numbers
+
+
+def _cross_neighbors(snap: AuditSnapshot) -> Dict[str, List[str]]:
+    neighbors: Dict[str, List[str]] = {}
+    for a, b in snap.cross_floor_connections:
+        neighbors.setdefault(a, []).append(b)
+        neighbors.setdefault(b, []).append(a)
+    return neighbors
+
+
+def _stairs_without_vertical_links(snap: AuditSnapshot, cross: Dict[str, List[str]]) -> Iterator[Dict[str, Any]]:
+    waypoints = snap.waypoints
+    for wp in waypoints.values():
+        if wp.type not in _VERTICAL or wp.id in cross:
+            continue
+        target = waypoints.get(wp.connects_to_waypoint) if wp.connects_to_waypoint else None
+        if target is None or target.floor_id == wp.floor_id:
+            yield {"waypoint_id": wp.id, "type": wp.type.value, "floor": _floor_info(snap, wp.floor_id)}
+
+
+def _vertical_connections(snap: AuditSnapshot, cross: Dict[str, List[str]]) -> Iterator[Dict[str, Any]]:
+    """Stairs/elevator links (legacy or connection), each pair once."""
+    waypoints = snap.waypoints
+    seen: Set[Tuple[str, str]] = set()
+    for wp in waypoints.values():
+        if wp.type not in _VERTICAL:
+            continue
+        others = [waypoints[n] for n in cross.get(wp.id, ())]
+        target = waypoints.get(wp.connects_to_waypoint) if wp.connects_to_waypoint else None
+        if target is not None:
+            others.insert(0, target)
+        for other in others:
+            pair = (wp.id, other.id) if wp.id <= other.id else (other.id, wp.id)
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield {
+                "from_id": wp.id,
+                "from_floor": _floor_info(snap, wp.floor_id),
+                "to_id": other.id,
+                "to_floor": _floor_info(snap, other.floor_id),
+                "type": wp.type.value,
+            }
+
+
+def _unattached_waypoints(snap: AuditSnapshot, legacy_links: List[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+    linked = {wp_id for link in legacy_links for wp_id in link}
+    for wp in snap.waypoints.values():
+        if not snap.graph.get(wp.id) and wp.id not in linked:
+            yield {
+                "waypoint_id": wp.id,
+                "label": wp.label,
+                "type": wp.type.value,
+                "floor": _floor_info(snap, wp.floor_id),
+            }
+
+
+def _missing_waypoints_in_connections(snap: AuditSnapshot) -> Iterator[Dict[str, Any]]:
+    for conn_id, from_id, to_id in snap.dangling_connections:
+        yield {"connection_id": conn_id, "from_waypoint_id": from_id, "to_waypoint_id": to_id}
+
+
+def _connection_count(snap: AuditSnapshot) -> int:
+    """Rows in the connections table, recovered from the graph (no DB query)."""
+    adjacency_entries = sum(len(neighbors) for neighbors in snap.graph.values())
+    # Each stairs/elevator link with an existing target adds two entries, each connection two more
+    legacy_edges = sum(
+        1 for wp in snap.waypoints.values()
+        if wp.type in _VERTICAL and wp.connects_to_waypoint and wp.connects_to_waypoint in snap.graph
+    )
+    return (adjacency_entries - 2 * legacy_edges) // 2 + len(snap.dangling_connections)
+
+
+def _count(items: Iterable) -> int:
+    return sum(1 for _ in items)
+
+
+class _AuditParts:
+    """Shared first pass of both report formats: components and floor summaries."""
+
+    def __init__(self, snap: AuditSnapshot):
+        self.snap = snap
+        self.legacy_links = _legacy_pairs(snap)
+        self.groups = component_sets(snap, self.legacy_links).groups()
+        self.cross = _cross_neighbors(snap)
+
+        waypoints_per_floor = Counter(wp.floor_id for wp in snap.waypoints.values())
+        self.floors_with_no_waypoints = [
+            _floor_info(snap, fid) for fid in snap.floor_number_by_id if not waypoints_per_floor[fid]
+        ]
+        self.disconnected_floors: List[Dict[str, Any]] = []
+        if self.groups:
+            largest = max(self.groups, key=len)
+            connected_floor_ids = {snap.waypoints[wp_id].floor_id for wp_id in largest}
+            self.disconnected_floors = [
+                _floor_info(snap, fid) for fid in snap.floor_number_by_id
+                if fid not in connected_floor_ids and waypoints_per_floor[fid]
+            ]
+
+    def issues(self) -> Dict[str, Callable[[], Iterator[Dict[str, Any]]]]:
+        return {
+            "legacy_one_way_links": lambda: _legacy_issues(self.snap),
+            "stairs_without_vertical_links": lambda: _stairs_without_vertical_links(self.snap, self.cross),
+            "missing_waypoints_in_connections": lambda: _missing_waypoints_in_connections(self.snap),
+        }
+
+    def vertical_connections(self) -> Iterator[Dict[str, Any]]:
+        return _vertical_connections(self.snap, self.cross)
+
+    def unattached_waypoints(self) -> Iterator[Dict[str, Any]]:
+        return _unattached_waypoints(self.snap, self.legacy_links)
+
+    def summary(self, issue_counts: Dict[str, int], unattached: int, vertical: int) -> Dict[str, Any]:
+        snap = self.snap
+        return {
+            "floors": len(snap.floor_number_by_id),
+            "waypoints": len(snap.waypoints),
+            "connections": _connection_count(snap),
+            "components": len(self.groups),
+            "disconnected_floors": self.disconnected_floors,
+            "floors_with_no_waypoints": self.floors_with_no_waypoints,
+            "legacy_one_way_links": issue_counts["legacy_one_way_links"],
+            "stairs_without_vertical_links": issue_counts["stairs_without_vertical_links"],
+            "unattached_waypoints": unattached,
+            "vertical_connections": vertical,
+        }
+
+
+def compute_audit(snap: AuditSnapshot) -> Dict[str, Any]:
+    """Same report (keys and rules) as the original per-request audit."""
+    parts = _AuditParts(snap)
+    components = []
+    for index, members in enumerate(parts.groups, start=1):
+        floor_ids, floor_numbers = _component_floors(snap, members)
+        components.append({
+            "component_id": index,
+            "waypoint_count": len(members),
+            "waypoint_ids": members,
+            "floor_ids": floor_ids,
+            "floor_numbers": floor_numbers,
+        })
+    issues = {name: list(make()) for name, make in parts.issues().items()}
+    vertical_connections = list(parts.vertical_connections())
+    unattached_waypoints = list(parts.unattached_waypoints())
+    return {
+        "summary": parts.summary(
+            {name: len(items) for name, items in issues.items()},
+            len(unattached_waypoints),
+            len(vertical_connections),
+        ),
+        "components": components,
+        "vertical_connections": vertical_connections,
+        "unattached_waypoints": unattached_waypoints,
+        "issues": issues,
+    }
+
+
+def iter_audit_ndjson(snap: AuditSnapshot, page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    The audit as a stream of records (one NDJSON line each), produced lazily:
+
+    - {"record": "summary", ...}: same fields as the report summary
+    - {"record": "component", component_id, waypoint_count, floor_ids, floor_numbers,
+       pages, page: 0, waypoint_ids: first page}
+    - {"record": "component_waypoints", component_id, page, waypoint_ids}: further pages
+    - {"record": "vertical_connection", ...} / {"record": "unattached_waypoint", ...}
+    - {"record": "issue", "kind": <issues key>, ...}
+    - {"record": "end"}
+
+    `record` is the line kind (entries keep their own `type` field).
+    Counts for the summary are taken with an extra counting pass, so no list
+    of report entries is ever held in memory.
+    """
+    parts = _AuditParts(snap)
+    issue_counts = {name: _count(make()) for name, make in parts.issues().items()}
+    yield {
+        "record": "summary",
+        **parts.summary(
+            issue_counts, _count(parts.unattached_waypoints()), _count(parts.vertical_connections())
+        ),
+    }
+
+    for index, members in enumerate(parts.groups, start=1):
+        floor_ids, floor_numbers = _component_floors(snap, members)
+        pages = max(1, -(-len(members) // page_size))
+        yield {
+            "record": "component",
+            "component_id": index,
+            "waypoint_count": len(members),
+            "floor_ids": floor_ids,
+            "floor_numbers": floor_numbers,
+            "pages": pages,
+            "page": 0,
+            "waypoint_ids": members[:page_size],
+        }
+        for page in range(1, pages):
+            yield {
+                "record": "component_waypoints",
+                "component_id": index,
+                "page": page,
+                "waypoint_ids": members[page * page_size:(page + 1) * page_size],
+            }
+
+    for entry in parts.vertical_connections():
+        yield {"record": "vertical_connection", **entry}
+    for entry in parts.unattached_waypoints():
+        yield {"record": "unattached_waypoint", **entry}
+    for name, make in parts.issues().items():
+        for entry in make():
+            yield {"record": "issue", "kind": name, **entry}
+    yield {"record": "end"}
+
+
+def ndjson_chunks(records: Iterable[Dict[str, Any]], chunk_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """Encode records as NDJSON lines, grouped into ~chunk_bytes writes."""
+    buffer: List[bytes] = []
+    size = 0
+    for record in records:
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def get_audit_json(cache: GraphCache, db: Session) -> bytes:
+    """Rendered audit for the current graph version (computed once per version)."""
+    snap = take_snapshot(cache, db)
+    body = _audit_cache.get(snap.version)
+    if body is None:
+        body = json.dumps(compute_audit(snap), separators=(",", ":")).encode()
+        _audit_cache.set(snap.version, body)
+    return body
+
+
+class _BackgroundRefresher:
+    """Debounced rebuild of graph + audit after GraphCache.clear()."""
+
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def schedule(self, _reason: str) -> None:
+        with self._lock:
+            if self._stopped:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay_seconds, self._refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _refresh(self) -> None:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            get_audit_json(GraphCache.get_instance(), db)
+        except Exception:
+            logger.exception("Background map audit refresh failed")
+        finally:
+            db.close()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+_refresher: Optional[_BackgroundRefresher] = None
+
+
+def enable_background_refresh(delay_seconds: float) -> None:
+    global _refresher
+    if _refresher is not None:
+        return
+    _refresher = _BackgroundRefresher(delay_seconds)
+    GraphCache.get_instance().add_clear_listener(_refresher.schedule)
+
+
+def disable_background_refresh() -> None:
+    global _refresher
+    if _refresher is None:
+        return
+    GraphCache.get_instance().remove_clear_listener(_refresher.schedule)
+    _refresher.stop()
+    _refresher = None
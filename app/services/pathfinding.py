@@ -1,17 +1,35 @@
 # app/services/pathfinding.py
+import hashlib
 import heapq
+import logging
 import math
-from typing import List, Dict, Tuple, Optional, cast
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, FrozenSet, List, Dict, Tuple, Optional, Type, Union, cast
 from sqlalchemy.orm import Session
 from app.models.waypoint import Waypoint, WaypointType
 from app.models.connection import Connection
 from app.models.room import Room
 from app.models.floor import Floor
+from app.models.kiosk import Kiosk
+from app.core import server_timing
+from app.core.metrics import GRAPH_CACHE_LOOKUPS, GRAPH_LOAD_SECONDS
+from app.services.compiled_graph import CompiledGraph, dijkstra
+from app.services.spatial_index import FloorSegmentIndex, FloorSpatialIndex
+from app.utils.lru import BoundedLRU
+from app.utils.memory import deep_sizeof
+from app.utils.singleflight import SingleFlight
+from app.utils.union_find import UnionFind
+
+logger = logging.getLogger(__name__)
 
 class PathNode:
     """Yo'l topish uchun node struktura"""
     def __init__(self, waypoint_id: str, floor_id: int, x: int, y: int, 
-                 g_score: float, f_score: float, parent: Optional['PathNode'] = None):
+                 g_score: float, f_score: float, parent: Optional['PathNode'] = None,
+                 seq: int = 0):
         self.waypoint_id = waypoint_id
         self.floor_id = floor_id
         self.x = x
@@ -19,9 +37,11 @@ class PathNode:
         self.g_score = g_score  # Boshlanishdan bu node gacha masofa
         self.f_score = f_score  # g_score + heuristic (taxminiy masofa maqsadgacha)
         self.parent = parent
+        # CompiledGraph node index: ties break like compiled_graph.astar's (f, g, node) heap
+        self.seq = seq
     
     def __lt__(self, other):
-        return self.f_score < other.f_score
+        return (self.f_score, self.g_score, self.seq) < (other.f_score, other.g_score, other.seq)
     
     def __eq__(self, other):
         return self.waypoint_id == other.waypoint_id
@@ -29,18 +49,128 @@ class PathNode:
     def __hash__(self):
         return hash(self.waypoint_id)
 
+@dataclass(frozen=True)
+class GraphSnapshot:
+    """
+    One GraphCache build, published as a single reference.
+
+    Containers are never mutated after the build, so a reader holding a
+    snapshot sees one consistent map version even if clear() or a rebuild
+    runs in another thread.
+    """
+    version: str
+    graph: Dict[str, List[Tuple[str, float]]]
+    waypoints_dict: Dict[str, Waypoint]
+    floor_number_by_id: Dict[int, int]
+    floor_name_by_id: Dict[int, Optional[str]]
+    # Floor image (width, height); None if the floor has no image size
+    floor_size_by_id: Dict[int, Tuple[Optional[int], Optional[int]]]
+    # Connections skipped by the graph (missing endpoint): (id, from, to) - for the audit
+    dangling_connections: List[Tuple[str, str, str]]
+    # Connections whose endpoints are on different floors (ramps, stairs drawn as edges)
+    cross_floor_connections: List[Tuple[str, str]]
+    room_anchor_by_id: Dict[int, str]
+    # Every room in the build, with or without an anchor (see PathFinder.reload_if_unknown)
+    room_ids: FrozenSet[int]
+    # Rooms attached to each waypoint: (room_id, name, room floor_id)
+    rooms_by_waypoint: Dict[str, List[Tuple[int, str, Optional[int]]]]
+    # Kiosk -> its waypoint (None if not assigned)
+    kiosk_waypoint_by_id: Dict[int, Optional[str]]
+    spatial_by_floor: Dict[int, FloorSpatialIndex]
+    # Same-floor corridor segments (connections) for coordinate snapping
+    segments_by_floor: Dict[int, FloorSegmentIndex]
+    # Direction (radians, atan2(dy, dx)) of every directed graph edge
+    edge_bearings: Dict[Tuple[str, str], float]
+    # Index-based snapshot for the process-pool search engine
+    compiled: CompiledGraph
+    # Heuristic calibration (see _calibrate_heuristic)
+    heuristic_scale: float
+    floor_heuristic_cost: float
+    # Introspection, computed once per build (see _graph_stats / debug endpoint)
+    stats: Dict[str, Any]
+    # time.monotonic() of the build (GRAPH_CACHE_TTL_SECONDS)
+    built_at: float
+
+    def nearest_waypoints(self, floor_id: int, x: float, y: float, k: int = 1) -> List[Tuple[float, str]]:
+        """k nearest waypoints on a floor: [(distance, waypoint_id)], nearest first."""
+        index = self.spatial_by_floor.get(floor_id)
+        return index.nearest(x, y, k) if index else []
+
+    def waypoints_within(self, floor_id: int, x: float, y: float, radius: float) -> List[Tuple[float, str]]:
+        """Waypoints on a floor within `radius` of (x, y), nearest first."""
+        index = self.spatial_by_floor.get(floor_id)
+        return index.within_radius(x, y, radius) if index else []
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """Estimated bytes per structure (sampled deep size; shared strings counted per structure)."""
+        structures = {
+            "graph": self.graph,
+            "waypoints": self.waypoints_dict,
+            "edge_bearings": self.edge_bearings,
+            "spatial_index": self.spatial_by_floor,
+            "segment_index": self.segments_by_floor,
+            "rooms_by_waypoint": self.rooms_by_waypoint,
+            "room_anchors": self.room_anchor_by_id,
+            "kiosks": self.kiosk_waypoint_by_id,
+            "compiled": self.compiled,
+        }
+        return {name: deep_sizeof(value, sample=256) for name, value in structures.items()}
+
+
+def _snapshot_field(name: str, empty: Callable[[], Any]) -> property:
+    """Read-only GraphCache attribute taken from the current snapshot (`empty()` if none)."""
+    def get(self: "GraphCache") -> Any:
+        snapshot = self.snapshot
+        return getattr(snapshot, name) if snapshot is not None else empty()
+    return property(get, doc=f"GraphSnapshot.{name} of the current build")
+
+
 class GraphCache:
     """
     Singleton for caching the navigation graph.
     Stores pre-computed graph and waypoint data to avoid DB hits on every request.
+
+    Each build is published as one GraphSnapshot; readers that need several
+    structures together take `load_graph()`'s return value (or `snapshot`)
+    once instead of reading the attributes below one by one.
     """
     _instance = None
-    
+
+    graph = _snapshot_field("graph", lambda: None)
+    waypoints_dict = _snapshot_field("waypoints_dict", dict)
+    floor_number_by_id = _snapshot_field("floor_number_by_id", dict)
+    floor_name_by_id = _snapshot_field("floor_name_by_id", dict)
+    floor_size_by_id = _snapshot_field("floor_size_by_id", dict)
+    dangling_connections = _snapshot_field("dangling_connections", list)
+    cross_floor_connections = _snapshot_field("cross_floor_connections", list)
+    room_anchor_by_id = _snapshot_field("room_anchor_by_id", dict)
+    rooms_by_waypoint = _snapshot_field("rooms_by_waypoint", dict)
+    kiosk_waypoint_by_id = _snapshot_field("kiosk_waypoint_by_id", dict)
+    spatial_by_floor = _snapshot_field("spatial_by_floor", dict)
+    segments_by_floor = _snapshot_field("segments_by_floor", dict)
+    edge_bearings = _snapshot_field("edge_bearings", dict)
+    compiled = _snapshot_field("compiled", lambda: None)
+    heuristic_scale = _snapshot_field("heuristic_scale", lambda: 1.0)
+    floor_heuristic_cost = _snapshot_field("floor_heuristic_cost", lambda: 0.0)
+    # Content fingerprint of the loaded map (floors/waypoints/connections/rooms)
+    version = _snapshot_field("version", lambda: None)
+    stats = _snapshot_field("stats", dict)
+
     def __init__(self):
-        self.graph: Optional[Dict[str, List[Tuple[str, float]]]] = None
-        self.waypoints_dict: Dict[str, Waypoint] = {}
-        self.floor_number_by_id: Dict[int, int] = {}
-        self.initialized = False
+        # Current build; replaced as a whole by load_graph(), None after clear()
+        self.snapshot: Optional[GraphSnapshot] = None
+        # Walking-distance nearby-rooms results keyed by (waypoint, radius, cross_floors, version)
+        self.nearby_cache = BoundedLRU(max_entries=2048)
+        # Shortest-path trees (compiled-node distances) keyed by (origin waypoint, version)
+        self.distance_trees = BoundedLRU(max_entries=32)
+        self._tree_flights = SingleFlight()
+        # Last clear(): {"reason", "at"}; kept across rebuilds
+        self.last_invalidation: Optional[Dict[str, Any]] = None
+        # Called with the reason after every clear() (e.g. background audit refresh)
+        self._clear_listeners: List[Callable[[str], None]] = []
+        # Serializes builds so concurrent first requests (or the startup warm-up)
+        # don't all hit the DB, and clear() can't interleave with a half-built graph.
+        self._lock = threading.Lock()
 
     @classmethod
     def get_instance(cls):
@@ -48,45 +178,155 @@ class GraphCache:
             cls._instance = GraphCache()
         return cls._instance
 
-    def clear(self):
-        """Force reload on next request"""
-        self.initialized = False
-        self.graph = None
-        self.waypoints_dict = {}
-        self.floor_number_by_id = {}
+    @property
+    def initialized(self) -> bool:
+        return self.snapshot is not None
+
+    def clear(self, reason: str = "manual"):
+        """Force reload on next request (`reason` is shown by the debug endpoint)"""
+        with self._lock:
+            self.last_invalidation = {"reason": reason, "at": time.time()}
+            self.snapshot = None
+            self.nearby_cache.clear()
+            self.distance_trees.clear()
+        for listener in list(self._clear_listeners):
+            try:
+                listener(reason)
+            except Exception:
+                logger.exception("GraphCache clear listener failed")
 
-    def load_graph(self, db: Session):
+    def add_clear_listener(self, listener: Callable[[str], None]) -> None:
+        self._clear_listeners.append(listener)
+
+    def remove_clear_listener(self, listener: Callable[[str], None]) -> None:
+        if listener in self._clear_listeners:
+            self._clear_listeners.remove(listener)
+
+    def load_graph(self, db: Session) -> GraphSnapshot:
         """
-        Load graph from DB if not already loaded.
+        Load graph from DB if not already loaded (or older than
+        GRAPH_CACHE_TTL_SECONDS); returns the snapshot to use.
         """
-        if self.initialized and self.graph is not None:
-            return
+        snapshot = self.snapshot
+        if snapshot is not None:
+            if not self._expired(snapshot) or not self._lock.acquire(blocking=False):
+                # Fresh, or expired while another thread is already rebuilding it
+                GRAPH_CACHE_LOOKUPS.labels(result="hit").inc()
+                return snapshot
+        else:
+            self._lock.acquire()
 
-        # Double-check locking could be added here for thread safety in high-concurrency,
-        # but for this scale, simple check is sufficient as Python GIL protects dict ops.
-        
-        # Floor order mapping
-        self.floor_number_by_id = {
-            cast(int, fid): cast(int, fnum)
-            for fid, fnum in db.query(Floor.id, Floor.floor_number).all()
+        try:
+            # Another thread may have finished the build while we waited.
+            previous = self.snapshot
+            if previous is not None and not self._expired(previous):
+                GRAPH_CACHE_LOOKUPS.labels(result="hit").inc()
+                return previous
+            GRAPH_CACHE_LOOKUPS.labels(result="miss").inc()
+            started = time.perf_counter()
+            snapshot = self._build(db)
+            elapsed = time.perf_counter() - started
+            GRAPH_LOAD_SECONDS.observe(elapsed)
+            snapshot.stats["build_seconds"] = round(elapsed, 4)
+            if previous is not None:
+                snapshot.stats["rebuild_reason"] = "ttl_expired"
+            else:
+                snapshot.stats["rebuild_reason"] = (
+                    self.last_invalidation["reason"] if self.last_invalidation else "cold_start"
+                )
+            self.snapshot = snapshot
+            return snapshot
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _expired(snapshot: GraphSnapshot) -> bool:
+        """
+        clear() only runs in the process that handled the write; other workers
+        pick the change up once their snapshot is GRAPH_CACHE_TTL_SECONDS old.
+        """
+        from app.core.config import settings
+        ttl = settings.GRAPH_CACHE_TTL_SECONDS
+        return ttl > 0 and time.monotonic() - snapshot.built_at >= ttl
+
+    def distance_tree(
+        self, compiled: Optional[CompiledGraph], version: Optional[str], waypoint_id: str
+    ) -> Optional[array]:
+        """
+        Walking distance from `waypoint_id` to every node of `compiled`
+        (`index_of` order, inf if unreachable); one Dijkstra per origin and
+        map version. Callers pass their own snapshot of compiled/version.
+        """
+        source = compiled.index_of.get(waypoint_id) if compiled is not None else None
+        if source is None:
+            return None
+        key = (waypoint_id, version)
+        tree = self.distance_trees.get(key)
+        if tree is None:
+            tree, _shared = self._tree_flights.do(key, lambda: dijkstra(compiled, source))
+            self.distance_trees.set(key, tree)
+        return tree
+
+    def warm_kiosk_trees(self) -> int:
+        """Precompute distance trees of all kiosks with a waypoint (returns count)."""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return 0
+        origins = {wp_id for wp_id in snapshot.kiosk_waypoint_by_id.values() if wp_id}
+        for wp_id in origins:
+            self.distance_tree(snapshot.compiled, snapshot.version, wp_id)
+        return len(origins)
+
+    def nearest_waypoints(self, floor_id: int, x: float, y: float, k: int = 1) -> List[Tuple[float, str]]:
+        """k nearest waypoints on a floor: [(distance, waypoint_id)], nearest first."""
+        snapshot = self.snapshot
+        return snapshot.nearest_waypoints(floor_id, x, y, k) if snapshot is not None else []
+
+    def waypoints_within(self, floor_id: int, x: float, y: float, radius: float) -> List[Tuple[float, str]]:
+        """Waypoints on a floor within `radius` of (x, y), nearest first."""
+        snapshot = self.snapshot
+        return snapshot.waypoints_within(floor_id, x, y, radius) if snapshot is not None else []
+
+    def _build(self, db: Session) -> GraphSnapshot:
+        """Build graph containers from DB (caller holds the lock and publishes the result)."""
+        # Floor order mapping (+ image size for room anchor fallback)
+        floors = db.query(
+            Floor.id, Floor.floor_number, Floor.image_width, Floor.image_height, Floor.name
+        ).all()
+        floor_number_by_id = {
+            cast(int, fid): cast(int, fnum) for fid, fnum, _w, _h, _name in floors
         }
         
         # Fetch all data once
         waypoints = db.query(Waypoint).all()
         connections = db.query(Connection).all()
+        rooms = db.query(Room.id, Room.name, Room.waypoint_id, Room.floor_id).all()
+        kiosks = db.query(Kiosk.id, Kiosk.waypoint_id).all()
         
         # Initialize containers
         graph = {cast(str, wp.id): [] for wp in waypoints}
         waypoints_dict = {cast(str, wp.id): wp for wp in waypoints}
         
         # Build edges
+        segments_by_floor_rows: Dict[int, List[Tuple[str, str, int, int, int, int, float]]] = {}
+        dangling_connections: List[Tuple[str, str, str]] = []
+        cross_floor_connections: List[Tuple[str, str]] = []
         for conn in connections:
             from_id = cast(str, conn.from_waypoint_id)
             to_id = cast(str, conn.to_waypoint_id)
             if from_id not in graph or to_id not in graph:
+                dangling_connections.append((cast(str, conn.id), from_id, to_id))
                 continue
             graph[from_id].append((to_id, float(conn.distance)))
             graph[to_id].append((from_id, float(conn.distance)))
+            a = waypoints_dict[from_id]
+            b = waypoints_dict[to_id]
+            if a.floor_id == b.floor_id:
+                segments_by_floor_rows.setdefault(cast(int, a.floor_id), []).append(
+                    (from_id, to_id, a.x, a.y, b.x, b.y, float(conn.distance))
+                )
+            else:
+                cross_floor_connections.append((from_id, to_id))
         
         # Vertical connections (Elevators/Stairs)
         for wp in waypoints:
@@ -100,9 +340,279 @@ class GraphCache:
                     if connects_to in graph:
                         graph[connects_to].append((wp_id, floor_change_cost))
         
-        self.graph = graph
-        self.waypoints_dict = waypoints_dict
-        self.initialized = True
+        # Per-edge geometry, so instructions don't recompute atan2 per request
+        edge_bearings: Dict[Tuple[str, str], float] = {}
+        for from_id, edges in graph.items():
+            a = waypoints_dict[from_id]
+            for to_id, _distance in edges:
+                b = waypoints_dict[to_id]
+                edge_bearings[(from_id, to_id)] = math.atan2(b.y - a.y, b.x - a.x)
+
+        # Spatial index per floor (load order is kept for stable tie-breaks)
+        points_by_floor: Dict[int, List[Tuple[str, float, float]]] = {}
+        for wp in waypoints:
+            points_by_floor.setdefault(cast(int, wp.floor_id), []).append(
+                (cast(str, wp.id), cast(int, wp.x), cast(int, wp.y))
+            )
+        spatial_by_floor = {
+            fid: FloorSpatialIndex(points) for fid, points in points_by_floor.items()
+        }
+
+        rooms_by_waypoint: Dict[str, List[Tuple[int, str, Optional[int]]]] = {}
+        for room_id, name, room_wp_id, room_floor_id in rooms:
+            if room_wp_id:
+                rooms_by_waypoint.setdefault(room_wp_id, []).append((room_id, name, room_floor_id))
+
+        heuristic_scale, floor_heuristic_cost = _calibrate_heuristic(
+            graph, waypoints_dict, floor_number_by_id
+        )
+        snapshot = GraphSnapshot(
+            version=_fingerprint(floors, waypoints, connections, rooms),
+            graph=graph,
+            waypoints_dict=waypoints_dict,
+            floor_number_by_id=floor_number_by_id,
+            floor_name_by_id={
+                cast(int, fid): cast(Optional[str], name) for fid, _n, _w, _h, name in floors
+            },
+            floor_size_by_id={
+                cast(int, fid): (cast(Optional[int], w), cast(Optional[int], h)) for fid, _n, w, h, _name in floors
+            },
+            dangling_connections=dangling_connections,
+            cross_floor_connections=cross_floor_connections,
+            room_anchor_by_id=_build_room_anchors(
+                rooms, waypoints, floors, waypoints_dict, spatial_by_floor
+            ),
+            room_ids=frozenset(cast(int, room_id) for room_id, _n, _wp, _f in rooms),
+            rooms_by_waypoint=rooms_by_waypoint,
+            kiosk_waypoint_by_id={
+                cast(int, kid): cast(Optional[str], kwp) for kid, kwp in kiosks
+            },
+            spatial_by_floor=spatial_by_floor,
+            segments_by_floor={
+                fid: FloorSegmentIndex(rows) for fid, rows in segments_by_floor_rows.items()
+            },
+            edge_bearings=edge_bearings,
+            compiled=CompiledGraph.from_graph(
+                graph, waypoints_dict, floor_number_by_id,
+                heuristic_scale=heuristic_scale, floor_cost=floor_heuristic_cost,
+            ),
+            heuristic_scale=heuristic_scale,
+            floor_heuristic_cost=floor_heuristic_cost,
+            stats={},
+            built_at=time.monotonic(),
+        )
+        snapshot.stats.update(_graph_stats(snapshot))
+        return snapshot
+
+
+def _graph_stats(snapshot: GraphSnapshot) -> Dict[str, Any]:
+    """Node/edge/component counts and memory estimate of a freshly built snapshot."""
+    graph = snapshot.graph
+    waypoints_dict = snapshot.waypoints_dict
+    components = UnionFind(graph)
+    edges = vertical_edges = 0
+    for from_id, neighbors in graph.items():
+        from_floor = waypoints_dict[from_id].floor_id
+        for to_id, _distance in neighbors:
+            edges += 1
+            if waypoints_dict[to_id].floor_id != from_floor:
+                vertical_edges += 1
+            components.union(from_id, to_id)
+    sizes = [len(group) for group in components.groups()]
+    memory = snapshot.memory_footprint()
+    return {
+        "version": snapshot.version,
+        "built_at": time.time(),
+        "nodes": len(graph),
+        # Directed adjacency entries: every connection is stored in both directions
+        "edges": edges,
+        "vertical_edges": vertical_edges,
+        "floors": len(snapshot.floor_number_by_id),
+        "components": len(sizes),
+        "largest_component": max(sizes, default=0),
+        "isolated_nodes": sum(1 for wp_id, neighbors in graph.items() if not neighbors),
+        "memory_bytes": memory,
+        "memory_bytes_total": sum(memory.values()),
+    }
+
+
+def _calibrate_heuristic(
+    graph: Dict[str, List[Tuple[str, float]]],
+    waypoints_dict: Dict[str, Waypoint],
+    floor_number_by_id: Dict[int, int],
+) -> Tuple[float, float]:
+    """
+    A* heuristic h = scale * euclid + floor_cost * |floor_number difference|.
+
+    h is consistent (so A* returns optimal routes without reopening nodes)
+    exactly when every edge satisfies scale * euclid + floor_cost * dfloor <= weight.
+    Both factors are therefore derived from the loaded edges: scale is 1.0
+    unless some connection is shorter than its pixel distance, and floor_cost
+    is the cheapest per-floor price of any floor-changing edge (stairs,
+    elevators or cross-floor connections) after its horizontal part.
+    """
+    edges = []
+    for from_id, neighbors in graph.items():
+        a = waypoints_dict[from_id]
+        for to_id, weight in neighbors:
+            b = waypoints_dict[to_id]
+            floors = abs(
+                floor_number_by_id.get(a.floor_id, a.floor_id)
+                - floor_number_by_id.get(b.floor_id, b.floor_id)
+            )
+            edges.append((math.hypot(b.x - a.x, b.y - a.y), floors, weight))
+
+    scale = 1.0
+    for euclid, _floors, weight in edges:
+        if euclid > 0:
+            scale = min(scale, max(weight, 0.0) / euclid)
+
+    floor_cost = math.inf
+    for euclid, floors, weight in edges:
+        if floors:
+            floor_cost = min(floor_cost, (weight - scale * euclid) / floors)
+    # No floor-changing edges: other floors are unreachable, any value is safe
+    floor_cost = 0.0 if floor_cost == math.inf else max(floor_cost, 0.0)
+    return scale, floor_cost
+
+
+def _build_room_anchors(
+    rooms,
+    waypoints: List[Waypoint],
+    floors,
+    waypoints_dict: Dict[str, Waypoint],
+    spatial_by_floor: Dict[int, FloorSpatialIndex],
+) -> Dict[int, str]:
+    """
+    Resolve every room to the waypoint routing should start/end at.
+
+    Rules (same as the old per-request lookup):
+    1. Room.waypoint_id if assigned.
+    2. Otherwise a ROOM waypoint on the room's floor: label matches first,
+       all ROOM waypoints of the floor if none match; among the candidates the
+       one nearest the floor image centre (or candidates' centroid if the
+       floor has no image size).
+    """
+    floor_size = {
+        cast(int, fid): (cast(Optional[int], w), cast(Optional[int], h))
+        for fid, _n, w, h, _name in floors
+    }
+    room_wps_by_floor: Dict[int, List[Waypoint]] = {}
+    label_index: Dict[int, Dict[str, List[Waypoint]]] = {}
+    for wp in waypoints:
+        if wp.type != WaypointType.ROOM:
+            continue
+        fid = cast(int, wp.floor_id)
+        room_wps_by_floor.setdefault(fid, []).append(wp)
+        label = (wp.label or "").strip().lower()
+        label_index.setdefault(fid, {}).setdefault(label, []).append(wp)
+
+    def target_point(fid: int, candidates: List[Waypoint]) -> Tuple[float, float]:
+        width, height = floor_size.get(fid, (None, None))
+        if width and height:
+            return width / 2, height / 2
+        return (
+            sum(cast(int, wp.x) for wp in candidates) / len(candidates),
+            sum(cast(int, wp.y) for wp in candidates) / len(candidates),
+        )
+
+    def is_room_waypoint(wp_id: str) -> bool:
+        return waypoints_dict[wp_id].type == WaypointType.ROOM
+
+    # Rooms without a label match all resolve to the same floor-wide pick,
+    # answered from the floor's spatial index.
+    floor_fallback: Dict[int, str] = {}
+    anchors: Dict[int, str] = {}
+    for room_id, name, waypoint_id, floor_id in rooms:
+        if waypoint_id:
+            anchors[room_id] = waypoint_id
+            continue
+        if not floor_id or floor_id not in room_wps_by_floor:
+            continue
+        matches = label_index[floor_id].get((name or "").strip().lower())
+        if matches:
+            target_x, target_y = target_point(floor_id, matches)
+            nearest = min(
+                matches,
+                key=lambda wp: math.hypot(cast(int, wp.x) - target_x, cast(int, wp.y) - target_y)
+            )
+            anchors[room_id] = cast(str, nearest.id)
+            continue
+        if floor_id not in floor_fallback:
+            target_x, target_y = target_point(floor_id, room_wps_by_floor[floor_id])
+            hits = spatial_by_floor[floor_id].nearest(
+                target_x, target_y, 1, predicate=is_room_waypoint
+            )
+            floor_fallback[floor_id] = hits[0][1]
+        anchors[room_id] = floor_fallback[floor_id]
+    return anchors
+
+
+def _fingerprint(floors, waypoints: List[Waypoint], connections: List[Connection], rooms) -> str:
+    """
+    Content hash of everything the cache is built from.
+    Identical across workers/processes for the same map data.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    for row in sorted(tuple(f) for f in floors):
+        h.update(repr(row).encode())
+    for wp in sorted(waypoints, key=lambda w: w.id):
+        h.update(repr((
+            wp.id, wp.floor_id, wp.x, wp.y, wp.type.value, wp.label, wp.connects_to_waypoint
+        )).encode())
+    for conn in sorted(connections, key=lambda c: c.id):
+        h.update(repr((
+            conn.id, conn.from_waypoint_id, conn.to_waypoint_id, float(conn.distance)
+        )).encode())
+    for row in sorted(tuple(r) for r in rooms):
+        h.update(repr(row).encode())
+    return h.hexdigest()
+
+_VERTICAL_TYPES = ('stairs', 'elevator')
+_STRAIGHT = "To'g'ri davom eting"
+_AFTER_FLOOR_CHANGE = {
+    "To'g'ri davom eting": "Kalidorga chiqib to'g'ri davom eting",
+    "O'ngga buriling": "Kalidorga chiqib o'ngga buriling",
+    "Chapga buriling": "Kalidorga chiqib chapga buriling",
+}
+
+
+def _classify_turn(angle_diff: float) -> str:
+    """Burilish burchagi (0..360, soat strelkasiga teskari) -> yo'riqnoma"""
+    if angle_diff < 45 or angle_diff > 315:
+        return _STRAIGHT
+    if angle_diff < 135:
+        return "Chapga buriling"
+    if 225 < angle_diff:
+        return "O'ngga buriling"
+    return "Orqaga buriling"
+
+
+@dataclass(frozen=True)
+class EdgeSnap:
+    """
+    A floor coordinate projected onto the nearest corridor edge.
+
+    The projected point splits the edge: reaching `from_id` costs
+    `t * distance`, reaching `to_id` costs `(1 - t) * distance`.
+    """
+    floor_id: int
+    x: float
+    y: float
+    from_id: str
+    to_id: str
+    t: float
+    distance: float
+    snap_distance: float
+
+    def seeds(self) -> List[Tuple[str, float]]:
+        """(waypoint_id, cost from/to the projected point)"""
+        return [(self.from_id, self.t * self.distance), (self.to_id, (1 - self.t) * self.distance)]
+
+
+# A route endpoint: a waypoint id or a snapped coordinate
+Endpoint = Union[str, EdgeSnap]
+
 
 class PathFinder:
     """A* algoritmi bilan yo'l topish (using cached graph)"""
@@ -111,11 +621,46 @@ class PathFinder:
         self.db = db
         self.cache = GraphCache.get_instance()
         # Ensure cache is loaded
-        self.cache.load_graph(db)
+        with server_timing.timer("cache"):
+            snapshot = self.cache.load_graph(db)
+        self._use(snapshot)
+        # Nodes expanded by the last search and the engine that ran it (metrics)
+        self.last_expanded = 0
+        self.last_engine = "inprocess"
+
+    def _use(self, snapshot: GraphSnapshot) -> None:
+        # One build for the whole request, even if another thread clears the cache
+        self.snapshot = snapshot
         # Shortcuts for cleaner code
-        self.graph = self.cache.graph
-        self.waypoints_dict = self.cache.waypoints_dict
-        self.floor_number_by_id = self.cache.floor_number_by_id
+        self.graph = snapshot.graph
+        self.waypoints_dict = snapshot.waypoints_dict
+        self.floor_number_by_id = snapshot.floor_number_by_id
+        self.floor_name_by_id = snapshot.floor_name_by_id
+        self.floor_size_by_id = snapshot.floor_size_by_id
+        self.room_anchor_by_id = snapshot.room_anchor_by_id
+        self.rooms_by_waypoint = snapshot.rooms_by_waypoint
+        self.kiosk_waypoint_by_id = snapshot.kiosk_waypoint_by_id
+        self.segments_by_floor = snapshot.segments_by_floor
+        self.edge_bearings = snapshot.edge_bearings
+        self.compiled = snapshot.compiled
+        self.version = snapshot.version
+        self.heuristic_scale = snapshot.heuristic_scale
+        self.floor_heuristic_cost = snapshot.floor_heuristic_cost
+
+    def reload_if_unknown(self, model: Type[Union[Kiosk, Room]], entity_id: int) -> bool:
+        """
+        Snapshotda yo'q kiosk/xona DB da bo'lsa, bu protsessning grafi eskirgan
+        (yozuv boshqa worker'da bo'lgan): kesh tozalanib, graf qayta yuklanadi.
+        Qidiruvdan oldin chaqiriladi. True - graf qayta yuklandi.
+        """
+        known = self.kiosk_waypoint_by_id if model is Kiosk else self.snapshot.room_ids
+        if entity_id in known:
+            return False
+        if self.db.query(model.id).filter(model.id == entity_id).first() is None:
+            return False
+        self.cache.clear(reason=f"unknown_{model.__tablename__}")
+        self._use(self.cache.load_graph(self.db))
+        return True
 
     def build_graph(self):
         """Deprecated: Graph is now built via singleton cache on init"""
@@ -129,14 +674,17 @@ class PathFinder:
         return self.floor_number_by_id.get(floor_id, floor_id)
     
     def heuristic(self, wp1_id: str, wp2_id: str) -> float:
-        """Heuristic funksiya - Euclidean distance + qavat o'zgarishi"""
+        """
+        Heuristic funksiya - Euclidean distance + qavat o'zgarishi.
+        Koeffitsientlar graf qirralaridan hisoblanadi (_calibrate_heuristic),
+        shuning uchun baho hech qachon haqiqiy masofadan oshmaydi.
+        """
         wp1 = self.waypoints_dict.get(wp1_id)
         wp2 = self.waypoints_dict.get(wp2_id)
         
         if wp1 is None or wp2 is None:
             return float('inf')
         
-        # Bir xil qavatda bo'lsa - oddiy Euclidean distance
         wp1_floor = cast(int, wp1.floor_id)
         wp2_floor = cast(int, wp2.floor_id)
         wp1_x = cast(int, wp1.x)
@@ -144,13 +692,14 @@ class PathFinder:
         wp2_x = cast(int, wp2.x)
         wp2_y = cast(int, wp2.y)
 
+        base_distance = math.sqrt((wp2_x - wp1_x)**2 + (wp2_y - wp1_y)**2) * self.heuristic_scale
+        # Bir xil qavatda bo'lsa - oddiy Euclidean distance
         if wp1_floor == wp2_floor:
-            return math.sqrt((wp2_x - wp1_x)**2 + (wp2_y - wp1_y)**2)
+            return base_distance
         
-        # Turli qavatlarda bo'lsa - taxminiy masofa + qavat o'zgarishi
+        # Turli qavatlarda bo'lsa - har bir qavat uchun eng arzon qavat almashish narxi
         floor_diff = abs(self._floor_number(wp2_floor) - self._floor_number(wp1_floor))
-        base_distance = math.sqrt((wp2_x - wp1_x)**2 + (wp2_y - wp1_y)**2)
-        return base_distance + (floor_diff * 100)  # Har bir qavat uchun 100 unit qo'shamiz
+        return base_distance + floor_diff * self.floor_heuristic_cost
     
     def reconstruct_path(self, end_node: PathNode) -> List[Dict]:
         """Yo'lni qayta qurish"""
@@ -178,6 +727,8 @@ class PathFinder:
         Returns: (path, total_distance)
         """
         self.build_graph()
+        self.last_expanded = 0
+        self.last_engine = "inprocess"
         
         if start_id not in self.graph or end_id not in self.graph:
             return [], float('inf')
@@ -192,16 +743,22 @@ class PathFinder:
                 'type': start_wp.type.value,
                 'label': cast(Optional[str], start_wp.label)
             }], 0.0
+
+        pooled = self._find_path_in_pool(start_id, end_id)
+        if pooled is not None:
+            return pooled
         
-        # A* algoritmi
+        # A* algoritmi (teng narxli yo'llar process pool dagi kabi tanlanadi)
+        index_of = self.compiled.index_of if self.compiled is not None else {}
         start_wp = self.waypoints_dict[start_id]
         start_node = PathNode(
             start_id,
             cast(int, start_wp.floor_id),
             cast(int, start_wp.x),
             cast(int, start_wp.y),
-            g_score=0,
-            f_score=self.heuristic(start_id, end_id)
+            g_score=0.0,
+            f_score=self.heuristic(start_id, end_id),
+            seq=index_of.get(start_id, 0)
         )
         
         open_set = [start_node]  # Priority queue
@@ -219,6 +776,7 @@ class PathFinder:
                 continue
             
             closed_set.add(current.waypoint_id)
+            self.last_expanded += 1
             
             # Qo'shnilarni tekshirish
             for neighbor_id, distance in self.graph[current.waypoint_id]:
@@ -241,124 +799,294 @@ class PathFinder:
                         cast(int, neighbor_wp.y),
                         g_score=tentative_g_score,
                         f_score=f_score,
-                        parent=current
+                        parent=current,
+                        seq=index_of.get(neighbor_id, 0)
                     )
                     heapq.heappush(open_set, neighbor_node)
         
         return [], float('inf')  # Yo'l topilmadi
     
+    def _find_path_in_pool(self, start_id: str, end_id: str) -> Optional[Tuple[List[Dict], float]]:
+        """
+        Qidiruvni protsess pulida bajarish (PATHFINDING_PROCESS_WORKERS > 0).
+        Pul o'chirilgan yoki xato bo'lsa None - qidiruv shu protsessda bajariladi.
+        """
+        from app.services.pathfinding_pool import get_pathfinding_executor
+        executor = get_pathfinding_executor()
+        if executor is None or self.compiled is None:
+            return None
+        compiled = self.compiled
+        try:
+            indices, distance, expanded = executor.search(
+                compiled, self.version, compiled.index_of[start_id], compiled.index_of[end_id]
+            )
+        except Exception as e:
+            logger.warning("Process-pool search failed, falling back in-process: %s", e)
+            return None
+        self.last_expanded = expanded
+        self.last_engine = "pool"
+        if not indices:
+            return [], float('inf')
+        return [self._waypoint_step(compiled.node_ids[i]) for i in indices], distance
+
+    def _waypoint_step(self, waypoint_id: str) -> Dict:
+        wp = self.waypoints_dict[waypoint_id]
+        return {
+            'waypoint_id': waypoint_id,
+            'floor_id': cast(int, wp.floor_id),
+            'x': cast(int, wp.x),
+            'y': cast(int, wp.y),
+            'type': wp.type.value,
+            'label': cast(Optional[str], wp.label)
+        }
+
+    def _leg_bearings(self, path: List[Dict]) -> List[float]:
+        """
+        bearings[i] = yo'nalish (radian) path[i-1] -> path[i] bo'lagi uchun.
+        Graf qirralari uchun build vaqtida hisoblangan qiymat olinadi; faqat
+        proyeksiya nuqtalari (type == "point") uchun atan2 hisoblanadi.
+        """
+        edge_bearings = self.edge_bearings
+        bearings = [0.0] * len(path)
+        prev = path[0]
+        for i in range(1, len(path)):
+            step = path[i]
+            bearing = edge_bearings.get((prev['waypoint_id'], step['waypoint_id']))
+            if bearing is None:
+                bearing = math.atan2(step['y'] - prev['y'], step['x'] - prev['x'])
+            bearings[i] = bearing
+            prev = step
+        return bearings
+
     def add_instructions(self, path: List[Dict]) -> List[Dict]:
         """Yo'lga yo'riqnomalar qo'shish"""
         if len(path) <= 1:
             return path
         
+        bearings = self._leg_bearings(path)
+        last_index = len(path) - 1
+        # Ketma-ket takrorlangan "To'g'ri davom eting"larni qisqartirish uchun
+        last_instruction = None
         for i, step in enumerate(path):
             if i == 0:
-                step['instruction'] = "Boshlanish nuqtasi"
-                continue
-            if i == len(path) - 1:
-                step['instruction'] = "Maqsadga yetdingiz"
-                continue
-
-            prev_step = path[i-1]
-            next_step = path[i+1]
-
-            # Qavat o'zgarishi: zinaga/liftga yetganda oldindan ko'rsatma berish
-            if step['type'] in ['stairs', 'elevator'] and next_step['floor_id'] != step['floor_id']:
-                direction = (
-                    "yuqoriga"
-                    if self._floor_number(next_step['floor_id']) > self._floor_number(step['floor_id'])
-                    else "pastga"
-                )
-                if step['type'] == 'stairs':
-                    step['instruction'] = f"Zina orqali {direction} chiqing"
+                instruction = "Boshlanish nuqtasi"
+            elif i == last_index:
+                instruction = "Maqsadga yetdingiz"
+            else:
+                next_step = path[i+1]
+                step_type = step['type']
+                # Qavat o'zgarishi: zinaga/liftga yetganda oldindan ko'rsatma berish
+                if step_type in _VERTICAL_TYPES and next_step['floor_id'] != step['floor_id']:
+                    direction = (
+                        "yuqoriga"
+                        if self._floor_number(next_step['floor_id']) > self._floor_number(step['floor_id'])
+                        else "pastga"
+                    )
+                    if step_type == 'stairs':
+                        instruction = f"Zina orqali {direction} chiqing"
+                    else:
+                        instruction = f"Liftda {direction} chiqing"
                 else:
-                    step['instruction'] = f"Liftda {direction} chiqing"
-                continue
+                    # Yo'nalish farqi: oldindan hisoblangan bo'lak yo'nalishlaridan
+                    instruction = _classify_turn(math.degrees(bearings[i+1] - bearings[i]) % 360)
 
-            # Yo'nalishni hisoblash
-            angle1 = math.atan2(step['y'] - prev_step['y'], step['x'] - prev_step['x'])
-            angle2 = math.atan2(next_step['y'] - step['y'], next_step['x'] - step['x'])
-            angle_diff = math.degrees(angle2 - angle1) % 360
-
-            if angle_diff < 45 or angle_diff > 315:
-                instruction = "To'g'ri davom eting"
-            elif 45 <= angle_diff < 135:
-                instruction = "Chapga buriling"
-            elif 225 < angle_diff <= 315:
-                instruction = "O'ngga buriling"
-            else:
-                instruction = "Orqaga buriling"
-
-            # Qavatlararo o'tishdan keyin koridorga chiqishni ko'rsatish
-            if prev_step['type'] in ['stairs', 'elevator'] and i >= 2:
-                prev_prev = path[i-2]
-                if prev_prev['floor_id'] != prev_step['floor_id']:
-                    if instruction == "To'g'ri davom eting":
-                        instruction = "Kalidorga chiqib to'g'ri davom eting"
-                    elif instruction == "O'ngga buriling":
-                        instruction = "Kalidorga chiqib o'ngga buriling"
-                    elif instruction == "Chapga buriling":
-                        instruction = "Kalidorga chiqib chapga buriling"
-
-            step['instruction'] = instruction
-        
-        # Ketma-ket takrorlangan "To'g'ri davom eting"larni qisqartirish
-        last_instruction = None
-        for step in path:
-            instr = step.get('instruction')
-            if instr == "To'g'ri davom eting" and instr == last_instruction:
+                    # Qavatlararo o'tishdan keyin koridorga chiqishni ko'rsatish
+                    prev_step = path[i-1]
+                    if (
+                        i >= 2
+                        and prev_step['type'] in _VERTICAL_TYPES
+                        and path[i-2]['floor_id'] != prev_step['floor_id']
+                    ):
+                        instruction = _AFTER_FLOOR_CHANGE.get(instruction, instruction)
+
+            if instruction == _STRAIGHT and instruction == last_instruction:
                 step['instruction'] = None
-            elif instr:
-                last_instruction = instr
+            else:
+                step['instruction'] = instruction
+                last_instruction = instruction
 
         return path
     
     def find_nearest_waypoint_to_room(self, room_id: int) -> Optional[str]:
-        """Xonaga eng yaqin waypoint topish"""
-        room = self.db.query(Room).filter(Room.id == room_id).first()
-        if not room:
-            return None
-        
-        # Agar xonaga waypoint biriktirilgan bo'lsa
-        room_waypoint_id = cast(Optional[str], room.waypoint_id)
-        if room_waypoint_id:
-            return room_waypoint_id
-        
-        # Agar floor_id yo'q bo'lsa
-        room_floor_id = cast(Optional[int], room.floor_id)
-        if not room_floor_id:
-            return None
-        
-        # Bir xil qavatdagi ROOM waypointlarni olish
-        room_waypoints = self.db.query(Waypoint).filter(
-            Waypoint.floor_id == room_floor_id,
-            Waypoint.type == WaypointType.ROOM
-        ).all()
-        if not room_waypoints:
+        """Xonaga eng yaqin waypoint topish (GraphCache dagi tayyor indeksdan)"""
+        return self.room_anchor_by_id.get(room_id)
+
+    def snap_to_edge(self, floor_id: int, x: float, y: float) -> Optional[EdgeSnap]:
+        """
+        (floor_id, x, y) ni eng yaqin koridor qirrasiga proyeksiya qilish.
+        Qavatda qirra bo'lmasa, eng yaqin waypointga bog'lanadi.
+        """
+        segments = self.segments_by_floor.get(floor_id)
+        hit = segments.nearest(x, y) if segments else None
+        if hit is not None:
+            snap_distance, seq, t, px, py = hit
+            from_id, to_id, _ax, _ay, _bx, _by, weight = segments.segments[seq]
+            return EdgeSnap(floor_id, px, py, from_id, to_id, t, weight, snap_distance)
+
+        nearest = self.snapshot.nearest_waypoints(floor_id, x, y, 1)
+        if not nearest:
             return None
+        snap_distance, wp_id = nearest[0]
+        wp = self.waypoints_dict[wp_id]
+        return EdgeSnap(floor_id, float(wp.x), float(wp.y), wp_id, wp_id, 0.0, 0.0, snap_distance)
 
-        # Label bo'yicha aniq moslik bo'lsa, shuni ishlatamiz
-        room_label = (room.name or "").strip().lower()
-        label_matches = [
-            wp for wp in room_waypoints
-            if (wp.label or "").strip().lower() == room_label
-        ]
-        candidates = label_matches if label_matches else room_waypoints
-
-        # Xona koordinatasi yo'q bo'lgani uchun, floor markaziga eng yaqin waypointni olamiz
-        floor = self.db.query(Floor).filter(Floor.id == room_floor_id).first()
-        floor_width = cast(Optional[int], floor.image_width) if floor else None
-        floor_height = cast(Optional[int], floor.image_height) if floor else None
-        if floor and floor_width and floor_height:
-            target_x = floor_width / 2
-            target_y = floor_height / 2
-        else:
-            target_x = sum(cast(int, wp.x) for wp in candidates) / len(candidates)
-            target_y = sum(cast(int, wp.y) for wp in candidates) / len(candidates)
+    def _point_step(self, snap: EdgeSnap) -> Dict:
+        return {
+            'waypoint_id': None,
+            'floor_id': snap.floor_id,
+            'x': int(round(snap.x)),
+            'y': int(round(snap.y)),
+            'type': 'point',
+            'label': None,
+        }
 
-        nearest = min(
-            candidates,
-            key=lambda wp: math.hypot(cast(int, wp.x) - target_x, cast(int, wp.y) - target_y)
-        )
-        return cast(str, nearest.id)
+    def _is_at_waypoint(self, snap: EdgeSnap, waypoint_id: str) -> bool:
+        wp = self.waypoints_dict[waypoint_id]
+        return math.hypot(snap.x - wp.x, snap.y - wp.y) < 0.5
+
+    def find_path_between(self, start: Endpoint, end: Endpoint) -> Tuple[List[Dict], float]:
+        """
+        Waypoint yoki qirraga proyeksiya qilingan nuqtalar orasida yo'l topish.
+        Nuqta bo'lsa, yo'l proyeksiya nuqtasidan boshlanadi / tugaydi.
+        Returns: (path, total_distance)
+        """
+        if isinstance(start, str) and isinstance(end, str):
+            return self.find_path(start, end)
+
+        start_seeds = start.seeds() if isinstance(start, EdgeSnap) else [(start, 0.0)]
+        end_seeds = end.seeds() if isinstance(end, EdgeSnap) else [(end, 0.0)]
+        if any(wp_id not in self.graph for wp_id, _ in start_seeds + end_seeds):
+            return [], float('inf')
+
+        best_path: List[Dict] = []
+        best_distance = float('inf')
+
+        # Both points on the same edge: walk along it directly
+        if (
+            isinstance(start, EdgeSnap) and isinstance(end, EdgeSnap)
+            and {start.from_id, start.to_id} == {end.from_id, end.to_id}
+        ):
+            end_t = end.t if end.from_id == start.from_id else 1 - end.t
+            best_distance = abs(start.t - end_t) * start.distance
+            best_path = [self._point_step(start), self._point_step(end)]
+
+        nodes, distance = self._search_seeds(start_seeds, end_seeds, best_distance)
+        if nodes is not None:
+            best_distance = distance
+            best_path = self.reconstruct_path(nodes)
+            if isinstance(start, EdgeSnap) and not self._is_at_waypoint(start, best_path[0]['waypoint_id']):
+                best_path.insert(0, self._point_step(start))
+            if isinstance(end, EdgeSnap) and not self._is_at_waypoint(end, best_path[-1]['waypoint_id']):
+                best_path.append(self._point_step(end))
+
+        return best_path, best_distance
+
+    def _search_seeds(
+        self,
+        start_seeds: List[Tuple[str, float]],
+        end_seeds: List[Tuple[str, float]],
+        upper_bound: float = float('inf'),
+    ) -> Tuple[Optional[PathNode], float]:
+        """
+        Ko'p manbali / ko'p maqsadli A*: har bir seed o'z boshlang'ich
+        (yoki yakuniy) xarajati bilan. Faqat `upper_bound` dan yaxshi yo'l qaytadi.
+        """
+        end_cost: Dict[str, float] = {}
+        for wp_id, cost in end_seeds:
+            end_cost[wp_id] = min(cost, end_cost.get(wp_id, float('inf')))
+
+        def h(wp_id: str) -> float:
+            return min(self.heuristic(wp_id, target) for target in end_cost)
+
+        open_set = []
+        g_scores: Dict[str, float] = {}
+        for wp_id, cost in start_seeds:
+            if cost < g_scores.get(wp_id, float('inf')):
+                g_scores[wp_id] = cost
+                wp = self.waypoints_dict[wp_id]
+                heapq.heappush(open_set, PathNode(
+                    wp_id, cast(int, wp.floor_id), cast(int, wp.x), cast(int, wp.y),
+                    g_score=cost, f_score=cost + h(wp_id)
+                ))
+
+        closed_set = set()
+        self.last_expanded = 0
+        self.last_engine = "multi_seed"
+        best_node: Optional[PathNode] = None
+        best_distance = upper_bound
+        while open_set:
+            current = heapq.heappop(open_set)
+            if current.f_score >= best_distance:
+                break
+            if current.waypoint_id in closed_set:
+                continue
+            closed_set.add(current.waypoint_id)
+            self.last_expanded += 1
+
+            if current.waypoint_id in end_cost:
+                total = current.g_score + end_cost[current.waypoint_id]
+                if total < best_distance:
+                    best_distance = total
+                    best_node = current
+
+            for neighbor_id, distance in self.graph[current.waypoint_id]:
+                if neighbor_id in closed_set or neighbor_id not in self.waypoints_dict:
+                    continue
+                tentative_g_score = current.g_score + distance
+                if tentative_g_score < g_scores.get(neighbor_id, float('inf')):
+                    g_scores[neighbor_id] = tentative_g_score
+                    neighbor_wp = self.waypoints_dict[neighbor_id]
+                    heapq.heappush(open_set, PathNode(
+                        neighbor_id,
+                        cast(int, neighbor_wp.floor_id),
+                        cast(int, neighbor_wp.x),
+                        cast(int, neighbor_wp.y),
+                        g_score=tentative_g_score,
+                        f_score=tentative_g_score + h(neighbor_id),
+                        parent=current
+                    ))
+
+        return best_node, best_distance
+
+    def distance_tree(self, source_id: str) -> Optional[array]:
+        """
+        `source_id` dan barcha waypointlargacha haqiqiy yurish masofasi
+        (qavatlar orasida ham), `compiled.index_of` tartibida. Har bir
+        boshlang'ich nuqta va xarita versiyasi uchun bir marta hisoblanadi.
+        """
+        return self.cache.distance_tree(self.compiled, self.version, source_id)
+
+    def distances_within(
+        self, source_id: str, max_distance: float, cross_floors: bool = False
+    ) -> Dict[str, float]:
+        """
+        Masofasi cheklangan Dijkstra: `source_id` dan `max_distance` gacha
+        yurib yetiladigan barcha waypointlar va ularning haqiqiy masofasi.
+        `cross_floors=False` bo'lsa, zina/lift orqali boshqa qavatga o'tilmaydi.
+        """
+        source = self.waypoints_dict.get(source_id)
+        if source is None:
+            return {}
+        source_floor = source.floor_id
+
+        distances: Dict[str, float] = {source_id: 0.0}
+        settled: Dict[str, float] = {}
+        open_set = [(0.0, source_id)]
+        while open_set:
+            dist, wp_id = heapq.heappop(open_set)
+            if wp_id in settled:
+                continue
+            settled[wp_id] = dist
+            for neighbor_id, edge in self.graph[wp_id]:
+                if neighbor_id in settled:
+                    continue
+                neighbor = self.waypoints_dict.get(neighbor_id)
+                if neighbor is None:
+                    continue
+                if not cross_floors and neighbor.floor_id != source_floor:
+                    continue
+                candidate = dist + edge
+                if candidate <= max_distance and candidate < distances.get(neighbor_id, float('inf')):
+                    distances[neighbor_id] = candidate
+                    heapq.heappush(open_set, (candidate, neighbor_id))
+        return settled
@@ -0,0 +1,106 @@
+# app/services/pathfinding_pool.py
+"""
+Optional process pool for CPU-bound route searches.
+
+find-path is a sync endpoint, so every search runs in the shared AnyIO thread
+pool and holds the GIL. With PATHFINDING_PROCESS_WORKERS > 0, searches are
+sent to a small pool of spawned processes instead:
+
+- the CompiledGraph is copied into shared memory once per graph version;
+- each task carries only the block handle and a (start, end) index pair;
+- workers attach to the block on first use of a version (zero-copy) and keep
+  it until a newer version arrives.
+
+The calling thread just waits on the future (GIL released), so CRUD endpoints
+on the same worker stay responsive while searches use the other cores.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+from app.services.compiled_graph import CompiledGraph, SharedGraphHandle, astar
+
+logger = logging.getLogger(__name__)
+
+# Per-process state inside pool workers: (handle name, graph view, shm)
+_attached: Optional[Tuple[str, CompiledGraph, shared_memory.SharedMemory]] = None
+
+
+def _search_in_worker(handle: SharedGraphHandle, start: int, end: int) -> Tuple[List[int], float, int]:
+    global _attached
+    if _attached is None or _attached[0] != handle.name:
+        if _attached is not None:
+            _attached[1].release()
+            _attached[2].close()
+            _attached = None
+        graph, shm = CompiledGraph.attach(handle)
+        _attached = (handle.name, graph, shm)
+    return astar(_attached[1], start, end)
+
+
+class PathfindingExecutor:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            # spawn: never fork a process that already runs server threads
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._lock = threading.Lock()
+        self._published: Optional[Tuple[SharedGraphHandle, shared_memory.SharedMemory]] = None
+
+    def _publish(self, compiled: CompiledGraph, version: Optional[str]) -> SharedGraphHandle:
+        with self._lock:
+            if self._published is not None and self._published[0].version == version:
+                return self._published[0]
+            handle, shm = compiled.to_shared_memory(version)
+            previous = self._published
+            self._published = (handle, shm)
+        if previous is not None:
+            # Workers that already attached keep their mapping after unlink.
+            previous[1].close()
+            previous[1].unlink()
+        logger.info("Published compiled graph %s to shared memory (%d bytes)", version, shm.size)
+        return handle
+
+    def search(
+        self, compiled: CompiledGraph, version: Optional[str], start: int, end: int
+    ) -> Tuple[List[int], float, int]:
+        handle = self._publish(compiled, version)
+        return self._pool.submit(_search_in_worker, handle, start, end).result()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            if self._published is not None:
+                self._published[1].close()
+                self._published[1].unlink()
+                self._published = None
+
+
+_executor: Optional[PathfindingExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_pathfinding_executor() -> Optional[PathfindingExecutor]:
+    """Process pool if PATHFINDING_PROCESS_WORKERS > 0, created lazily (after any fork)."""
+    global _executor
+    from app.core.config import settings
+    if settings.PATHFINDING_PROCESS_WORKERS <= 0:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = PathfindingExecutor(settings.PATHFINDING_PROCESS_WORKERS)
+    return _executor
+
+
+def shutdown_pathfinding_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,298 @@
+# app/services/room_autocomplete.py
+"""
+In-process autocomplete over room names, keywords and parsed room numbers.
+
+Kiosk search-as-you-type sends a request per keystroke; instead of a DB query
+each time, suggestions come from an index built with one query and kept until
+the next write:
+
+- text is normalized (NFKC, lower case, Uzbek/Russian Cyrillic -> Uzbek Latin,
+  apostrophes dropped), so "Дeканат", "dekanat" and "DEKANAT" are the same token;
+- distinct tokens are kept sorted (prefix lookup = bisect) with trigram
+  postings over tokens for infix matches ("xona" in "oshxona");
+- every query word must match a word of the room; ranking prefers exact
+  matches, then prefixes, then infixes, then rooms whose name starts with the
+  first query word, then shorter names. Postings are kept in that final order,
+  so a one-word query only reads the first K rooms of each matching word.
+
+The index is dropped on every GraphCache.clear() (all room/map writes in this
+process). Other workers pick up changes after ROOM_AUTOCOMPLETE_TTL_SECONDS.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.services.pathfinding import GraphCache
+from app.utils.lru import BoundedLRU
+
+_CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya", "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+}
+# o' / g' are written with several apostrophe look-alikes (or none at all)
+_APOSTROPHES = "'`ʻʼ’‘"
+_TRANSLATE = str.maketrans({**_CYRILLIC_TO_LATIN, **{ch: "" for ch in _APOSTROPHES}})
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+# Match quality per query word (lower is better)
+_EXACT, _PREFIX, _INFIX, _NO_MATCH = 0, 1, 2, 3
+# Words this short get a precomputed prefix level
+_SHORT_PREFIX = 2
+MAX_SUGGESTIONS = 50
+# Multi-word queries: below this many candidates, scan their tokens directly
+_SCAN_CANDIDATES = 256
+
+
+def normalize(text: str) -> str:
+    """Case/script-insensitive form: "Oʻquv zali", "Ўқув зали" -> "oquv zali"."""
+    text = unicodedata.normalize("NFKC", text or "").lower().translate(_TRANSLATE)
+    return " ".join(_SEPARATORS.split(text)).strip()
+
+
+def _token_kind(term: str, token: str) -> int:
+    if token == term:
+        return _EXACT
+    if token.startswith(term):
+        return _PREFIX
+    if len(term) >= 3 and term in token:
+        return _INFIX
+    return _NO_MATCH
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+@dataclass(frozen=True)
+class RoomSuggestion:
+    id: int
+    name: str
+    floor_id: Optional[int]
+    waypoint_id: Optional[str]
+
+
+class _Index:
+    def __init__(self, rows):
+        self.rooms: Dict[int, RoomSuggestion] = {}
+        names: Dict[int, str] = {}
+        postings: Dict[str, Set[int]] = {}
+        for room_id, name, keywords, floor_id, waypoint_id, floor_number, room_number, building in rows:
+            self.rooms[room_id] = RoomSuggestion(room_id, name, floor_id, waypoint_id)
+            names[room_id] = normalize(name)
+            tokens = set(names[room_id].split()) | set(normalize(keywords).split())
+            if floor_number is not None and room_number and building:
+                # "106-B blok" can be typed as "106b"
+                tokens.add(f"{floor_number}{room_number}{building.lower()}")
+            for token in tokens:
+                postings.setdefault(token, set()).add(room_id)
+
+        # Tie-break order: shorter name, then name, then id
+        self.by_order: List[int] = sorted(names, key=lambda rid: (len(names[rid]), names[rid], rid))
+        self.order: Dict[int, int] = {rid: position for position, rid in enumerate(self.by_order)}
+        # First word of the name: "Dekanat" beats "Katta dekanat" for "dek"
+        self.lead: Dict[int, str] = {rid: name.split(" ", 1)[0] for rid, name in names.items()}
+
+        # Postings sorted by `order`: top-K of a token is its first K rooms
+        self.tokens: List[str] = sorted(postings)
+        self.token_rooms: List[Tuple[int, ...]] = []
+        self.lead_rooms: List[Tuple[int, ...]] = []
+        for token in self.tokens:
+            ranked = sorted(postings[token], key=self.order.__getitem__)
+            self.token_rooms.append(tuple(ranked))
+            self.lead_rooms.append(tuple(rid for rid in ranked if self.lead[rid] == token))
+        self.room_tokens: Dict[int, Tuple[str, ...]] = {rid: () for rid in names}
+        for token, rooms in postings.items():
+            for rid in rooms:
+                self.room_tokens[rid] += (token,)
+        self.trigram_tokens: Dict[str, List[int]] = {}
+        for position, token in enumerate(self.tokens):
+            for gram in _trigrams(token):
+                self.trigram_tokens.setdefault(gram, []).append(position)
+
+        # "1", "10": thousands of room numbers share the prefix, so the prefix
+        # level of 1-2 letter words is merged once here (lead rooms, all rooms)
+        buckets: Dict[str, List[int]] = {}
+        for position, token in enumerate(self.tokens):
+            for length in range(1, min(len(token), _SHORT_PREFIX + 1)):
+                buckets.setdefault(token[:length], []).append(position)
+        self.short_prefix: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {
+            prefix: tuple(
+                tuple(self._take([postings[p] for p in positions], MAX_SUGGESTIONS, set()))
+                for postings in (self.lead_rooms, self.token_rooms)
+            )
+            for prefix, positions in buckets.items()
+        }
+        # Keystroke prefixes ("d", "de", "dek") repeat across kiosks
+        self.results = BoundedLRU(max_entries=1024)
+
+    def _take(self, streams: List[Tuple[int, ...]], limit: int, seen: Set[int]) -> List[int]:
+        """Up to `limit` unseen rooms from order-sorted streams, best first."""
+        picked: List[int] = []
+        if limit <= 0:
+            return picked
+        # A stream repeats at most len(seen) already picked rooms
+        depth = limit + len(seen)
+        for rid in heapq.merge(*(stream[:depth] for stream in streams), key=self.order.__getitem__):
+            if rid not in seen:
+                seen.add(rid)
+                picked.append(rid)
+                if len(picked) == limit:
+                    break
+        return picked
+
+    def _tokens_by_kind(self, term: str) -> Tuple[List[int], List[int], List[int]]:
+        """Token positions matching `term` exactly, as a prefix, and as an infix."""
+        tokens = self.tokens
+        exact, prefix, infix = [], [], []
+        position = bisect.bisect_left(tokens, term)
+        while position < len(tokens) and tokens[position].startswith(term):
+            (exact if tokens[position] == term else prefix).append(position)
+            position += 1
+
+        if len(term) >= 3:
+            grams = sorted(_trigrams(term), key=lambda g: len(self.trigram_tokens.get(g, ())))
+            candidates = set(self.trigram_tokens.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(self.trigram_tokens.get(gram, ()))
+            infix = sorted(p for p in candidates if term in tokens[p] and not tokens[p].startswith(term))
+        return exact, prefix, infix
+
+    def _suggest_one(self, term: str, limit: int) -> List[int]:
+        """Single word: walk (kind, lead) levels best first, K rooms per token at most."""
+        if len(term) <= _SHORT_PREFIX:
+            position = bisect.bisect_left(self.tokens, term)
+            exact = [position] if position < len(self.tokens) and self.tokens[position] == term else []
+            lead, everything = self.short_prefix.get(term, ((), ()))
+            levels = [
+                [self.lead_rooms[p] for p in exact], [self.token_rooms[p] for p in exact],
+                [lead], [everything],
+            ]
+        else:
+            levels = []
+            for positions in self._tokens_by_kind(term):
+                levels.append([self.lead_rooms[p] for p in positions])
+                levels.append([self.token_rooms[p] for p in positions])
+
+        picked: List[int] = []
+        seen: Set[int] = set()
+        for streams in levels:
+            picked += self._take(streams, limit - len(picked), seen)
+        return picked
+
+    def _matches(self, term: str) -> Dict[int, int]:
+        """room_id -> best kind of `term` over the room's tokens (index lookup)."""
+        matched: Dict[int, int] = {}
+        # Worst kind first: better kinds overwrite it
+        for kind, positions in zip((_INFIX, _PREFIX, _EXACT), reversed(self._tokens_by_kind(term))):
+            for position in positions:
+                matched.update(dict.fromkeys(self.token_rooms[position], kind))
+        return matched
+
+    def _suggest_many(self, terms: List[str], limit: int) -> List[int]:
+        """Several words: every word must match; rank by summed kind, lead, order."""
+        # Longest (usually most selective) word first; once few rooms are left
+        # their own tokens are checked instead of the index
+        terms_by_length = sorted(set(terms), key=len, reverse=True)
+        scores = self._matches(terms_by_length[0])
+        for term in terms_by_length[1:]:
+            if len(scores) > _SCAN_CANDIDATES:
+                matched = self._matches(term)
+                scores = {rid: score + matched[rid] for rid, score in scores.items() if rid in matched}
+                continue
+            narrowed: Dict[int, int] = {}
+            for rid, score in scores.items():
+                kind = min((_token_kind(term, token) for token in self.room_tokens[rid]), default=_NO_MATCH)
+                if kind != _NO_MATCH:
+                    narrowed[rid] = score + kind
+            scores = narrowed
+        first = terms[0]
+        return heapq.nsmallest(
+            limit, scores,
+            key=lambda rid: (scores[rid], not self.lead[rid].startswith(first), self.order[rid]),
+        )
+
+    def suggest(self, query: str, limit: int) -> List[RoomSuggestion]:
+        terms = normalize(query).split()
+        key = (" ".join(terms), limit)
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached
+        if not terms:
+            picked = []
+        elif len(terms) == 1:
+            picked = self._suggest_one(terms[0], limit)
+        else:
+            picked = self._suggest_many(terms, limit)
+        result = [self.rooms[rid] for rid in picked]
+        self.results.set(key, result)
+        return result
+
+
+class RoomAutocomplete:
+    """Process-wide holder: builds the index lazily, drops it on invalidate()."""
+
+    def __init__(self):
+        self._index: Optional[_Index] = None
+        self._built_at = 0.0
+        # Bumped by every invalidate(): a build that started before a write
+        # must not install its (pre-write) index afterwards
+        self._generation = 0
+        # _lock guards the three fields above; _build_lock lets one thread
+        # query at a time without making invalidate() wait for the query
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def invalidate(self, _reason: str = "") -> None:
+        with self._lock:
+            self._generation += 1
+            self._index = None
+
+    def _fresh(self) -> Optional[_Index]:
+        from app.core.config import settings
+        index = self._index
+        if index is not None and time.monotonic() - self._built_at < settings.ROOM_AUTOCOMPLETE_TTL_SECONDS:
+            return index
+        return None
+
+    def _current(self, db: Session) -> _Index:
+        index = self._fresh()
+        if index is not None:
+            return index
+        with self._build_lock:
+            with self._lock:
+                index = self._fresh()
+                if index is not None:
+                    return index
+                generation = self._generation
+            started = time.monotonic()
+            rows = db.query(
+                Room.id, Room.name, Room.keywords, Room.floor_id, Room.waypoint_id,
+                Room.floor_number, Room.room_number, Room.building,
+            ).all()
+            index = _Index(rows)
+            with self._lock:
+                # A write landed during the build: answer this request, build again next time
+                if self._generation == generation:
+                    self._index = index
+                    self._built_at = started
+            return index
+
+    def suggest(self, db: Session, query: str, limit: int = 10) -> List[RoomSuggestion]:
+        return self._current(db).suggest(query, limit)
+
+
+room_autocomplete = RoomAutocomplete()
+GraphCache.get_instance().add_clear_listener(room_autocomplete.invalidate)
@@ -0,0 +1,317 @@
+# app/services/room_import.py
+"""
+Bulk room import (POST /api/rooms/import, scripts/import_rooms.py).
+
+The upload is read as a stream (CSV, NDJSON, or XLSX through openpyxl,
+imported on first use) and handled in chunks of CHUNK_SIZE rows:
+
+- every row is validated against sets loaded once up front (floor ids, first
+  floor per floor_number, waypoint -> floor, existing (name, floor_id) pairs),
+  so no per-row queries are made;
+- the floor is resolved like create_room does: explicit floor_id, else the
+  waypoint's floor, else floor_number (column or parsed from the name);
+- integers must fit the INTEGER columns, otherwise the row is reported
+  instead of failing the whole load;
+- valid chunks are loaded with COPY on PostgreSQL, executemany elsewhere.
+
+Import-only rule (create_room doesn't check this): re-importing a registry is
+idempotent. Rows whose (name, resolved floor) already exist in the DB are
+skipped and counted in `skipped_existing`; a repeat of the same pair within
+one file is a row error.
+
+Everything runs in the caller's single transaction. By default any invalid
+row rolls the whole import back (the report lists what to fix);
+`skip_invalid=True` loads the valid rows and reports the rest.
+"""
+import csv
+import io
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.floor import Floor
+from app.models.room import Room
+from app.models.waypoint import Waypoint
+from app.utils.pg_copy import copy_rows
+from app.utils.room_parser import parse_room_name, room_name_columns
+
+CHUNK_SIZE = 1000
+# Error entries kept in the report (the count is always exact)
+MAX_REPORTED_ERRORS = 500
+FORMATS = ("csv", "ndjson", "xlsx")
+_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".xlsx": "xlsx"}
+_COLUMNS = ("name", "floor_id", "waypoint_id", "keywords", "floor_number", "room_number", "building")
+# rooms.name is String(100)
+_NAME_MAX = 100
+# floor ids and floor numbers are INTEGER columns
+_INT_MIN, _INT_MAX = -2**31, 2**31 - 1
+
+# (line number, row dict or None, read error or None)
+_Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class RoomImportError(Exception):
+    """The file as a whole can't be imported (format, header, missing package)."""
+
+
+@dataclass
+class ImportReport:
+    format: str
+    dry_run: bool
+    skip_invalid: bool
+    rows_total: int = 0
+    valid_rows: int = 0
+    invalid_rows: int = 0
+    skipped_existing: int = 0
+    imported: int = 0
+    committed: bool = False
+    seconds: float = 0.0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    def add_error(self, line: int, name: Optional[str], messages: List[str]) -> None:
+        self.invalid_rows += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "name": name, "errors": messages})
+        else:
+            self.errors_truncated = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    if explicit:
+        if explicit not in FORMATS:
+            raise RoomImportError(f"Unsupported format '{explicit}' (expected one of {', '.join(FORMATS)})")
+        return explicit
+    for extension, fmt in _EXTENSIONS.items():
+        if (filename or "").lower().endswith(extension):
+            return fmt
+    raise RoomImportError("Cannot detect file format; pass format=csv|ndjson|xlsx")
+
+
+def _header(names) -> List[str]:
+    header = [str(name or "").strip().lower() for name in names]
+    if "name" not in header:
+        raise RoomImportError("Missing required column 'name'")
+    return header
+
+
+def _read_csv(stream: BinaryIO) -> Iterator[_Record]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = _header(next(reader, []))
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, dict(zip(header, row)), None
+    except UnicodeDecodeError:
+        raise RoomImportError("CSV file must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+
+def _read_ndjson(stream: BinaryIO) -> Iterator[_Record]:
+    for line, raw in enumerate(stream, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            yield line, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line, None, "Each line must be a JSON object"
+            continue
+        yield line, {str(k).strip().lower(): v for k, v in record.items()}, None
+
+
+def _read_xlsx(stream: BinaryIO) -> Iterator[_Record]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RoomImportError("XLSX import needs the openpyxl package (pip install openpyxl)")
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise RoomImportError(f"Invalid XLSX file: {e}")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        for line, row in enumerate(rows, start=2):
+            if all(cell is None or str(cell).strip() == "" for cell in row):
+                continue
+            yield line, dict(zip(header, row)), None
+    finally:
+        workbook.close()
+
+
+_READERS = {"csv": _read_csv, "ndjson": _read_ndjson, "xlsx": _read_xlsx}
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _integer(value) -> Optional[int]:
+    """CSV gives "3", XLSX 3.0, NDJSON 3; ValueError for anything else."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(value)
+        return int(value)
+    number = int(str(value).strip())
+    if not _INT_MIN <= number <= _INT_MAX:
+        raise ValueError(value)
+    return number
+
+
+class _Lookups:
+    """Everything row validation needs, loaded with one query per table."""
+
+    def __init__(self, db: Session):
+        self.floor_ids: Set[int] = set()
+        self.floor_by_number: Dict[int, int] = {}
+        for floor_id, floor_number in db.execute(
+            select(Floor.id, Floor.floor_number).order_by(Floor.id)
+        ):
+            self.floor_ids.add(floor_id)
+            # Lowest id wins, as in auto_assign_floors
+            self.floor_by_number.setdefault(floor_number, floor_id)
+        self.waypoint_floor: Dict[str, int] = dict(db.execute(select(Waypoint.id, Waypoint.floor_id)).all())
+        # (name, floor_id) already in the DB -> skipped; in this file -> first line
+        self.existing: Set[Tuple[str, Optional[int]]] = set(db.execute(select(Room.name, Room.floor_id)).all())
+        self.seen: Dict[Tuple[str, Optional[int]], int] = {}
+
+
+def _validate(record: Dict[str, Any], lookups: _Lookups) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    errors: List[str] = []
+    name = _text(record.get("name"))
+    if name is None:
+        errors.append("name is required")
+    elif len(name) > _NAME_MAX:
+        errors.append(f"name is longer than {_NAME_MAX} characters")
+
+    try:
+        floor_id = _integer(record.get("floor_id"))
+    except ValueError:
+        errors.append("floor_id must be an integer in the INTEGER range")
+        floor_id = None
+    try:
+        floor_number = _integer(record.get("floor_number"))
+    except ValueError:
+        errors.append("floor_number must be an integer in the INTEGER range")
+        floor_number = None
+    waypoint_id = _text(record.get("waypoint_id"))
+    keywords = _text(record.get("keywords"))
+
+    if floor_id is not None and floor_id not in lookups.floor_ids:
+        errors.append(f"floor {floor_id} not found")
+    if waypoint_id is not None:
+        waypoint_floor = lookups.waypoint_floor.get(waypoint_id)
+        if waypoint_floor is None:
+            errors.append(f"waypoint '{waypoint_id}' not found")
+        elif floor_id is not None and waypoint_floor != floor_id:
+            errors.append("waypoint does not belong to the room floor")
+        elif floor_id is None:
+            floor_id = waypoint_floor
+    if errors:
+        return None, errors
+
+    parsed = room_name_columns(name)
+    # The name has the "106-B blok" shape, but its floor number doesn't fit the column
+    if parsed["floor_number"] is None and parse_room_name(name)["floor_number"] is not None:
+        return None, ["floor number in the name is out of range"]
+    if floor_id is None:
+        number = floor_number if floor_number is not None else parsed["floor_number"]
+        if number is not None:
+            floor_id = lookups.floor_by_number.get(number)
+    return {
+        "name": name,
+        "floor_id": floor_id,
+        "waypoint_id": waypoint_id,
+        "keywords": keywords,
+        **parsed,
+    }, []
+
+
+def _load(db: Session, rows: List[Dict[str, Any]], postgres: bool) -> None:
+    if postgres:
+        copy_rows(db.connection(), Room.__tablename__, _COLUMNS, rows)
+    else:
+        db.execute(insert(Room), rows)
+
+
+def import_rooms(
+    db: Session,
+    stream: BinaryIO,
+    fmt: str,
+    dry_run: bool = False,
+    skip_invalid: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> ImportReport:
+    """
+    Validate and load rooms from `stream`; commits only when something was
+    loaded and the import wasn't aborted. Raises RoomImportError for
+    file-level problems (nothing is written then).
+    """
+    started = time.perf_counter()
+    report = ImportReport(format=fmt, dry_run=dry_run, skip_invalid=skip_invalid)
+    postgres = db.get_bind().dialect.name == "postgresql"
+    lookups = _Lookups(db)
+
+    chunk: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        # After the first error a strict import only keeps validating
+        if chunk and not dry_run and (skip_invalid or not report.invalid_rows):
+            _load(db, chunk, postgres)
+        chunk.clear()
+
+    try:
+        for line, record, read_error in _READERS[fmt](stream):
+            report.rows_total += 1
+            if read_error is not None:
+                report.add_error(line, None, [read_error])
+                continue
+            row, errors = _validate(record, lookups)
+            if errors:
+                report.add_error(line, _text(record.get("name")), errors)
+                continue
+            key = (row["name"], row["floor_id"])
+            if key in lookups.existing:
+                report.skipped_existing += 1
+                continue
+            if key in lookups.seen:
+                report.add_error(line, row["name"], [f"duplicate of line {lookups.seen[key]}"])
+                continue
+            lookups.seen[key] = line
+            report.valid_rows += 1
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    except Exception:
+        db.rollback()
+        raise
+
+    if dry_run or (report.invalid_rows and not skip_invalid) or not report.valid_rows:
+        db.rollback()
+    else:
+        db.commit()
+        report.committed = True
+        report.imported = report.valid_rows
+    report.seconds = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,146 @@
+# app/services/room_search.py
+"""
+Ranked room search (GET /api/rooms/search).
+
+PostgreSQL: pg_trgm (GIN trigram indexes from migration d4e6f8a0b2c4). A room
+matches on substring (ILIKE, index-backed) or trigram similarity (typos:
+"kutubxna" -> "kutubxona") of its name or keywords, and results are ordered by
+exact id, name prefix, then similarity.
+
+Other databases (SQLite tests, local dev): substring match only, ranked the
+same way in Python with a substring-position score instead of similarity.
+
+With an origin (kiosk or waypoint) matches are ranked by walking distance
+instead, read from the origin's cached shortest-path tree (one Dijkstra per
+origin and map version, not one route per result).
+"""
+import heapq
+import math
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.services.pathfinding import PathFinder
+
+# Same walking speed as the route response (units per minute)
+WALKING_SPEED = 50.0
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _match_filter(normalized: str, room_id: Optional[int]):
+    pattern = f"%{_like_escape(normalized)}%"
+    clauses = [
+        Room.name.ilike(pattern, escape="\\"),
+        Room.keywords.ilike(pattern, escape="\\"),
+    ]
+    if room_id is not None:
+        clauses.append(Room.id == room_id)
+    return clauses
+
+
+def _trigram_filter(normalized: str, room_id: Optional[int]):
+    # `%`: trigram similarity above pg_trgm.similarity_threshold (default 0.3)
+    return _match_filter(normalized, room_id) + [
+        Room.name.op("%")(normalized),
+        Room.keywords.op("%")(normalized),
+    ]
+
+
+def _search_postgres(db: Session, normalized: str, room_id: Optional[int], limit: int) -> List[Room]:
+    name_similarity = func.similarity(Room.name, normalized)
+    keywords_similarity = func.coalesce(func.similarity(Room.keywords, normalized), 0.0)
+    score = func.greatest(name_similarity, keywords_similarity)
+    clauses = _trigram_filter(normalized, room_id)
+    prefix = Room.name.ilike(f"{_like_escape(normalized)}%", escape="\\")
+    order = [case((prefix, 0), else_=1), score.desc(), Room.name]
+    if room_id is not None:
+        order.insert(0, case((Room.id == room_id, 0), else_=1))
+    return db.query(Room).filter(or_(*clauses)).order_by(*order).limit(limit).all()
+
+
+def _rank_key(room: Room, needle: str, room_id: Optional[int]):
+    name = (room.name or "").lower()
+    position = name.find(needle)
+    keywords = (room.keywords or "").lower()
+    return (
+        0 if room.id == room_id else 1,
+        0 if position == 0 else 1,
+        position if position >= 0 else len(name) + keywords.find(needle),
+        len(name),
+        name,
+    )
+
+
+def search_rooms(db: Session, query: str, limit: int = 50) -> List[Room]:
+    """Rooms matching `query` (name, keywords, or numeric id), best first."""
+    normalized = query.strip()
+    if not normalized:
+        return []
+    room_id = int(normalized) if normalized.isdigit() else None
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_postgres(db, normalized, room_id, limit)
+
+    rooms = db.query(Room).filter(or_(*_match_filter(normalized, room_id))).all()
+    needle = normalized.lower()
+    rooms.sort(key=lambda room: _rank_key(room, needle, room_id))
+    return rooms[:limit]
+
+
+def search_rooms_near(
+    db: Session, pathfinder: PathFinder, query: str, origin_waypoint_id: str, limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Rooms matching `query`, nearest (walking distance from the origin
+    waypoint) first; unreachable rooms and rooms without a waypoint come last
+    with distance None.
+    """
+    normalized = query.strip()
+    if not normalized:
+        return []
+    room_id = int(normalized) if normalized.isdigit() else None
+    if db.get_bind().dialect.name == "postgresql":
+        clauses = _trigram_filter(normalized, room_id)
+    else:
+        clauses = _match_filter(normalized, room_id)
+    matches = db.query(Room.id, Room.name).filter(or_(*clauses)).all()
+
+    tree = pathfinder.distance_tree(origin_waypoint_id)
+    index_of = pathfinder.compiled.index_of if pathfinder.compiled is not None else {}
+    anchors = pathfinder.room_anchor_by_id
+
+    def distance(rid: int) -> float:
+        index = index_of.get(anchors.get(rid))
+        return tree[index] if tree is not None and index is not None else math.inf
+
+    distances = {rid: distance(rid) for rid, _name in matches}
+    nearest = heapq.nsmallest(limit, matches, key=lambda row: (distances[row[0]], row[1], row[0]))
+    rooms = {room.id: room for room in db.query(Room).filter(Room.id.in_([rid for rid, _ in nearest]))}
+
+    floor_names = pathfinder.floor_name_by_id
+    results = []
+    for rid, _name in nearest:
+        room = rooms.get(rid)
+        if room is None:
+            continue
+        walked = distances[rid]
+        floor_id = room.floor_id
+        if floor_id is None and anchors.get(rid) in pathfinder.waypoints_dict:
+            floor_id = pathfinder.waypoints_dict[anchors[rid]].floor_id
+        results.append({
+            "id": room.id,
+            "name": room.name,
+            "waypoint_id": room.waypoint_id,
+            "floor_id": room.floor_id,
+            "keywords": room.keywords,
+            "distance": None if math.isinf(walked) else round(walked, 2),
+            "estimated_time_minutes": None if math.isinf(walked) else round(walked / WALKING_SPEED, 1),
+            "floor_number": pathfinder.floor_number_by_id.get(floor_id) if floor_id else None,
+            "floor_name": floor_names.get(floor_id) if floor_id else None,
+        })
+    return results
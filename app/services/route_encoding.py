@@ -0,0 +1,127 @@
+# app/services/route_encoding.py
+"""
+Compact route encoding for bandwidth-constrained clients (kiosk Wi-Fi, mobile).
+
+A route is split into per-floor legs; each leg's pixel coordinates are
+delta-encoded with the polyline algorithm (precision 1 — coordinates are
+already integers). Straight hallway points that carry no instruction are
+dropped, and instructions are sent as a sparse [index, text] list, where index
+counts points across all legs in order.
+"""
+from typing import Dict, List, Tuple
+
+# A hallway point is dropped if it lies within this many pixels of the line
+# through its neighbours.
+COLLINEAR_TOLERANCE_PX = 1.0
+
+
+def _encode_value(value: int, out: List[str]) -> None:
+    value = ~(value << 1) if value < 0 else (value << 1)
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def encode_polyline(points: List[Tuple[int, int]]) -> str:
+    """Delta + varint (polyline algorithm) encoding of integer (x, y) points."""
+    out: List[str] = []
+    prev_x = prev_y = 0
+    for x, y in points:
+        _encode_value(x - prev_x, out)
+        _encode_value(y - prev_y, out)
+        prev_x, prev_y = x, y
+    return "".join(out)
+
+
+def decode_polyline(encoded: str) -> List[Tuple[int, int]]:
+    """Inverse of encode_polyline."""
+    values: List[int] = []
+    shift = result = 0
+    for ch in encoded:
+        chunk = ord(ch) - 63
+        result |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(result >> 1) if result & 1 else result >> 1)
+            shift = result = 0
+    points: List[Tuple[int, int]] = []
+    x = y = 0
+    for i in range(0, len(values) - 1, 2):
+        x += values[i]
+        y += values[i + 1]
+        points.append((x, y))
+    return points
+
+
+def _is_redundant(prev: Dict, step: Dict, nxt: Dict) -> bool:
+    """Plain hallway point in the middle of a straight, same-floor run."""
+    if step['type'] != 'hallway' or step.get('instruction'):
+        return False
+    if not (prev['floor_id'] == step['floor_id'] == nxt['floor_id']):
+        return False
+    ax, ay = step['x'] - prev['x'], step['y'] - prev['y']
+    bx, by = nxt['x'] - step['x'], nxt['y'] - step['y']
+    if ax * bx + ay * by <= 0:  # turning back
+        return False
+    length = ((nxt['x'] - prev['x']) ** 2 + (nxt['y'] - prev['y']) ** 2) ** 0.5
+    if length == 0:
+        return False
+    # Distance of `step` from the prev -> next line
+    return abs(ax * (nxt['y'] - prev['y']) - ay * (nxt['x'] - prev['x'])) / length <= COLLINEAR_TOLERANCE_PX
+
+
+def simplify_path(path: List[Dict]) -> List[Dict]:
+    """
+    Drop collinear hallway points that carry no instruction.
+
+    A point is dropped only if it, and every point already dropped since the
+    last kept one, lies within COLLINEAR_TOLERANCE_PX of the line from the last
+    kept point to the next one - so a slow arc can't drift away point by point.
+    """
+    if len(path) <= 2:
+        return list(path)
+    kept = [path[0]]
+    anchor = 0
+    for i in range(1, len(path) - 1):
+        nxt = path[i + 1]
+        if all(_is_redundant(path[anchor], path[j], nxt) for j in range(anchor + 1, i + 1)):
+            continue
+        kept.append(path[i])
+        anchor = i
+    kept.append(path[-1])
+    return kept
+
+
+def compact_route(
+    path: List[Dict],
+    total_distance: float,
+    floor_changes: int,
+    estimated_time_minutes: float,
+) -> Dict:
+    """Build the compact response body from an instructed path."""
+    points = simplify_path(path)
+    legs: List[Dict] = []
+    instructions: List[List] = []
+    leg_points: List[Tuple[int, int]] = []
+    for index, step in enumerate(points):
+        if not legs or step['floor_id'] != legs[-1]['floor_id']:
+            if legs:
+                legs[-1]['polyline'] = encode_polyline(leg_points)
+            legs.append({'floor_id': step['floor_id'], 'start': index, 'polyline': ''})
+            leg_points = []
+        leg_points.append((step['x'], step['y']))
+        if step.get('instruction'):
+            instructions.append([index, step['instruction']])
+    if legs:
+        legs[-1]['polyline'] = encode_polyline(leg_points)
+
+    return {
+        'start_waypoint_id': path[0]['waypoint_id'] if path else None,
+        'end_waypoint_id': path[-1]['waypoint_id'] if path else None,
+        'legs': legs,
+        'instructions': instructions,
+        'total_distance': total_distance,
+        'floor_changes': floor_changes,
+        'estimated_time_minutes': estimated_time_minutes,
+    }
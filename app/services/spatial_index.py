@@ -0,0 +1,220 @@
+# app/services/spatial_index.py
+"""
+Per-floor spatial indexes over waypoint coordinates and corridor segments.
+
+A uniform grid: points are bucketed into square cells sized so that an average
+cell holds a couple of points. k-nearest queries walk rings of cells outward
+from the query cell and stop as soon as no unvisited ring can beat the k-th
+best distance; radius queries only visit cells overlapping the query circle.
+Rings are clipped to the grid and the walk starts at the first ring that
+reaches it, so a query far outside the floor costs about as much as one at
+its edge.
+"""
+import heapq
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Target number of points per occupied cell
+_POINTS_PER_CELL = 2.0
+
+
+class _UniformGrid:
+    """Cell arithmetic shared by the point and segment grids."""
+
+    min_x: float
+    min_y: float
+    cell_size: float
+    max_cx: int
+    max_cy: int
+    cells: Dict[Tuple[int, int], List[int]]
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (
+            int(math.floor((x - self.min_x) / self.cell_size)),
+            int(math.floor((y - self.min_y) / self.cell_size)),
+        )
+
+    def _first_ring(self, cx: int, cy: int) -> int:
+        """Chebyshev distance from (cx, cy) to the grid; inner rings are empty."""
+        return max(0, -cx, cx - self.max_cx, -cy, cy - self.max_cy)
+
+    def _last_ring(self, cx: int, cy: int) -> int:
+        """Beyond this ring every cell is empty."""
+        return max(abs(cx), abs(cx - self.max_cx), abs(cy), abs(cy - self.max_cy))
+
+    def _ring(self, cx: int, cy: int, r: int):
+        """Occupied cells at Chebyshev distance exactly r from (cx, cy)."""
+        if r == 0:
+            cell = self.cells.get((cx, cy))
+            if cell:
+                yield cell
+            return
+        # Only the part of the ring inside the grid
+        lo_x, hi_x = max(cx - r, 0), min(cx + r, self.max_cx)
+        for gy in (cy - r, cy + r):
+            if 0 <= gy <= self.max_cy:
+                for gx in range(lo_x, hi_x + 1):
+                    cell = self.cells.get((gx, gy))
+                    if cell:
+                        yield cell
+        lo_y, hi_y = max(cy - r + 1, 0), min(cy + r - 1, self.max_cy)
+        for gx in (cx - r, cx + r):
+            if 0 <= gx <= self.max_cx:
+                for gy in range(lo_y, hi_y + 1):
+                    cell = self.cells.get((gx, gy))
+                    if cell:
+                        yield cell
+
+
+class FloorSpatialIndex(_UniformGrid):
+    """Uniform grid over one floor's points. Results are (distance, point_id)."""
+
+    def __init__(self, points: Sequence[Tuple[str, float, float]]):
+        # Insertion order doubles as the tie-breaker, so equal distances resolve
+        # the same way a linear `min()` over the input list would.
+        self.ids: List[str] = [p[0] for p in points]
+        self.xs: List[float] = [float(p[1]) for p in points]
+        self.ys: List[float] = [float(p[2]) for p in points]
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+        if not points:
+            self.min_x = self.min_y = 0.0
+            self.cell_size = 1.0
+            self.max_cx = self.max_cy = 0
+            return
+
+        self.min_x = min(self.xs)
+        self.min_y = min(self.ys)
+        width = max(self.xs) - self.min_x
+        height = max(self.ys) - self.min_y
+        area = max(width, 1.0) * max(height, 1.0)
+        self.cell_size = max(1.0, math.sqrt(area * _POINTS_PER_CELL / len(points)))
+
+        for seq in range(len(self.ids)):
+            self.cells.setdefault(self._cell(self.xs[seq], self.ys[seq]), []).append(seq)
+        self.max_cx = max(cx for cx, _ in self.cells)
+        self.max_cy = max(cy for _, cy in self.cells)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        k: int = 1,
+        predicate: Optional[Callable[[str], bool]] = None,
+    ) -> List[Tuple[float, str]]:
+        """k nearest points to (x, y), optionally only those passing `predicate`."""
+        if k <= 0 or not self.ids:
+            return []
+        cx, cy = self._cell(x, y)
+        best: List[Tuple[float, int, int]] = []  # max-heap via negation: (-dist, -seq, seq)
+        for r in range(self._first_ring(cx, cy), self._last_ring(cx, cy) + 1):
+            for cell in self._ring(cx, cy, r):
+                for seq in cell:
+                    if predicate is not None and not predicate(self.ids[seq]):
+                        continue
+                    d = math.hypot(self.xs[seq] - x, self.ys[seq] - y)
+                    item = (-d, -seq, seq)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            # Anything in ring r+1 or further is at least r cells away
+            if len(best) == k and -best[0][0] <= r * self.cell_size:
+                break
+        return [(-d, self.ids[seq]) for d, _neg, seq in sorted(best, reverse=True)]
+
+    def within_radius(self, x: float, y: float, radius: float) -> List[Tuple[float, str]]:
+        """All points within `radius` of (x, y), nearest first."""
+        if radius < 0 or not self.ids:
+            return []
+        lo_x, lo_y = self._cell(x - radius, y - radius)
+        hi_x, hi_y = self._cell(x + radius, y + radius)
+        lo_x, lo_y = max(lo_x, 0), max(lo_y, 0)
+        hi_x, hi_y = min(hi_x, self.max_cx), min(hi_y, self.max_cy)
+        found: List[Tuple[float, int]] = []
+        for gx in range(lo_x, hi_x + 1):
+            for gy in range(lo_y, hi_y + 1):
+                for seq in self.cells.get((gx, gy), ()):
+                    d = math.hypot(self.xs[seq] - x, self.ys[seq] - y)
+                    if d <= radius:
+                        found.append((d, seq))
+        found.sort()
+        return [(d, self.ids[seq]) for d, seq in found]
+
+
+class FloorSegmentIndex(_UniformGrid):
+    """
+    Uniform grid over one floor's corridor segments (graph edges).
+
+    Each segment is registered in every cell its bounding box overlaps.
+    `nearest` returns the closest segment together with the projection of the
+    query point onto it.
+    """
+
+    def __init__(self, segments: Sequence[Tuple[str, str, float, float, float, float, float]]):
+        # (from_id, to_id, ax, ay, bx, by, weight)
+        self.segments = [
+            (a, b, float(ax), float(ay), float(bx), float(by), float(w))
+            for a, b, ax, ay, bx, by, w in segments
+        ]
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+        if not self.segments:
+            self.min_x = self.min_y = 0.0
+            self.cell_size = 1.0
+            self.max_cx = self.max_cy = 0
+            return
+
+        xs = [v for s in self.segments for v in (s[2], s[4])]
+        ys = [v for s in self.segments for v in (s[3], s[5])]
+        self.min_x, self.min_y = min(xs), min(ys)
+        area = max(max(xs) - self.min_x, 1.0) * max(max(ys) - self.min_y, 1.0)
+        mean_length = sum(math.hypot(s[4] - s[2], s[5] - s[3]) for s in self.segments) / len(self.segments)
+        # Cells at least as large as a typical segment keep registrations per segment small
+        self.cell_size = max(1.0, mean_length, math.sqrt(area * _POINTS_PER_CELL / len(self.segments)))
+
+        for seq, (_a, _b, ax, ay, bx, by, _w) in enumerate(self.segments):
+            lo_x, lo_y = self._cell(min(ax, bx), min(ay, by))
+            hi_x, hi_y = self._cell(max(ax, bx), max(ay, by))
+            for gx in range(lo_x, hi_x + 1):
+                for gy in range(lo_y, hi_y + 1):
+                    self.cells.setdefault((gx, gy), []).append(seq)
+        self.max_cx = max(cx for cx, _ in self.cells)
+        self.max_cy = max(cy for _, cy in self.cells)
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @staticmethod
+    def project(x: float, y: float, ax: float, ay: float, bx: float, by: float) -> Tuple[float, float, float, float]:
+        """Project (x, y) onto segment a-b: (distance, t, px, py) with t in [0, 1]."""
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((x - ax) * dx + (y - ay) * dy) / length_sq))
+        px, py = ax + t * dx, ay + t * dy
+        return math.hypot(x - px, y - py), t, px, py
+
+    def nearest(self, x: float, y: float) -> Optional[Tuple[float, int, float, float, float]]:
+        """Closest segment: (distance, segment_index, t, px, py), or None if empty."""
+        if not self.segments:
+            return None
+        cx, cy = self._cell(x, y)
+        best: Optional[Tuple[float, int, float, float, float]] = None
+        seen = set()
+        for r in range(self._first_ring(cx, cy), self._last_ring(cx, cy) + 1):
+            for cell in self._ring(cx, cy, r):
+                for seq in cell:
+                    if seq in seen:
+                        continue
+                    seen.add(seq)
+                    _a, _b, ax, ay, bx, by, _w = self.segments[seq]
+                    d, t, px, py = self.project(x, y, ax, ay, bx, by)
+                    if best is None or (d, seq) < (best[0], best[1]):
+                        best = (d, seq, t, px, py)
+            # Segments not seen yet lie entirely in rings > r
+            if best is not None and best[0] <= r * self.cell_size:
+                break
+        return best
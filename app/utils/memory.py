@@ -0,0 +1,48 @@
+import itertools
+import sys
+from typing import Any, Set
+
+_ATOMIC = (str, bytes, int, float, bool, type(None))
+
+
+def deep_sizeof(obj: Any, seen: Set[int] = None, sample: int = 0) -> int:
+    """
+    Approximate retained size of `obj` in bytes (containers, plain objects,
+    __slots__). ORM instance state (`_sa_*` attributes) is not followed.
+
+    With `sample` > 0, containers larger than `sample` are estimated from their
+    first `sample` items, so estimating a large cache stays cheap.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, _ATOMIC):
+        return size
+
+    if isinstance(obj, dict):
+        items = obj.items()
+        count = len(obj)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = obj
+        count = len(obj)
+    elif isinstance(obj, memoryview):
+        return size + obj.nbytes
+    elif hasattr(obj, "buffer_info"):  # array.array: getsizeof already counts the buffer
+        return size
+    else:
+        fields = dict(getattr(obj, "__dict__", {}))
+        if hasattr(obj, "__dict__"):
+            size += sys.getsizeof(obj.__dict__)
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                fields[slot] = getattr(obj, slot)
+        fields = {k: v for k, v in fields.items() if not k.startswith("_sa_")}
+        return size + sum(deep_sizeof(v, seen, sample) for v in fields.values())
+
+    if sample and count > sample:
+        measured = sum(deep_sizeof(item, seen, sample) for item in itertools.islice(items, sample))
+        return size + measured * count // sample
+    return size + sum(deep_sizeof(item, seen, sample) for item in items)
@@ -0,0 +1,27 @@
+"""PostgreSQL `COPY ... FROM STDIN` for bulk loads inside the caller's transaction."""
+import csv
+import io
+from enum import Enum
+from typing import Iterable, Mapping, Sequence
+
+from sqlalchemy.engine import Connection
+
+
+def _copy_value(value) -> object:
+    # Enums are stored by member name (see the initial migration's waypointtype)
+    return value.name if isinstance(value, Enum) else value
+
+
+def copy_rows(conn: Connection, table: str, columns: Sequence[str], rows: Iterable[Mapping]) -> None:
+    """Load `rows` (dicts keyed by column) with one COPY; psycopg2 connections only."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        # None -> unquoted empty field, which COPY ... CSV reads as NULL
+        writer.writerow([_copy_value(row[c]) for c in columns])
+    buf.seek(0)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+    finally:
+        cursor.close()
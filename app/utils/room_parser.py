@@ -2,6 +2,9 @@
 import re
 from typing import Optional, Dict
 
+# rooms.floor_number ustuni INTEGER
+INTEGER_MAX = 2**31 - 1
+
 def parse_room_name(room_name: str) -> Dict[str, Optional[str]]:
     """
     Xona nomini parse qilish
@@ -39,6 +42,21 @@ def parse_room_name(room_name: str) -> Dict[str, Optional[str]]:
         'full_room': None,
     }
 
+def room_name_columns(room_name: str) -> Dict[str, Optional[object]]:
+    """
+    rooms jadvalida saqlanadigan qismlar (floor_number, room_number, building).
+    Migration dagi PostgreSQL backfill ham xuddi shu regex bilan ishlaydi.
+    Qavat raqami INTEGER ga sig'masa ("9999999999999-B blok"), hammasi None.
+    """
+    parsed = parse_room_name(room_name or "")
+    if parsed['floor_number'] is not None and parsed['floor_number'] > INTEGER_MAX:
+        return {'floor_number': None, 'room_number': None, 'building': None}
+    return {
+        'floor_number': parsed['floor_number'],
+        'room_number': parsed['room_number'],
+        'building': parsed['building'],
+    }
+
 def format_room_name(floor_number: int, room_number: str, building: str) -> str:
     """
     Xona nomini format qilish
@@ -0,0 +1,247 @@
+"""
+Deterministic synthetic campus for benchmarks and scale testing.
+
+Layout: every building has F floors (one Floor row / map image each). A floor
+is a W x H grid of hallway waypoints; room waypoints hang off hallway nodes;
+each floor has a staircase and an elevator linked to the floor above via
+`connects_to_waypoint` (both directions, like the admin UI writes them).
+Buildings are joined by a ground-floor bridge corridor. The top floor of the
+last building also holds a small closed-off wing that is unreachable from the
+rest of the campus.
+
+All floors share one site coordinate frame (buildings sit side by side, stairs
+are stacked at the same x, y) and every connection is at least as long as its
+pixel distance, as on a real traced map.
+
+The same (spec, seed) always produces identical rows, ids included.
+"""
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.connection import Connection
+from app.models.floor import Floor
+from app.models.kiosk import Kiosk
+from app.models.room import Room
+from app.models.waypoint import Waypoint, WaypointType
+from app.utils.room_parser import room_name_columns
+
+BLOCK_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ROOM_KEYWORDS = (
+    "dekanat", "kutubxona", "laboratoriya", "auditoriya", "kafedra", "buxgalteriya",
+    "oshxona", "sport zal", "kompyuter xonasi", "rektorat", "arxiv", "majlislar zali",
+)
+
+
+@dataclass(frozen=True)
+class CampusSpec:
+    buildings: int = 2
+    floors: int = 3
+    grid_width: int = 6
+    grid_height: int = 4
+    spacing: int = 40
+    # Share of hallway nodes that get a room next to them
+    room_ratio: float = 0.5
+    # Share of grid cells crossed by both diagonals (open halls / atriums)
+    diagonal_ratio: float = 0.0
+    # Size of the unreachable wing (hallway nodes in a row)
+    island_size: int = 3
+
+
+# Scale tiers used by the benchmark suite (waypoints ~= b * f * w * h * (1 + room_ratio))
+TIERS: Dict[str, CampusSpec] = {
+    "tiny": CampusSpec(buildings=2, floors=2, grid_width=4, grid_height=3),
+    "small": CampusSpec(buildings=2, floors=4, grid_width=10, grid_height=6),
+    "medium": CampusSpec(buildings=4, floors=5, grid_width=20, grid_height=10),
+    "large": CampusSpec(buildings=6, floors=8, grid_width=30, grid_height=20),
+    # ~56k waypoints, ~150k connections, ~21k rooms: production-scale profiling
+    # (scripts/seed_synthetic_campus.py)
+    "xlarge": CampusSpec(
+        buildings=10, floors=10, grid_width=25, grid_height=14, room_ratio=0.6, diagonal_ratio=1.0
+    ),
+}
+
+
+@dataclass
+class SyntheticCampus:
+    spec: CampusSpec
+    seed: int
+    floors: List[Dict] = field(default_factory=list)
+    waypoints: List[Dict] = field(default_factory=list)
+    connections: List[Dict] = field(default_factory=list)
+    rooms: List[Dict] = field(default_factory=list)
+    kiosks: List[Dict] = field(default_factory=list)
+    # Handy endpoints for benchmark cases
+    short_pair: Tuple[str, str] = ("", "")
+    cross_floor_pair: Tuple[str, str] = ("", "")
+    unreachable_pair: Tuple[str, str] = ("", "")
+
+    def sizes(self) -> Dict[str, int]:
+        return {
+            "floors": len(self.floors),
+            "waypoints": len(self.waypoints),
+            "connections": len(self.connections),
+            "rooms": len(self.rooms),
+            "kiosks": len(self.kiosks),
+        }
+
+
+def _hall_id(b: int, level: int, i: int, j: int) -> str:
+    return f"b{b}-f{level}-h{i}-{j}"
+
+
+def generate_campus(spec: CampusSpec, seed: int = 0) -> SyntheticCampus:
+    rng = random.Random(seed)
+    campus = SyntheticCampus(spec=spec, seed=seed)
+    positions: Dict[str, Tuple[int, int]] = {}
+
+    def add_waypoint(wp_id: str, floor_id: int, x: int, y: int, wp_type: WaypointType,
+                     label: Optional[str] = None) -> None:
+        positions[wp_id] = (x, y)
+        campus.waypoints.append({
+            "id": wp_id, "floor_id": floor_id, "x": x, "y": y, "type": wp_type,
+            "label": label, "connects_to_floor": None, "connects_to_waypoint": None,
+        })
+
+    def connect(a: str, b: str, distance: Optional[float] = None) -> None:
+        if distance is None:
+            (ax, ay), (bx, by) = positions[a], positions[b]
+            # Rounded up: never shorter than the straight line
+            distance = math.ceil(math.hypot(bx - ax, by - ay) * 100) / 100
+        campus.connections.append({
+            "id": f"c{len(campus.connections) + 1}",
+            "from_waypoint_id": a, "to_waypoint_id": b, "distance": distance,
+        })
+
+    s = spec.spacing
+    margin = s
+    width = 2 * margin + (spec.grid_width - 1) * s
+    height = 2 * margin + (spec.grid_height + 1) * s
+    site_width = spec.buildings * (width + s) - s
+    floor_id_of: Dict[Tuple[int, int], int] = {}
+    vertical: Dict[Tuple[int, int], Dict[str, Dict]] = {}
+
+    for b in range(spec.buildings):
+        letter = BLOCK_LETTERS[b % len(BLOCK_LETTERS)]
+        ox = b * (width + s)  # building's x offset in the site frame
+        for level in range(1, spec.floors + 1):
+            floor_id = len(campus.floors) + 1
+            floor_id_of[(b, level)] = floor_id
+            campus.floors.append({
+                "id": floor_id, "name": f"{letter} blok {level}-qavat", "floor_number": level,
+                "image_width": site_width, "image_height": height,
+            })
+
+            # Corridor grid (4-neighbour) with slightly jittered nodes
+            for i in range(spec.grid_width):
+                for j in range(spec.grid_height):
+                    add_waypoint(
+                        _hall_id(b, level, i, j), floor_id,
+                        ox + margin + i * s + rng.randint(-2, 2), margin + j * s + rng.randint(-2, 2),
+                        WaypointType.HALLWAY,
+                    )
+            for i in range(spec.grid_width):
+                for j in range(spec.grid_height):
+                    if i + 1 < spec.grid_width:
+                        connect(_hall_id(b, level, i, j), _hall_id(b, level, i + 1, j))
+                    if j + 1 < spec.grid_height:
+                        connect(_hall_id(b, level, i, j), _hall_id(b, level, i, j + 1))
+            if spec.diagonal_ratio > 0:
+                for i in range(spec.grid_width - 1):
+                    for j in range(spec.grid_height - 1):
+                        if rng.random() < spec.diagonal_ratio:
+                            connect(_hall_id(b, level, i, j), _hall_id(b, level, i + 1, j + 1))
+                            connect(_hall_id(b, level, i + 1, j), _hall_id(b, level, i, j + 1))
+
+            # Rooms along the corridors ("106-B blok")
+            room_no = 0
+            for i in range(spec.grid_width):
+                for j in range(spec.grid_height):
+                    if rng.random() >= spec.room_ratio:
+                        continue
+                    room_no += 1
+                    name = f"{level}{room_no:02d}-{letter} blok"
+                    wp_id = f"b{b}-f{level}-r{room_no}"
+                    hx, hy = positions[_hall_id(b, level, i, j)]
+                    add_waypoint(wp_id, floor_id, hx + s // 3, hy + s // 3, WaypointType.ROOM, label=name)
+                    connect(_hall_id(b, level, i, j), wp_id)
+                    campus.rooms.append({
+                        "id": len(campus.rooms) + 1, "name": name, "floor_id": floor_id,
+                        "waypoint_id": wp_id,
+                        "keywords": " ".join(rng.sample(ROOM_KEYWORDS, 2)),
+                        # Bulk insert skips the model's name hook
+                        **room_name_columns(name),
+                    })
+
+            # Staircase near one corner, elevator near the opposite one
+            stairs = f"b{b}-f{level}-s"
+            elevator = f"b{b}-f{level}-e"
+            add_waypoint(stairs, floor_id, ox + margin // 2, margin // 2, WaypointType.STAIRS, label="Zina")
+            add_waypoint(elevator, floor_id, ox + width - margin // 2, margin // 2, WaypointType.ELEVATOR, label="Lift")
+            connect(stairs, _hall_id(b, level, 0, 0))
+            connect(elevator, _hall_id(b, level, spec.grid_width - 1, 0))
+            vertical[(b, level)] = {
+                "stairs": campus.waypoints[-2], "elevator": campus.waypoints[-1],
+            }
+
+        # Vertical links between consecutive floors
+        for level in range(1, spec.floors):
+            for kind in ("stairs", "elevator"):
+                lower = vertical[(b, level)][kind]
+                upper = vertical[(b, level + 1)][kind]
+                lower["connects_to_waypoint"] = upper["id"]
+                lower["connects_to_floor"] = upper["floor_id"]
+                upper["connects_to_waypoint"] = lower["id"]
+                upper["connects_to_floor"] = lower["floor_id"]
+
+        # One kiosk at each building entrance
+        campus.kiosks.append({
+            "id": b + 1, "name": f"{letter} blok kiosk", "floor_id": floor_id_of[(b, 1)],
+            "waypoint_id": _hall_id(b, 1, 0, spec.grid_height - 1), "description": None,
+        })
+
+    # Ground-floor bridge: building b's east end to building b+1's west end
+    for b in range(spec.buildings - 1):
+        connect(
+            _hall_id(b, 1, spec.grid_width - 1, spec.grid_height - 1),
+            _hall_id(b + 1, 1, 0, spec.grid_height - 1),
+        )
+
+    # Closed-off wing below the corridor grid of the last floor
+    last = (spec.buildings - 1, spec.floors)
+    island_ids = []
+    for k in range(spec.island_size):
+        wp_id = f"b{last[0]}-f{last[1]}-x{k}"
+        add_waypoint(
+            wp_id, floor_id_of[last], last[0] * (width + s) + margin + k * s, margin + spec.grid_height * s,
+            WaypointType.HALL,
+        )
+        if island_ids:
+            connect(island_ids[-1], wp_id)
+        island_ids.append(wp_id)
+
+    first = _hall_id(0, 1, 0, 0)
+    campus.short_pair = (first, _hall_id(0, 1, min(3, spec.grid_width - 1), min(2, spec.grid_height - 1)))
+    campus.cross_floor_pair = (
+        first, _hall_id(spec.buildings - 1, spec.floors, spec.grid_width - 1, spec.grid_height - 1)
+    )
+    campus.unreachable_pair = (first, island_ids[-1]) if island_ids else (first, first)
+    return campus
+
+
+def load_campus(db: Session, campus: SyntheticCampus) -> None:
+    """Insert all rows with executemany-style bulk inserts (one transaction)."""
+    for model, rows in (
+        (Floor, campus.floors),
+        (Waypoint, campus.waypoints),
+        (Connection, campus.connections),
+        (Room, campus.rooms),
+        (Kiosk, campus.kiosks),
+    ):
+        if rows:
+            db.execute(insert(model), rows)
+    db.commit()
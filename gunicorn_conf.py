@@ -11,3 +11,17 @@ accesslog = "-"
 loglevel = "info"
 timeout = 120
 forwarded_allow_ips = "*"
+# Import the app in the master so the navigation graph can be warmed once and
+# shared copy-on-write by all forked workers (see when_ready below).
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before workers are forked.
+    if not preload_app:
+        return
+    from app.core.config import settings
+    if not settings.GRAPH_WARMUP_ON_STARTUP:
+        return
+    from app.services.graph_warmup import warm_up_graph
+    warm_up_graph(freeze=True)
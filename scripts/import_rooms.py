@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Bulk-import rooms from a CSV / NDJSON / XLSX file into the configured DB.
+
+Usage:
+    python scripts/import_rooms.py registry.csv
+    python scripts/import_rooms.py registry.xlsx --dry-run          # validate only
+    python scripts/import_rooms.py rooms.ndjson --skip-invalid --report errors.json
+
+Columns: name (required), floor_id, floor_number, waypoint_id, keywords.
+Same rules as POST /api/rooms/import (app/services/room_import.py): one
+transaction, COPY on PostgreSQL, and by default nothing is written if any
+row is invalid; rooms already in the DB (same name and floor) are skipped,
+so re-running the same file is safe. Exit code is 1 when invalid rows
+were found and nothing was committed.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Every model must be imported before the first query (relationships by name)
+import app.models.connection  # noqa: E402,F401
+import app.models.kiosk  # noqa: E402,F401
+from app.services import room_import  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path, help="file to import")
+    parser.add_argument("--format", choices=room_import.FORMATS, help="default: from the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    parser.add_argument("--skip-invalid", action="store_true", help="load valid rows even if some rows are invalid")
+    parser.add_argument("--report", type=Path, help="write the full JSON report here")
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        fmt = room_import.detect_format(args.path.name, args.format)
+        with args.path.open("rb") as stream:
+            report = room_import.import_rooms(
+                db, stream, fmt, dry_run=args.dry_run, skip_invalid=args.skip_invalid
+            )
+    except room_import.RoomImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+    print(
+        f"{report.rows_total} rows: {report.valid_rows} new, {report.skipped_existing} already present, "
+        f"{report.invalid_rows} invalid; "
+        f"imported {report.imported} in {report.seconds:.2f}s (committed={report.committed})"
+    )
+    for error in report.errors[:20]:
+        print(f"  line {error['line']}: {error['name'] or '-'}: {'; '.join(error['errors'])}")
+    if report.invalid_rows > 20:
+        print(f"  ... {report.invalid_rows - 20} more (see --report)")
+    if args.report:
+        args.report.write_text(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    if report.committed:
+        print("Running API processes keep their old graph cache until a map edit or restart.")
+    return 1 if report.invalid_rows and not report.committed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic university map and bulk-load it into the configured DB.
+
+Usage:
+    python scripts/seed_synthetic_campus.py --tier xlarge
+    python scripts/seed_synthetic_campus.py --buildings 8 --floors 6 --grid 30x15 --seed 42
+    python scripts/seed_synthetic_campus.py --tier medium --replace   # wipe map tables first
+    python scripts/seed_synthetic_campus.py --tier large --dry-run    # only print sizes
+
+Data comes from app/utils/synthetic_campus.py (deterministic per seed):
+floors per building, corridor grids, "106-B blok" rooms with keywords,
+stairs/elevators linked across floors and one kiosk per building.
+
+Loading uses the fastest path the database offers, in a single transaction:
+PostgreSQL gets COPY FROM STDIN per table (+ sequence reset and ANALYZE),
+anything else gets chunked executemany inserts. Target tables must be empty
+unless --replace is given.
+"""
+import argparse
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import delete, func, insert, select, text  # noqa: E402
+from sqlalchemy.engine import Connection as DBConnection, Engine  # noqa: E402
+
+from app.models.connection import Connection  # noqa: E402
+from app.models.floor import Floor  # noqa: E402
+from app.models.kiosk import Kiosk  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.waypoint import Waypoint  # noqa: E402
+from app.utils.pg_copy import copy_rows  # noqa: E402
+from app.utils.synthetic_campus import TIERS, SyntheticCampus, generate_campus  # noqa: E402
+
+# Insert order (parents first); deletes run in reverse
+TABLES = (
+    (Floor, "floors", ("id", "name", "floor_number", "image_width", "image_height")),
+    (Waypoint, "waypoints", ("id", "floor_id", "x", "y", "type", "label", "connects_to_floor", "connects_to_waypoint")),
+    (Connection, "connections", ("id", "from_waypoint_id", "to_waypoint_id", "distance")),
+    (Room, "rooms", ("id", "name", "floor_id", "waypoint_id", "keywords", "floor_number", "room_number", "building")),
+    (Kiosk, "kiosks", ("id", "name", "floor_id", "waypoint_id", "description")),
+)
+# Tables with integer identity/serial ids that must continue after explicit ids
+SERIAL_TABLES = ("floors", "rooms", "kiosks")
+CHUNK_SIZE = 5000
+
+
+def _rows(campus: SyntheticCampus, table: str) -> List[Dict]:
+    return getattr(campus, table)
+
+
+def _executemany(conn: DBConnection, model, rows: List[Dict]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        conn.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def bulk_load(engine: Engine, campus: SyntheticCampus, replace_existing: bool = False) -> Dict[str, float]:
+    """Load every table in one transaction; returns seconds spent per table."""
+    postgres = engine.dialect.name == "postgresql"
+    timings: Dict[str, float] = {}
+    with engine.begin() as conn:
+        if replace_existing:
+            for model, _table, _cols in reversed(TABLES):
+                conn.execute(delete(model))
+        else:
+            for model, table, _cols in TABLES:
+                if conn.execute(select(func.count()).select_from(model)).scalar():
+                    raise SystemExit(f"Table '{table}' is not empty; use --replace to wipe map tables first")
+
+        for model, table, columns in TABLES:
+            started = time.perf_counter()
+            rows = _rows(campus, table)
+            if rows:
+                if postgres:
+                    copy_rows(conn, table, columns, rows)
+                else:
+                    _executemany(conn, model, rows)
+            timings[table] = time.perf_counter() - started
+
+        if postgres:
+            for table in SERIAL_TABLES:
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ))
+    if postgres:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE " + ", ".join(table for _m, table, _c in TABLES)))
+    return timings
+
+
+def _parse_grid(value: str):
+    try:
+        width, height = (int(v) for v in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("grid must look like WIDTHxHEIGHT, e.g. 25x14")
+    return width, height
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tier", choices=sorted(TIERS), default="medium", help="base size preset")
+    parser.add_argument("--buildings", type=int, help="override: number of buildings")
+    parser.add_argument("--floors", type=int, help="override: floors per building")
+    parser.add_argument("--grid", type=_parse_grid, help="override: corridor grid per floor, WIDTHxHEIGHT")
+    parser.add_argument("--room-ratio", type=float, help="override: share of corridor nodes with a room")
+    parser.add_argument("--diagonal-ratio", type=float, help="override: share of grid cells with diagonal links")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replace", action="store_true", help="delete existing floors/waypoints/connections/rooms/kiosks first")
+    parser.add_argument("--dry-run", action="store_true", help="generate only and print sizes")
+    args = parser.parse_args(argv)
+
+    spec = TIERS[args.tier]
+    overrides = {}
+    if args.buildings is not None:
+        overrides["buildings"] = args.buildings
+    if args.floors is not None:
+        overrides["floors"] = args.floors
+    if args.grid is not None:
+        overrides["grid_width"], overrides["grid_height"] = args.grid
+    if args.room_ratio is not None:
+        overrides["room_ratio"] = args.room_ratio
+    if args.diagonal_ratio is not None:
+        overrides["diagonal_ratio"] = args.diagonal_ratio
+    spec = replace(spec, **overrides)
+
+    started = time.perf_counter()
+    campus = generate_campus(spec, seed=args.seed)
+    print(f"Generated {campus.sizes()} in {time.perf_counter() - started:.2f}s")
+    if args.dry_run:
+        return 0
+
+    from app.database import engine
+    timings = bulk_load(engine, campus, replace_existing=args.replace)
+    for table, seconds in timings.items():
+        print(f"  {table:<12} {len(_rows(campus, table)):>8} rows  {seconds:.2f}s")
+    print(f"Loaded into {engine.url.render_as_string(hide_password=True)} in {sum(timings.values()):.2f}s")
+    print("Running API processes keep their old graph cache until a map edit or restart.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
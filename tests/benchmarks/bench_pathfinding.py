@@ -0,0 +1,192 @@
+"""
+Pathfinding micro-benchmarks on the synthetic campus.
+
+    python -m tests.benchmarks.bench_pathfinding --tiers tiny,small --output bench.json
+    python -m tests.benchmarks.bench_pathfinding --tiers small --baseline bench.json
+
+Each tier is generated deterministically, loaded into a throw-away SQLite
+database, and the following are timed (milliseconds, `--repeat` runs each):
+
+- load_graph:           GraphCache.clear() + load_graph() (every index included)
+- find_path_short:      a few hops on one floor
+- find_path_cross_floor: first building's ground floor -> last building's top floor
+- find_path_unreachable: into the closed-off wing (explores the whole component)
+- add_instructions:     on the cross-floor path
+- room_lookup:          find_nearest_waypoint_to_room for every room (one run)
+
+With --baseline, medians are compared per (tier, case); the exit code is 1 if
+any case is slower than baseline by more than --max-regression.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Same minimal settings as tests/conftest.py, so the app modules import standalone.
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-must-be-at-least-32-chars-long")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key-must-be-at-least-32-chars-long")
+os.environ.setdefault("ADMIN_TOKEN", "bench-token")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD_HASH", "unused")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.services.pathfinding import GraphCache, PathFinder  # noqa: E402
+from app.utils.synthetic_campus import TIERS, generate_campus, load_campus  # noqa: E402
+
+SCHEMA_VERSION = 1
+
+
+def _stats(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p95_ms": round(p95, 4),
+    }
+
+
+def _time(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return _stats(samples)
+
+
+def run_tier(db: Session, tier: str, repeat: int = 5, seed: int = 0) -> Dict:
+    """Load the tier into `db` (an empty schema) and time every case."""
+    campus = generate_campus(TIERS[tier], seed=seed)
+    load_campus(db, campus)
+    cache = GraphCache.get_instance()
+
+    def reload_graph():
+        cache.clear()
+        cache.load_graph(db)
+
+    cases = {"load_graph": _time(reload_graph, repeat)}
+    finder = PathFinder(db)
+
+    cross_path, _ = finder.find_path(*campus.cross_floor_pair)
+    assert cross_path, "synthetic campus must connect the cross-floor pair"
+
+    cases["find_path_short"] = _time(lambda: finder.find_path(*campus.short_pair), repeat)
+    cases["find_path_cross_floor"] = _time(lambda: finder.find_path(*campus.cross_floor_pair), repeat)
+    cases["find_path_unreachable"] = _time(lambda: finder.find_path(*campus.unreachable_pair), repeat)
+    cases["add_instructions"] = _time(
+        lambda: finder.add_instructions([dict(step) for step in cross_path]), repeat
+    )
+    room_ids = [room["id"] for room in campus.rooms]
+    lookup = _time(lambda: [finder.find_nearest_waypoint_to_room(rid) for rid in room_ids], 1)
+    lookup["per_room_us"] = round(lookup["median_ms"] * 1000 / max(len(room_ids), 1), 4)
+    cases["room_lookup"] = lookup
+
+    cache.clear()
+    return {
+        "sizes": campus.sizes(),
+        "cross_floor_hops": len(cross_path),
+        "cases": cases,
+    }
+
+
+def run_benchmarks(tiers: List[str], repeat: int = 5, seed: int = 0) -> Dict:
+    """Each tier gets a fresh SQLite file so tiers don't affect each other."""
+    results: Dict[str, Dict] = {}
+    for tier in tiers:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            db = sessionmaker(bind=engine)()
+            try:
+                results[tier] = run_tier(db, tier, repeat=repeat, seed=seed)
+            finally:
+                db.close()
+                engine.dispose()
+    return {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "tiers": results,
+    }
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, max_regression: float = 0.25) -> List[Dict]:
+    """Per (tier, case) median ratios against the baseline; `regressed` marks slowdowns."""
+    rows = []
+    for tier, data in current["tiers"].items():
+        base_cases = baseline.get("tiers", {}).get(tier, {}).get("cases", {})
+        for case, stats in data["cases"].items():
+            base = base_cases.get(case)
+            if not base or not base.get("median_ms"):
+                continue
+            ratio = stats["median_ms"] / base["median_ms"]
+            rows.append({
+                "tier": tier,
+                "case": case,
+                "baseline_ms": base["median_ms"],
+                "current_ms": stats["median_ms"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + max_regression,
+            })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiers", default="tiny,small", help=f"comma-separated: {', '.join(TIERS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed median slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    unknown = [t for t in tiers if t not in TIERS]
+    if unknown:
+        parser.error(f"unknown tier(s): {', '.join(unknown)}")
+
+    results = run_benchmarks(tiers, repeat=args.repeat, seed=args.seed)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare_to_baseline(results, json.load(f), args.max_regression)
+        results["comparison"] = comparison
+        for row in comparison:
+            flag = "REGRESSED" if row["regressed"] else "ok"
+            print(
+                f"{row['tier']:>7} {row['case']:<24} {row['baseline_ms']:>10.3f} -> "
+                f"{row['current_ms']:>10.3f} ms  x{row['ratio']:<6} {flag}",
+                file=sys.stderr,
+            )
+        if any(row["regressed"] for row in comparison):
+            exit_code = 1
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
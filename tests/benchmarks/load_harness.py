@@ -0,0 +1,344 @@
+"""
+HTTP load harness with weighted scenario mixes.
+
+    # In-process: fresh SQLite DB seeded with the synthetic campus, app driven
+    # through httpx.ASGITransport (no network, runs offline)
+    python -m tests.benchmarks.load_harness --tier small --mix mixed --concurrency 32 --duration 20
+
+    # Against a running server whose DB was seeded with the same tier/seed:
+    #   python scripts/seed_synthetic_campus.py --tier medium --seed 0
+    python -m tests.benchmarks.load_harness --base-url http://localhost:8000 --tier medium \\
+        --token "$ADMIN_TOKEN" --mix edit_storm
+
+Scenarios (each is a short sequence of requests, picked by weight):
+
+- kiosk_route:    kiosk -> room via POST find-path or GET route
+- room_search:    /api/rooms/search with a room-name prefix or keyword
+- floor_map:      floor + its waypoints, connections and rooms (map screen load)
+- admin_edit:     waypoint relabel + batch waypoint/connection insert; every
+                  request ends in GraphCache.clear(), so the next routes rebuild
+
+The report (JSON) has p50/p95/p99 latency, throughput and error rate per
+endpoint and overall. 304/404 are expected answers, not errors.
+`--threadpool` resizes AnyIO's worker thread limiter (in-process mode) to
+study pool exhaustion.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-must-be-at-least-32-chars-long")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key-must-be-at-least-32-chars-long")
+os.environ.setdefault("ADMIN_TOKEN", "bench-token")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD_HASH", "unused")
+os.environ.setdefault("GRAPH_WARMUP_ON_STARTUP", "false")
+
+import httpx  # noqa: E402
+
+from app.utils.synthetic_campus import TIERS, SyntheticCampus, generate_campus  # noqa: E402
+
+# Status codes that are valid answers for these scenarios
+EXPECTED_STATUSES = {200, 304, 404}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def summary(self, elapsed_s: float) -> Dict:
+        ordered = sorted(self.latencies_ms)
+        count = len(ordered)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed_s, 2) if elapsed_s else 0.0,
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+            "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+        }
+
+
+class LoadContext:
+    """Per-run state shared by all virtual users."""
+
+    def __init__(self, client: httpx.AsyncClient, campus: SyntheticCampus, token: str, seed: int):
+        self.client = client
+        self.campus = campus
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, EndpointStats] = {}
+        self.hallways = [wp["id"] for wp in campus.waypoints if wp["type"].value == "hallway"]
+        self._edit_counter = 0
+
+    def next_edit_id(self) -> int:
+        self._edit_counter += 1
+        return self._edit_counter
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        stats = self.stats.setdefault(endpoint, EndpointStats())
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+            stats.errors += 1
+            stats.statuses[0] = stats.statuses.get(0, 0) + 1
+            return None
+        stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+        stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+        if response.status_code not in EXPECTED_STATUSES:
+            stats.errors += 1
+        return response
+
+
+async def kiosk_route(ctx: LoadContext) -> None:
+    kiosk = ctx.rng.choice(ctx.campus.kiosks)
+    room = ctx.rng.choice(ctx.campus.rooms)
+    if ctx.rng.random() < 0.5:
+        await ctx.request(
+            "POST /api/navigation/find-path", "POST", "/api/navigation/find-path",
+            json={"kiosk_id": kiosk["id"], "end_room_id": room["id"]},
+        )
+    else:
+        await ctx.request(
+            "GET /api/navigation/route", "GET", "/api/navigation/route",
+            params={"from": f"kiosk:{kiosk['id']}", "to": f"room:{room['id']}", "format": "compact"},
+        )
+
+
+async def room_search(ctx: LoadContext) -> None:
+    room = ctx.rng.choice(ctx.campus.rooms)
+    query = room["name"][:3] if ctx.rng.random() < 0.6 else room["keywords"].split()[0]
+    await ctx.request("GET /api/rooms/search", "GET", "/api/rooms/search", params={"query": query})
+
+
+async def floor_map(ctx: LoadContext) -> None:
+    floor_id = ctx.rng.choice(ctx.campus.floors)["id"]
+    await ctx.request("GET /api/floors/{id}", "GET", f"/api/floors/{floor_id}")
+    await ctx.request("GET /api/waypoints/floor/{id}", "GET", f"/api/waypoints/floor/{floor_id}")
+    await ctx.request(
+        "GET /api/waypoints/connections/floor/{id}", "GET", f"/api/waypoints/connections/floor/{floor_id}"
+    )
+    await ctx.request("GET /api/rooms/floor/{id}", "GET", f"/api/rooms/floor/{floor_id}")
+
+
+async def admin_edit(ctx: LoadContext) -> None:
+    hall_id = ctx.rng.choice(ctx.hallways)
+    edit = ctx.next_edit_id()
+    await ctx.request(
+        "PUT /api/waypoints/{id}", "PUT", f"/api/waypoints/{hall_id}",
+        json={"label": f"edit-{edit}"}, headers=ctx.auth,
+    )
+    hall = next(wp for wp in ctx.campus.waypoints if wp["id"] == hall_id)
+    new_ids = [f"load-{edit}-{k}" for k in range(3)]
+    await ctx.request(
+        "POST /api/waypoints/batch", "POST", "/api/waypoints/batch",
+        json=[
+            {"id": wp_id, "floor_id": hall["floor_id"], "x": hall["x"] + 5 * (k + 1), "y": hall["y"], "type": "hallway"}
+            for k, wp_id in enumerate(new_ids)
+        ],
+        headers=ctx.auth,
+    )
+    chain = [hall_id] + new_ids
+    await ctx.request(
+        "POST /api/waypoints/connections/batch", "POST", "/api/waypoints/connections/batch",
+        json=[
+            {"from_waypoint_id": a, "to_waypoint_id": b, "distance": 5}
+            for a, b in zip(chain, chain[1:])
+        ],
+        headers=ctx.auth,
+    )
+
+
+Scenario = Callable[[LoadContext], Awaitable[None]]
+SCENARIOS: Dict[str, Scenario] = {
+    "kiosk_route": kiosk_route,
+    "room_search": room_search,
+    "floor_map": floor_map,
+    "admin_edit": admin_edit,
+}
+# Weights per mix
+MIXES: Dict[str, Dict[str, float]] = {
+    "mixed": {"kiosk_route": 50, "room_search": 30, "floor_map": 18, "admin_edit": 2},
+    "kiosk_rush": {"kiosk_route": 90, "room_search": 10},
+    "edit_storm": {"kiosk_route": 60, "room_search": 10, "floor_map": 10, "admin_edit": 20},
+    "read_only": {"kiosk_route": 50, "room_search": 30, "floor_map": 20},
+}
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    campus: SyntheticCampus,
+    mix: Dict[str, float],
+    concurrency: int = 16,
+    duration_s: Optional[float] = None,
+    max_scenarios: Optional[int] = None,
+    token: str = "",
+    seed: int = 0,
+) -> Dict:
+    """Run `concurrency` virtual users until `duration_s` passes or `max_scenarios` complete."""
+    if duration_s is None and max_scenarios is None:
+        raise ValueError("set duration_s and/or max_scenarios")
+    ctx = LoadContext(client, campus, token, seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    scenario_counts = {name: 0 for name in names}
+    started = time.perf_counter()
+    deadline = started + duration_s if duration_s is not None else math.inf
+    remaining = [max_scenarios if max_scenarios is not None else math.inf]
+
+    async def user() -> None:
+        while time.perf_counter() < deadline and remaining[0] > 0:
+            remaining[0] -= 1
+            name = ctx.rng.choices(names, weights)[0]
+            scenario_counts[name] += 1
+            await SCENARIOS[name](ctx)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    total = EndpointStats()
+    for stats in ctx.stats.values():
+        total.latencies_ms.extend(stats.latencies_ms)
+        total.errors += stats.errors
+        for code, n in stats.statuses.items():
+            total.statuses[code] = total.statuses.get(code, 0) + n
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "concurrency": concurrency,
+        "mix": mix,
+        "scenarios": scenario_counts,
+        "overall": total.summary(elapsed),
+        "endpoints": {name: stats.summary(elapsed) for name, stats in sorted(ctx.stats.items())},
+    }
+
+
+async def run_in_process(campus: SyntheticCampus, threadpool: Optional[int] = None, **load_kwargs) -> Dict:
+    """Seed a temporary SQLite DB with `campus` and drive the app through ASGITransport."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import Base, get_db
+    from app.main import app
+    from app.services.pathfinding import GraphCache
+    from app.utils.synthetic_campus import load_campus
+
+    if threadpool:
+        import anyio.to_thread
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'load.db')}",
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        db = Session()
+        try:
+            load_campus(db, campus)
+        finally:
+            db.close()
+
+        def override_get_db():
+            session = Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        previous = app.dependency_overrides.get(get_db)
+        app.dependency_overrides[get_db] = override_get_db
+        GraphCache.get_instance().clear()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+                return await run_load(client, campus, **load_kwargs)
+        finally:
+            GraphCache.get_instance().clear()
+            if previous is None:
+                app.dependency_overrides.pop(get_db, None)
+            else:
+                app.dependency_overrides[get_db] = previous
+            engine.dispose()
+
+
+async def run_remote(base_url: str, campus: SyntheticCampus, **load_kwargs) -> Dict:
+    limits = httpx.Limits(max_connections=load_kwargs.get("concurrency", 16))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        return await run_load(client, campus, **load_kwargs)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tier", choices=sorted(TIERS), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--scenarios", type=int, help="stop after this many scenarios")
+    parser.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--token", default=os.environ.get("ADMIN_TOKEN", ""), help="admin token for admin_edit")
+    parser.add_argument("--threadpool", type=int, help="AnyIO thread limiter size (in-process only)")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+    # One INFO line per request would dominate the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    campus = generate_campus(TIERS[args.tier], seed=args.seed)
+    load_kwargs = dict(
+        mix=MIXES[args.mix],
+        concurrency=args.concurrency,
+        duration_s=args.duration,
+        max_scenarios=args.scenarios,
+        token=args.token,
+        seed=args.seed,
+    )
+    if args.base_url:
+        report = asyncio.run(run_remote(args.base_url, campus, **load_kwargs))
+    else:
+        report = asyncio.run(run_in_process(campus, threadpool=args.threadpool, **load_kwargs))
+    report["tier"] = args.tier
+    report["target"] = args.base_url or "in-process"
+
+    for name, stats in report["endpoints"].items():
+        print(
+            f"{name:<44} n={stats['requests']:<6} err={stats['error_rate']:<7} "
+            f"p50={stats['p50_ms']:>8.2f} p95={stats['p95_ms']:>8.2f} p99={stats['p99_ms']:>8.2f} ms",
+            file=sys.stderr,
+        )
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
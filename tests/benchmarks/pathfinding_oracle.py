@@ -0,0 +1,276 @@
+"""
+Reference Dijkstra oracle and differential fuzzing for the pathfinding engines.
+
+The oracle builds its own adjacency straight from table rows, following the
+documented map semantics rather than GraphCache code:
+
+- every connection is walkable in both directions at its `distance`;
+- a STAIRS/ELEVATOR waypoint with `connects_to_waypoint` adds a two-way
+  vertical edge (50 for stairs, 30 for elevators), even when only one side
+  of the pair is linked (legacy one-way data);
+- dangling references are ignored.
+
+`random_map` produces small multi-floor maps with one-way legacy links,
+dangling links, cross-floor ramps, duplicate floor numbers and disconnected
+components. `check_map` runs every engine on sampled pairs and asserts equal
+distances and valid paths, and the very same path from the in-process A* and
+the CSR engine the process pool runs; it also returns node expansions per
+engine.
+
+    python -m tests.benchmarks.pathfinding_oracle --seeds 200
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-must-be-at-least-32-chars-long")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key-must-be-at-least-32-chars-long")
+os.environ.setdefault("ADMIN_TOKEN", "bench-token")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD_HASH", "unused")
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.models.connection import Connection  # noqa: E402
+from app.models.floor import Floor  # noqa: E402
+from app.models.waypoint import Waypoint, WaypointType  # noqa: E402
+from app.services import compiled_graph  # noqa: E402
+from app.services.pathfinding import GraphCache, PathFinder  # noqa: E402
+
+VERTICAL_COST = {WaypointType.STAIRS: 50.0, WaypointType.ELEVATOR: 30.0}
+Adjacency = Dict[str, List[Tuple[str, float]]]
+MapRows = Dict[str, List[Dict]]
+
+
+def reference_adjacency(rows: MapRows) -> Adjacency:
+    ids = {wp["id"] for wp in rows["waypoints"]}
+    adjacency: Adjacency = {wp_id: [] for wp_id in ids}
+    for conn in rows["connections"]:
+        a, b = conn["from_waypoint_id"], conn["to_waypoint_id"]
+        if a in ids and b in ids:
+            adjacency[a].append((b, float(conn["distance"])))
+            adjacency[b].append((a, float(conn["distance"])))
+    for wp in rows["waypoints"]:
+        target = wp["connects_to_waypoint"]
+        if wp["type"] in VERTICAL_COST and target in ids:
+            adjacency[wp["id"]].append((target, VERTICAL_COST[wp["type"]]))
+            adjacency[target].append((wp["id"], VERTICAL_COST[wp["type"]]))
+    return adjacency
+
+
+def dijkstra(adjacency: Adjacency, source: str) -> Tuple[Dict[str, float], int]:
+    """Exact distances from `source` to every reachable node, and nodes settled."""
+    dist = {source: 0.0}
+    settled = set()
+    heap = [(0.0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if node in settled:
+            continue
+        settled.add(node)
+        for neighbor, weight in adjacency[node]:
+            candidate = d + weight
+            if candidate < dist.get(neighbor, math.inf):
+                dist[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+    return dist, len(settled)
+
+
+def path_length(adjacency: Adjacency, path: List[str]) -> Optional[float]:
+    """Length of `path` using the cheapest parallel edge per hop; None if a hop is not an edge."""
+    total = 0.0
+    for a, b in zip(path, path[1:]):
+        weights = [w for n, w in adjacency[a] if n == b]
+        if not weights:
+            return None
+        total += min(weights)
+    return total
+
+
+def random_map(seed: int) -> MapRows:
+    """Small random multi-floor map in one shared coordinate frame."""
+    rng = random.Random(seed)
+    floors, waypoints, connections = [], [], []
+    floor_count = rng.randint(1, 4)
+    for fid in range(1, floor_count + 1):
+        # Duplicate / gapped floor numbers happen in real data (several buildings)
+        floors.append({"id": fid, "name": f"F{fid}", "floor_number": rng.choice([fid, fid, fid + 1, 1])})
+
+    def add_wp(fid, x, y, wp_type=WaypointType.HALLWAY, target=None):
+        wp = {
+            "id": f"w{len(waypoints)}", "floor_id": fid, "x": x, "y": y, "type": wp_type,
+            "label": None, "connects_to_floor": None, "connects_to_waypoint": target,
+        }
+        waypoints.append(wp)
+        return wp
+
+    def connect(a, b, slack=None):
+        euclid = math.hypot(b["x"] - a["x"], b["y"] - a["y"])
+        factor = rng.uniform(1.0, 1.6) if slack is None else 1.0
+        distance = math.ceil((euclid * factor + (slack or 0.0)) * 100) / 100
+        connections.append({
+            "id": f"c{len(connections)}", "from_waypoint_id": a["id"],
+            "to_waypoint_id": b["id"], "distance": distance,
+        })
+
+    by_floor: Dict[int, List[Dict]] = {}
+    for fid in range(1, floor_count + 1):
+        nodes = [add_wp(fid, rng.randint(0, 400), rng.randint(0, 300)) for _ in range(rng.randint(4, 18))]
+        by_floor[fid] = nodes
+        for i, node in enumerate(nodes[1:], start=1):
+            # Mostly a connected tree plus a few cycles; ~10% start a new component
+            if rng.random() < 0.9:
+                connect(node, nodes[rng.randrange(i)])
+            if rng.random() < 0.3:
+                connect(node, rng.choice(nodes[:i]))
+
+    # Vertical links: stacked at the same x, y on another floor
+    for _ in range(rng.randint(0, 2 * floor_count)):
+        if floor_count < 2:
+            break
+        fa, fb = rng.sample(range(1, floor_count + 1), 2)
+        base = rng.choice(by_floor[fa])
+        wp_type = rng.choice([WaypointType.STAIRS, WaypointType.ELEVATOR])
+        lower = add_wp(fa, base["x"], base["y"], wp_type)
+        upper = add_wp(fb, base["x"], base["y"], rng.choice([wp_type, WaypointType.HALLWAY]))
+        connect(lower, base)
+        connect(upper, rng.choice(by_floor[fb]))
+        style = rng.random()
+        if style < 0.5:
+            lower["connects_to_waypoint"] = upper["id"]
+            if upper["type"] != WaypointType.HALLWAY:
+                upper["connects_to_waypoint"] = lower["id"]
+        elif style < 0.8:
+            # Legacy one-way link, set on either side
+            if rng.random() < 0.5:
+                lower["connects_to_waypoint"] = upper["id"]
+            else:
+                upper["type"] = wp_type
+                upper["connects_to_waypoint"] = lower["id"]
+        # else: unlinked stairs (dead end)
+
+    # Dangling link and a cross-floor ramp connection
+    if waypoints and rng.random() < 0.3:
+        add_wp(1, 5, 5, WaypointType.STAIRS, target="missing")
+    if floor_count >= 2 and rng.random() < 0.5:
+        connect(rng.choice(by_floor[1]), rng.choice(by_floor[2]), slack=rng.uniform(0, 80))
+
+    return {"floors": floors, "waypoints": waypoints, "connections": connections}
+
+
+def load_rows(db: Session, rows: MapRows) -> None:
+    for model, key in ((Floor, "floors"), (Waypoint, "waypoints"), (Connection, "connections")):
+        if rows[key]:
+            db.execute(insert(model), rows[key])
+    db.commit()
+
+
+# Engine: (finder, start, end) -> (waypoint ids, distance, nodes expanded)
+Engine = Callable[[PathFinder, str, str], Tuple[List[str], float, int]]
+
+
+def _engine_astar(finder: PathFinder, start: str, end: str):
+    path, distance = finder.find_path(start, end)
+    return [step["waypoint_id"] for step in path], distance, finder.last_expanded
+
+
+def _engine_seeds(finder: PathFinder, start: str, end: str):
+    node, distance = finder._search_seeds([(start, 0.0)], [(end, 0.0)])
+    ids = [step["waypoint_id"] for step in finder.reconstruct_path(node)] if node else []
+    return ids, distance, finder.last_expanded
+
+
+def _engine_csr(finder: PathFinder, start: str, end: str):
+    graph = finder.compiled
+    indices, distance, expanded = compiled_graph.astar(graph, graph.index_of[start], graph.index_of[end])
+    return [graph.node_ids[i] for i in indices], distance, expanded
+
+
+ENGINES: Dict[str, Engine] = {
+    "astar": _engine_astar,
+    "multi_seed": _engine_seeds,
+    "csr": _engine_csr,
+}
+
+
+def check_map(db: Session, rows: MapRows, seed: int, pairs: int = 25) -> Dict[str, int]:
+    """
+    Compare every engine with the oracle on `pairs` random (start, end) pairs.
+    Raises AssertionError on any mismatch; returns total expansions per engine
+    (plus "dijkstra" for the oracle, counted until the goal is settled).
+    """
+    rng = random.Random(seed)
+    GraphCache.get_instance().clear()
+    finder = PathFinder(db)
+    adjacency = reference_adjacency(rows)
+    ids = sorted(adjacency)
+    expansions = {name: 0 for name in ENGINES}
+    expansions["dijkstra"] = 0
+
+    for _ in range(pairs):
+        start, end = rng.choice(ids), rng.choice(ids)
+        expected, settled = dijkstra(adjacency, start)
+        want = expected.get(end, math.inf)
+        # Nodes a goal-directed Dijkstra would settle before stopping
+        expansions["dijkstra"] += settled if want == math.inf else sum(1 for d in expected.values() if d < want)
+        paths = {}
+        for name, engine in ENGINES.items():
+            path, distance, expanded = engine(finder, start, end)
+            paths[name] = path
+            expansions[name] += expanded
+            context = f"engine={name} seed={seed} {start}->{end}"
+            if want == math.inf:
+                assert not path and distance == math.inf, f"{context}: expected unreachable, got {distance}"
+                continue
+            assert math.isclose(distance, want, rel_tol=1e-9, abs_tol=1e-6), f"{context}: {distance} != {want}"
+            assert path and path[0] == start and path[-1] == end, f"{context}: bad endpoints {path}"
+            length = path_length(adjacency, path)
+            assert length is not None, f"{context}: path uses a non-edge {path}"
+            assert math.isclose(length, want, rel_tol=1e-9, abs_tol=1e-6), f"{context}: path length {length} != {want}"
+        # The process pool runs the CSR engine: on equal-cost routes both must pick the same one
+        assert paths["csr"] == paths["astar"], f"seed={seed} {start}->{end}: {paths['csr']} != {paths['astar']}"
+    return expansions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seeds", type=int, default=100, help="number of random maps")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--pairs", type=int, default=25, help="queries per map")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import Base
+
+    totals: Dict[str, int] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'oracle.db')}")
+        Session = sessionmaker(bind=engine)
+        for seed in range(args.first_seed, args.first_seed + args.seeds):
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            db = Session()
+            try:
+                rows = random_map(seed)
+                load_rows(db, rows)
+                for name, count in check_map(db, rows, seed, args.pairs).items():
+                    totals[name] = totals.get(name, 0) + count
+            finally:
+                db.close()
+        engine.dispose()
+    GraphCache.get_instance().clear()
+    print(json.dumps({"maps": args.seeds, "pairs_per_map": args.pairs, "expansions": totals}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import pytest
+
+from app.services.pathfinding import GraphCache
+from tests.benchmarks.bench_pathfinding import compare_to_baseline, main, run_benchmarks
+from app.utils.synthetic_campus import TIERS, generate_campus
+
+
+@pytest.fixture(autouse=True)
+def clear_graph_cache():
+    GraphCache.get_instance().clear()
+    yield
+    GraphCache.get_instance().clear()
+
+
+def test_generator_is_deterministic():
+    a = generate_campus(TIERS["tiny"], seed=7)
+    b = generate_campus(TIERS["tiny"], seed=7)
+    c = generate_campus(TIERS["tiny"], seed=8)
+    assert a.waypoints == b.waypoints and a.rooms == b.rooms
+    assert a.waypoints != c.waypoints
+
+    ids = {wp["id"] for wp in a.waypoints}
+    assert len(ids) == len(a.waypoints)
+    assert all(c["from_waypoint_id"] in ids and c["to_waypoint_id"] in ids for c in a.connections)
+    linked = [wp for wp in a.waypoints if wp["connects_to_waypoint"]]
+    assert linked and all(wp["connects_to_waypoint"] in ids for wp in linked)
+
+
+def test_tiny_tier_runs_and_compares(tmp_path):
+    results = run_benchmarks(["tiny"], repeat=1)
+    tiny = results["tiers"]["tiny"]
+    assert set(tiny["cases"]) == {
+        "load_graph", "find_path_short", "find_path_cross_floor",
+        "find_path_unreachable", "add_instructions", "room_lookup",
+    }
+    assert tiny["sizes"]["waypoints"] > 0
+
+    slower = {"tiers": {"tiny": {"cases": {
+        name: dict(stats, median_ms=stats["median_ms"] * 2 + 1) for name, stats in tiny["cases"].items()
+    }}}}
+    rows = compare_to_baseline(slower, results, max_regression=0.25)
+    assert rows and all(row["regressed"] for row in rows)
+
+    output = tmp_path / "bench.json"
+    assert main(["--tiers", "tiny", "--repeat", "1", "--output", str(output)]) == 0
+    assert output.exists()
@@ -0,0 +1,31 @@
+import asyncio
+
+from tests.benchmarks.load_harness import MIXES, percentile, run_in_process
+from app.utils.synthetic_campus import TIERS, generate_campus
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_in_process_edit_storm_reports_per_endpoint():
+    campus = generate_campus(TIERS["tiny"], seed=1)
+    report = asyncio.run(run_in_process(
+        campus,
+        mix=MIXES["edit_storm"],
+        concurrency=4,
+        max_scenarios=40,
+        token="test-token",
+        seed=1,
+    ))
+
+    assert sum(report["scenarios"].values()) == 40
+    assert report["overall"]["errors"] == 0
+    routes = report["endpoints"]["POST /api/navigation/find-path"]
+    assert routes["requests"] > 0
+    assert routes["p50_ms"] <= routes["p95_ms"] <= routes["p99_ms"]
+    if report["scenarios"]["admin_edit"]:
+        assert report["endpoints"]["PUT /api/waypoints/{id}"]["requests"] == report["scenarios"]["admin_edit"]
@@ -13,6 +13,8 @@ os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret-key-must-be-at-least-32
 os.environ.setdefault("UPLOAD_DIR", "uploads")
 os.environ.setdefault("ADMIN_TOKEN", "test-token")
 os.environ.setdefault("ADMIN_USERNAME", "admin")
+# Tests build their own data per test; warm-up would race the fixtures.
+os.environ.setdefault("GRAPH_WARMUP_ON_STARTUP", "false")
 
 # Ensure auth/login is deterministic in tests (override .env if present)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
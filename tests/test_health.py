@@ -2,3 +2,65 @@ def test_health_endpoints(client):
     api_health = client.get("/api/health")
     assert api_health.status_code == 200
     assert api_health.json().get("status") == "healthy"
+
+
+def test_readiness_waits_for_graph_warmup():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import graph_warmup
+    from app.services.pathfinding import GraphCache
+    from tests.conftest import TestingSessionLocal
+
+    GraphCache.get_instance().clear()
+    graph_warmup.reset()
+    try:
+        # No `with`: lifespan (and its warm-up) doesn't run.
+        client = TestClient(app)
+        assert client.get("/api/health/ready").status_code == 503
+
+        assert graph_warmup.warm_up_graph(TestingSessionLocal) is True
+        assert GraphCache.get_instance().initialized
+
+        resp = client.get("/api/health/ready")
+        assert resp.status_code == 200
+        assert resp.json() == {"status": "ready"}
+    finally:
+        GraphCache.get_instance().clear()
+        graph_warmup.mark_ready()
+
+
+def test_failed_warmup_is_retried_until_the_graph_loads():
+    import threading
+    from app.services import graph_warmup
+    from app.services.pathfinding import GraphCache
+    from tests.conftest import TestingSessionLocal
+
+    attempts = []
+
+    def flaky_session():
+        # DB not accepting connections yet on the first attempt
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("connection refused")
+        return TestingSessionLocal()
+
+    def refusing_session():
+        raise ConnectionError("connection refused")
+
+    GraphCache.get_instance().clear()
+    graph_warmup.reset()
+    try:
+        assert graph_warmup.warm_up_graph_with_retry(flaky_session, initial_delay=0.01) is True
+        assert len(attempts) == 2
+        assert graph_warmup.is_ready()
+
+        GraphCache.get_instance().clear()
+        graph_warmup.reset()
+        stop = threading.Event()
+        stop.set()
+        # Shutdown interrupts the backoff
+        assert graph_warmup.warm_up_graph_with_retry(refusing_session, stop=stop, initial_delay=10) is False
+        assert not graph_warmup.is_ready()
+    finally:
+        GraphCache.get_instance().clear()
+        graph_warmup.mark_ready()
@@ -0,0 +1,157 @@
+import copy
+import math
+import random
+
+import pytest
+
+from app.models.waypoint import WaypointType
+from app.services.pathfinding import GraphCache, PathFinder
+from tests.test_pathfinding import create_connection, create_floor, create_waypoint
+
+
+@pytest.fixture(autouse=True)
+def clear_graph_cache():
+    GraphCache.get_instance().clear()
+    yield
+    GraphCache.get_instance().clear()
+
+
+def reference_add_instructions(finder, path):
+    """The original per-step atan2 implementation, kept verbatim as the oracle."""
+    if len(path) <= 1:
+        return path
+
+    for i, step in enumerate(path):
+        if i == 0:
+            step['instruction'] = "Boshlanish nuqtasi"
+            continue
+        if i == len(path) - 1:
+            step['instruction'] = "Maqsadga yetdingiz"
+            continue
+
+        prev_step = path[i-1]
+        next_step = path[i+1]
+
+        if step['type'] in ['stairs', 'elevator'] and next_step['floor_id'] != step['floor_id']:
+            direction = (
+                "yuqoriga"
+                if finder._floor_number(next_step['floor_id']) > finder._floor_number(step['floor_id'])
+                else "pastga"
+            )
+            if step['type'] == 'stairs':
+                step['instruction'] = f"Zina orqali {direction} chiqing"
+            else:
+                step['instruction'] = f"Liftda {direction} chiqing"
+            continue
+
+        angle1 = math.atan2(step['y'] - prev_step['y'], step['x'] - prev_step['x'])
+        angle2 = math.atan2(next_step['y'] - step['y'], next_step['x'] - step['x'])
+        angle_diff = math.degrees(angle2 - angle1) % 360
+
+        if angle_diff < 45 or angle_diff > 315:
+            instruction = "To'g'ri davom eting"
+        elif 45 <= angle_diff < 135:
+            instruction = "Chapga buriling"
+        elif 225 < angle_diff <= 315:
+            instruction = "O'ngga buriling"
+        else:
+            instruction = "Orqaga buriling"
+
+        if prev_step['type'] in ['stairs', 'elevator'] and i >= 2:
+            prev_prev = path[i-2]
+            if prev_prev['floor_id'] != prev_step['floor_id']:
+                if instruction == "To'g'ri davom eting":
+                    instruction = "Kalidorga chiqib to'g'ri davom eting"
+                elif instruction == "O'ngga buriling":
+                    instruction = "Kalidorga chiqib o'ngga buriling"
+                elif instruction == "Chapga buriling":
+                    instruction = "Kalidorga chiqib chapga buriling"
+
+        step['instruction'] = instruction
+
+    last_instruction = None
+    for step in path:
+        instr = step.get('instruction')
+        if instr == "To'g'ri davom eting" and instr == last_instruction:
+            step['instruction'] = None
+        elif instr:
+            last_instruction = instr
+
+    return path
+
+
+def _build_grid_campus(db, rng, floors=3, size=6):
+    """size x size corridor grid per floor, stairs + elevator linking floors."""
+    floor_ids = []
+    for f in range(floors):
+        floor_ids.append(create_floor(db, floor_number=f + 1, name=f"{f + 1}-qavat").id)
+    for f, floor_id in enumerate(floor_ids):
+        for i in range(size):
+            for j in range(size):
+                wp_type = WaypointType.HALLWAY
+                if (i, j) == (0, 0):
+                    wp_type = WaypointType.STAIRS
+                elif (i, j) == (size - 1, size - 1):
+                    wp_type = WaypointType.ELEVATOR
+                # Jitter so turns cover every angle bucket
+                x = i * 50 + rng.randint(-20, 20)
+                y = j * 50 + rng.randint(-20, 20)
+                wp = create_waypoint(db, floor_id, x, y, f"f{f}-{i}-{j}", wp_type)
+                if f > 0 and wp_type != WaypointType.HALLWAY:
+                    wp.connects_to_waypoint = f"f{f - 1}-{i}-{j}"
+                    wp.connects_to_floor = floor_ids[f - 1]
+        for i in range(size):
+            for j in range(size):
+                if i + 1 < size:
+                    create_connection(db, f"f{f}-{i}-{j}", f"f{f}-{i + 1}-{j}", 50.0)
+                if j + 1 < size:
+                    create_connection(db, f"f{f}-{i}-{j}", f"f{f}-{i}-{j + 1}", 50.0)
+    db.commit()
+
+
+def test_instructions_match_reference_on_routes(clean_db):
+    from tests.conftest import TestingSessionLocal
+    db = TestingSessionLocal()
+    rng = random.Random(7)
+    try:
+        _build_grid_campus(db, rng)
+        finder = PathFinder(db)
+        ids = list(finder.waypoints_dict)
+        checked = 0
+        for _ in range(200):
+            start, end = rng.sample(ids, 2)
+            path, _distance = finder.find_path(start, end)
+            if not path:
+                continue
+            expected = reference_add_instructions(finder, copy.deepcopy(path))
+            assert finder.add_instructions(path) == expected
+            checked += 1
+        assert checked > 150
+    finally:
+        db.close()
+
+
+def test_instructions_match_reference_on_arbitrary_paths(clean_db):
+    from tests.conftest import TestingSessionLocal
+    db = TestingSessionLocal()
+    rng = random.Random(11)
+    try:
+        create_floor(db, floor_number=1)
+        finder = PathFinder(db)
+        types = ['hallway', 'room', 'stairs', 'elevator', 'hall', 'point']
+        for length in list(range(0, 6)) * 20 + [40] * 50:
+            path = [
+                {
+                    'waypoint_id': None if rng.random() < 0.1 else f"wp{k}",
+                    'floor_id': rng.choice([1, 1, 1, 2, 3]),
+                    'x': rng.randint(-5, 5) * rng.choice([1, 10]),
+                    'y': rng.randint(-5, 5) * rng.choice([1, 10]),
+                    'type': rng.choice(types),
+                    'label': None,
+                }
+                for k in range(length)
+            ]
+            expected = reference_add_instructions(finder, copy.deepcopy(path))
+            assert finder.add_instructions(path) == expected
+    finally:
+        db.close()
@@ -0,0 +1,150 @@
+import time
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.connection import Connection
+from app.models.floor import Floor
+from app.models.waypoint import Waypoint, WaypointType
+from app.services import map_audit
+from app.services.pathfinding import GraphCache
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def clear_graph_cache():
+    GraphCache.get_instance().clear()
+    yield
+    map_audit.disable_background_refresh()
+    GraphCache.get_instance().clear()
+
+
+def _wp(wp_id, floor_id, wp_type=WaypointType.HALLWAY, target=None):
+    return {
+        "id": wp_id, "floor_id": floor_id, "x": 0, "y": 0, "type": wp_type,
+        "label": None, "connects_to_floor": None, "connects_to_waypoint": target,
+    }
+
+
+def _seed_map():
+    db = TestingSessionLocal()
+    db.execute(insert(Floor), [
+        {"id": fid, "name": f"{fid}-qavat", "floor_number": fid} for fid in (1, 2, 3, 4)
+    ])
+    db.execute(insert(Waypoint), [
+        _wp("a", 1),
+        _wp("s1", 1, WaypointType.STAIRS, target="s2"),
+        _wp("s2", 2, WaypointType.STAIRS),
+        _wp("b", 2),
+        _wp("e1", 1, WaypointType.ELEVATOR),
+        _wp("r", 1),
+        _wp("c", 2),
+        _wp("x", 4),
+        _wp("h", 1, target="ghost"),
+        _wp("k", 2, WaypointType.ROOM, target="b"),
+    ])
+    db.execute(insert(Connection), [
+        {"id": cid, "from_waypoint_id": a, "to_waypoint_id": b, "distance": 10}
+        for cid, a, b in (
+            ("c1", "a", "s1"), ("c2", "s2", "b"), ("c3", "a", "e1"),
+            ("c4", "r", "c"), ("c5", "a", "r"), ("c6", "a", "ghost"),
+        )
+    ])
+    db.commit()
+    db.close()
+
+
+def test_audit_from_graph_snapshot(client, auth_headers, clean_db):
+    _seed_map()
+    resp = client.get("/api/navigation/audit", headers=auth_headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    summary = data["summary"]
+
+    assert (summary["floors"], summary["waypoints"], summary["connections"]) == (4, 10, 6)
+    assert [c["waypoint_ids"] for c in data["components"]] == [
+        ["a", "s1", "s2", "b", "e1", "r", "c", "k"], ["x"], ["h"]
+    ]
+    assert data["components"][0]["floor_numbers"] == [1, 2]
+    assert [f["id"] for f in summary["disconnected_floors"]] == [4]
+    assert summary["floors_with_no_waypoints"] == [{"id": 3, "floor_number": 3, "name": "3-qavat"}]
+
+    issues = data["issues"]
+    assert [(i["waypoint_id"], i["issue"]) for i in issues["legacy_one_way_links"]] == [
+        ("s1", "reverse_missing"), ("h", "target_missing"), ("k", "reverse_missing")
+    ]
+    assert [i["waypoint_id"] for i in issues["stairs_without_vertical_links"]] == ["s2", "e1"]
+    assert issues["missing_waypoints_in_connections"] == [
+        {"connection_id": "c6", "from_waypoint_id": "a", "to_waypoint_id": "ghost"}
+    ]
+    assert [(v["from_id"], v["to_id"]) for v in data["vertical_connections"]] == [("s1", "s2")]
+    assert [w["waypoint_id"] for w in data["unattached_waypoints"]] == ["x", "h"]
+    assert summary["unattached_waypoints"] == 2 and summary["components"] == 3
+
+    # Cached per graph version; an edit produces a new report
+    assert client.get("/api/navigation/audit", headers=auth_headers).content == resp.content
+    resp = client.put("/api/floors/3", json={"name": "Yerto'la"}, headers=auth_headers)
+    assert resp.status_code == 200
+    data = client.get("/api/navigation/audit", headers=auth_headers).json()
+    assert data["summary"]["floors_with_no_waypoints"][0]["name"] == "Yerto'la"
+
+
+def test_audit_counts_a_newly_created_floor(client, auth_headers, clean_db):
+    import json
+
+    _seed_map()
+    summary = client.get("/api/navigation/audit", headers=auth_headers).json()["summary"]
+    assert summary["floors"] == 4
+
+    resp = client.post("/api/floors/", json={"name": "5-qavat", "floor_number": 5}, headers=auth_headers)
+    assert resp.status_code == 200
+    floor = resp.json()
+
+    summary = client.get("/api/navigation/audit", headers=auth_headers).json()["summary"]
+    assert summary["floors"] == 5
+    assert {"id": floor["id"], "floor_number": 5, "name": "5-qavat"} in summary["floors_with_no_waypoints"]
+    stream = client.get("/api/navigation/audit/stream", headers=auth_headers)
+    assert json.loads(stream.text.splitlines()[0]) == {"record": "summary", **summary}
+
+
+def test_background_refresh_rebuilds_after_clear(clean_db):
+    _seed_map()
+    cache = GraphCache.get_instance()
+    map_audit.enable_background_refresh(0.01)
+    cache.clear(reason="test")
+
+    deadline = time.monotonic() + 5
+    while not (cache.initialized and map_audit._audit_cache.get(cache.version)):
+        assert time.monotonic() < deadline, "background refresh did not run"
+        time.sleep(0.02)
+    assert cache.stats["rebuild_reason"] == "test"
+
+
+def test_audit_stream_matches_report_and_pages_components(client, auth_headers, clean_db):
+    import json
+
+    _seed_map()
+    report = client.get("/api/navigation/audit", headers=auth_headers).json()
+    resp = client.get("/api/navigation/audit/stream?page_size=3", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in resp.text.splitlines()]
+
+    assert records[0] == {"record": "summary", **report["summary"]}
+    assert records[-1] == {"record": "end"}
+
+    first = records[1]
+    assert first["record"] == "component" and first["pages"] == 3 and first["waypoint_ids"] == ["a", "s1", "s2"]
+    pages = [r for r in records if r["record"] == "component_waypoints" and r["component_id"] == 1]
+    assert [p["page"] for p in pages] == [1, 2]
+    assert first["waypoint_ids"] + [wp for p in pages for wp in p["waypoint_ids"]] == report["components"][0]["waypoint_ids"]
+
+    def strip(record):
+        return {k: v for k, v in record.items() if k not in ("record", "kind")}
+
+    assert [strip(r) for r in records if r["record"] == "vertical_connection"] == report["vertical_connections"]
+    assert [strip(r) for r in records if r["record"] == "unattached_waypoint"] == report["unattached_waypoints"]
+    for kind, entries in report["issues"].items():
+        assert [strip(r) for r in records if r.get("kind") == kind] == entries
+
+    assert client.get("/api/navigation/audit/stream").status_code in (401, 403)
@@ -1,5 +1,8 @@
+import time
+
 import pytest
 from app.services.pathfinding import GraphCache
+from app.services.route_encoding import decode_polyline
 
 @pytest.fixture(autouse=True)
 def clear_graph_cache():
@@ -88,6 +91,48 @@ def test_find_path_via_room_ids(client, auth_headers):
     assert [step["waypoint_id"] for step in data["path"]] == ["wp-r1", "wp-r2"]
 
 
+def test_find_path_records_phase_metrics(client, auth_headers):
+    from prometheus_client import REGISTRY
+
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "m-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "m-b", x=10, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "m-c", x=20, y=0)
+    create_connection(client, auth_headers, "m-a", "m-b", distance=10)
+    create_connection(client, auth_headers, "m-b", "m-c", distance=10)
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    search = {"engine": "inprocess", "kind": "waypoint"}
+    searches = sample("navigation_route_search_seconds_count", **search)
+    expanded = sample("navigation_route_nodes_expanded_sum", **search)
+    length = sample("navigation_route_path_length_sum", kind="waypoint")
+    resolved = sample("navigation_route_resolution_seconds_count", kind="waypoint")
+    loads = sample("navigation_graph_load_seconds_count")
+
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={"start_waypoint_id": "m-a", "end_waypoint_id": "m-c"},
+    )
+    assert resp.status_code == 200
+
+    assert sample("navigation_route_search_seconds_count", **search) == searches + 1
+    assert sample("navigation_route_nodes_expanded_sum", **search) == expanded + 2
+    assert sample("navigation_route_path_length_sum", kind="waypoint") == length + 20
+    assert sample("navigation_route_resolution_seconds_count", kind="waypoint") == resolved + 1
+    assert sample("navigation_graph_load_seconds_count") == loads + 1
+    assert sample("navigation_graph_cache_lookups_total", result="miss") >= 1
+
+    # Coordinate starts are served by the multi-seed engine
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={"start_point": {"floor_id": floor["id"], "x": 5, "y": 1}, "end_waypoint_id": "m-c"},
+    )
+    assert resp.status_code == 200
+    assert sample("navigation_route_search_seconds_count", engine="multi_seed", kind="point") >= 1
+
+
 def test_nearby_rooms_returns_rooms_within_radius(client, auth_headers):
     floor = create_floor(client, auth_headers)
     hall = create_waypoint(client, auth_headers, floor["id"], "wp-h", x=0, y=0, wp_type="hallway")
@@ -104,3 +149,529 @@ def test_nearby_rooms_returns_rooms_within_radius(client, auth_headers):
     assert nearby[0]["room_id"] == room["id"]
     assert nearby[0]["distance"] == 5.0
 
+
+def test_find_path_from_coordinates_snaps_to_nearest_edges(client, auth_headers):
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "wp-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "wp-b", x=100, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "wp-c", x=100, y=100)
+    create_connection(client, auth_headers, "wp-a", "wp-b", distance=100)
+    create_connection(client, auth_headers, "wp-b", "wp-c", distance=100)
+
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={
+            "start_point": {"floor_id": floor["id"], "x": 30, "y": 10},
+            "end_point": {"floor_id": floor["id"], "x": 110, "y": 60},
+        },
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total_distance"] == pytest.approx(130.0)
+    steps = [(s["waypoint_id"], s["type"], s["x"], s["y"]) for s in data["path"]]
+    assert steps == [
+        (None, "point", 30, 0),
+        ("wp-b", "hallway", 100, 0),
+        (None, "point", 100, 60),
+    ]
+    assert data["path"][0]["instruction"] == "Boshlanish nuqtasi"
+    assert data["path"][-1]["instruction"] == "Maqsadga yetdingiz"
+
+
+def test_find_path_between_points_on_same_edge_and_to_waypoint(client, auth_headers):
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "wp-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "wp-b", x=100, y=0)
+    create_connection(client, auth_headers, "wp-a", "wp-b", distance=100)
+
+    same_edge = client.post(
+        "/api/navigation/find-path",
+        json={
+            "start_point": {"floor_id": floor["id"], "x": 20, "y": -5},
+            "end_point": {"floor_id": floor["id"], "x": 70, "y": 5},
+        },
+    )
+    assert same_edge.status_code == 200
+    assert same_edge.json()["total_distance"] == pytest.approx(50.0)
+    assert [s["x"] for s in same_edge.json()["path"]] == [20, 70]
+
+    to_waypoint = client.post(
+        "/api/navigation/find-path",
+        json={"start_point": {"floor_id": floor["id"], "x": 80, "y": 3}, "end_waypoint_id": "wp-a"},
+    )
+    assert to_waypoint.status_code == 200
+    assert to_waypoint.json()["total_distance"] == pytest.approx(80.0)
+    assert [s["waypoint_id"] for s in to_waypoint.json()["path"]] == [None, "wp-a"]
+
+
+def test_find_path_from_point_on_floor_without_waypoints_returns_404(client, auth_headers):
+    floor = create_floor(client, auth_headers)
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={"start_point": {"floor_id": floor["id"], "x": 1, "y": 1}, "end_waypoint_id": "missing"},
+    )
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "No walkable edge near start point"
+
+
+def test_nearby_rooms_walking_mode_uses_graph_distance(client, auth_headers):
+    floor = create_floor(client, auth_headers)
+    upper = create_floor(client, auth_headers, floor_number=2, name="2-qavat")
+    create_waypoint(client, auth_headers, floor["id"], "wp-h", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "wp-corner", x=0, y=40)
+    create_waypoint(client, auth_headers, floor["id"], "wp-stairs", x=0, y=60, wp_type="stairs")
+    # Close in a straight line, but the corridor goes around a wall
+    near = create_room(client, auth_headers, "101-B blok", floor_id=floor["id"])
+    create_waypoint(client, auth_headers, floor["id"], "wp-near", x=10, y=0, wp_type="room")
+    far = create_room(client, auth_headers, "102-B blok", floor_id=floor["id"])
+    create_waypoint(client, auth_headers, floor["id"], "wp-far", x=30, y=40, wp_type="room")
+    up = create_room(client, auth_headers, "201-B blok", floor_id=upper["id"])
+    create_waypoint(
+        client, auth_headers, upper["id"], "wp-up-stairs", x=0, y=60, wp_type="stairs",
+        connects_to_floor=floor["id"], connects_to_waypoint="wp-stairs",
+    )
+    create_waypoint(client, auth_headers, upper["id"], "wp-up", x=10, y=60, wp_type="room")
+    create_connection(client, auth_headers, "wp-h", "wp-corner", distance=40)
+    create_connection(client, auth_headers, "wp-corner", "wp-far", distance=30)
+    create_connection(client, auth_headers, "wp-corner", "wp-near", distance=45)
+    create_connection(client, auth_headers, "wp-corner", "wp-stairs", distance=20)
+    create_connection(client, auth_headers, "wp-up-stairs", "wp-up", distance=10)
+    for room, wp_id in ((near, "wp-near"), (far, "wp-far"), (up, "wp-up")):
+        u = client.put(f"/api/rooms/{room['id']}", json={"waypoint_id": wp_id}, headers=auth_headers)
+        assert u.status_code == 200
+
+    straight = client.get("/api/navigation/nearby-rooms/wp-h", params={"radius": 20})
+    assert [r["room_id"] for r in straight.json()] == [near["id"]]
+
+    walking = client.get(
+        "/api/navigation/nearby-rooms/wp-h", params={"radius": 100, "mode": "walking"}
+    )
+    assert walking.status_code == 200
+    assert [(r["room_id"], r["distance"]) for r in walking.json()] == [
+        (far["id"], 70.0),
+        (near["id"], 85.0),
+    ]
+
+    across = client.get(
+        "/api/navigation/nearby-rooms/wp-h",
+        params={"radius": 150, "mode": "walking", "cross_floors": True},
+    )
+    assert [(r["room_id"], r["floor_id"]) for r in across.json()][-1] == (up["id"], upper["id"])
+    assert across.json()[-1]["distance"] == 40 + 20 + 50 + 10
+
+
+def test_nearby_rooms_validates_radius_and_caches_under_loaded_version(client, auth_headers, monkeypatch):
+    from app.services.pathfinding import PathFinder
+
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "nb-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "nb-b", x=10, y=0, wp_type="room")
+    create_connection(client, auth_headers, "nb-a", "nb-b", distance=10)
+    room = create_room(client, auth_headers, "Dekanat", floor_id=floor["id"], waypoint_id="nb-b")
+
+    for radius in (-5, 0, 10**9):
+        resp = client.get("/api/navigation/nearby-rooms/nb-a", params={"radius": radius, "mode": "walking"})
+        assert resp.status_code == 422, radius
+
+    cache = GraphCache.get_instance()
+    client.get("/api/navigation/nearby-rooms/nb-a", params={"radius": 50})
+    version = cache.version
+    distances_within = PathFinder.distances_within
+
+    def search_then_clear(self, *args, **kwargs):
+        # A map write in another request lands mid-search
+        reached = distances_within(self, *args, **kwargs)
+        cache.clear(reason="concurrent_write")
+        return reached
+
+    monkeypatch.setattr(PathFinder, "distances_within", search_then_clear)
+    resp = client.get("/api/navigation/nearby-rooms/nb-a", params={"radius": 50, "mode": "walking"})
+    assert [r["room_id"] for r in resp.json()] == [room["id"]]
+    assert cache.nearby_cache.get(("nb-a", 50, False, None)) is None
+    assert cache.nearby_cache.get(("nb-a", 50, False, version)) == resp.json()
+
+
+def test_find_path_compact_format(client, auth_headers):
+    floor = create_floor(client, auth_headers)
+    for i in range(5):
+        create_waypoint(client, auth_headers, floor["id"], f"wp-{i}", x=i * 10, y=0)
+    for i in range(4):
+        create_connection(client, auth_headers, f"wp-{i}", f"wp-{i + 1}", distance=10)
+
+    full = client.post(
+        "/api/navigation/find-path", json={"start_waypoint_id": "wp-0", "end_waypoint_id": "wp-4"}
+    )
+    compact = client.post(
+        "/api/navigation/find-path?format=compact",
+        json={"start_waypoint_id": "wp-0", "end_waypoint_id": "wp-4"},
+    )
+    assert compact.status_code == 200
+    data = compact.json()
+    assert data["total_distance"] == full.json()["total_distance"] == 40.0
+    # Straight hallway: only the first instructed step and the end survive
+    assert [(leg["floor_id"], leg["start"]) for leg in data["legs"]] == [(floor["id"], 0)]
+    assert decode_polyline(data["legs"][0]["polyline"]) == [(0, 0), (10, 0), (40, 0)]
+    assert data["instructions"] == [[0, "Boshlanish nuqtasi"], [1, "To'g'ri davom eting"], [2, "Maqsadga yetdingiz"]]
+    assert len(compact.content) < len(full.content)
+
+
+def test_find_path_from_kiosk_uses_cached_kiosk_waypoint(client, auth_headers):
+    from prometheus_client import REGISTRY
+
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "k-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "k-b", x=10, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "k-c", x=30, y=0)
+    create_connection(client, auth_headers, "k-a", "k-b", distance=10)
+    create_connection(client, auth_headers, "k-b", "k-c", distance=20)
+    resp = client.post(
+        "/api/kiosks/",
+        json={"name": "Kiosk", "floor_id": floor["id"], "waypoint_id": "k-a"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    kiosk = resp.json()
+
+    def computed():
+        return REGISTRY.get_sample_value(
+            "navigation_route_requests_total", {"outcome": "computed"}
+        ) or 0.0
+
+    before = computed()
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={"kiosk_id": kiosk["id"], "end_waypoint_id": "k-c"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["total_distance"] == 30.0
+    assert computed() == before + 1
+
+    # Moving the kiosk invalidates the cached kiosk -> waypoint mapping
+    resp = client.put(
+        f"/api/kiosks/{kiosk['id']}", json={"waypoint_id": "k-b"}, headers=auth_headers
+    )
+    assert resp.status_code == 200
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={"kiosk_id": kiosk["id"], "end_waypoint_id": "k-c"},
+    )
+    assert resp.json()["total_distance"] == 20.0
+
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={"kiosk_id": 9999, "end_waypoint_id": "k-c"},
+    )
+    assert resp.status_code == 404
+
+
+def test_other_workers_writes_reach_this_workers_graph(client, auth_headers, monkeypatch):
+    from app.core.config import settings
+    from app.models.connection import Connection
+    from app.models.kiosk import Kiosk
+    from app.models.room import Room
+    from tests.conftest import TestingSessionLocal
+
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "w-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "w-b", x=10, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "w-c", x=30, y=0)
+    create_connection(client, auth_headers, "w-a", "w-b", distance=10)
+    assert client.get("/api/navigation/route", params={"from": "wp:w-a", "to": "wp:w-b"}).status_code == 200
+
+    # Another worker writes: this process's GraphCache.clear() never runs
+    db = TestingSessionLocal()
+    try:
+        kiosk = Kiosk(name="Kiosk", floor_id=floor["id"], waypoint_id="w-a")
+        room = Room(name="Dekanat", floor_id=floor["id"], waypoint_id="w-b")
+        db.add_all([kiosk, room])
+        db.commit()
+        kiosk_id, room_id = kiosk.id, room.id
+        db.add(Connection(id="w-bc", from_waypoint_id="w-b", to_waypoint_id="w-c", distance=20))
+        db.commit()
+    finally:
+        db.close()
+
+    # A kiosk/room missing from the snapshot but present in the DB reloads the graph
+    resp = client.post("/api/navigation/find-path", json={"kiosk_id": kiosk_id, "end_room_id": room_id})
+    assert resp.status_code == 200
+    assert resp.json()["total_distance"] == 10.0
+    resp = client.get("/api/navigation/route", params={"from": f"room:{room_id}", "to": f"kiosk:{kiosk_id}"})
+    assert resp.status_code == 200
+    resp = client.get("/api/rooms/search", params={"query": "Dekanat", "kiosk_id": kiosk_id})
+    assert [r["id"] for r in resp.json()] == [room_id]
+    assert client.post("/api/navigation/find-path", json={"kiosk_id": 9999, "end_waypoint_id": "w-b"}).status_code == 404
+
+    # Other edits (here: a connection) show up once the snapshot is GRAPH_CACHE_TTL_SECONDS old
+    db = TestingSessionLocal()
+    try:
+        db.query(Connection).filter(Connection.id == "w-bc").delete()
+        db.commit()
+    finally:
+        db.close()
+    assert client.get("/api/navigation/route", params={"from": "wp:w-a", "to": "wp:w-c"}).status_code == 200
+    monkeypatch.setattr(settings, "GRAPH_CACHE_TTL_SECONDS", 0.001)
+    time.sleep(0.01)
+    assert client.get("/api/navigation/route", params={"from": "wp:w-a", "to": "wp:w-c"}).status_code == 404
+    assert GraphCache.get_instance().stats["rebuild_reason"] == "ttl_expired"
+
+
+def test_get_route_etag_and_conditional_request(client, auth_headers):
+    floor = create_floor(client, auth_headers)
+    room = create_room(client, auth_headers, "301-A blok", floor_id=floor["id"])
+    create_waypoint(client, auth_headers, floor["id"], "g-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "g-b", x=10, y=0, wp_type="room")
+    create_connection(client, auth_headers, "g-a", "g-b", distance=10)
+    u = client.put(f"/api/rooms/{room['id']}", json={"waypoint_id": "g-b"}, headers=auth_headers)
+    assert u.status_code == 200
+
+    resp = client.get("/api/navigation/route", params={"from": "wp:g-a", "to": f"room:{room['id']}"})
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert resp.headers["cache-control"].startswith("public, max-age=")
+    assert [s["waypoint_id"] for s in resp.json()["path"]] == ["g-a", "g-b"]
+
+    # Same route via POST gives the same body
+    post = client.post(
+        "/api/navigation/find-path",
+        json={"start_waypoint_id": "g-a", "end_room_id": room["id"]},
+    )
+    assert post.json() == resp.json()
+
+    # The format is part of the ETag
+    compact = client.get("/api/navigation/route", params={"from": "wp:g-a", "to": "wp:g-b", "format": "compact"})
+    assert compact.headers["etag"] != etag
+
+    # room:ID and wp:ID resolving to the same waypoint share the ETag
+    cached = client.get(
+        "/api/navigation/route",
+        params={"from": "wp:g-a", "to": "wp:g-b"},
+        headers={"If-None-Match": f'W/"other", {etag}'},
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # A map edit changes the graph version and therefore the ETag
+    create_waypoint(client, auth_headers, floor["id"], "g-c", x=20, y=0)
+    fresh = client.get(
+        "/api/navigation/route",
+        params={"from": "wp:g-a", "to": "wp:g-b"},
+        headers={"If-None-Match": etag},
+    )
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+    # "*" is not a shortcut to 304: g-c has no connections, so there is no route
+    unroutable = client.get(
+        "/api/navigation/route",
+        params={"from": "wp:g-a", "to": "wp:g-c"},
+        headers={"If-None-Match": "*"},
+    )
+    assert unroutable.status_code == 404
+
+
+def test_get_route_etag_uses_the_graph_version_the_request_loaded(client, auth_headers, monkeypatch):
+    from app.api import navigation
+
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "ev-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "ev-b", x=10, y=0)
+    create_connection(client, auth_headers, "ev-a", "ev-b", distance=10)
+    params = {"from": "wp:ev-a", "to": "wp:ev-b"}
+    etag = client.get("/api/navigation/route", params=params).headers["etag"]
+
+    resolve = navigation._resolve_endpoints
+
+    def resolve_then_clear(pathfinder, request):
+        # A map write in another request lands while this one is in flight
+        endpoints = resolve(pathfinder, request)
+        GraphCache.get_instance().clear(reason="concurrent_write")
+        return endpoints
+
+    monkeypatch.setattr(navigation, "_resolve_endpoints", resolve_then_clear)
+    resp = client.get("/api/navigation/route", params=params)
+    assert resp.status_code == 200
+    assert resp.headers["etag"] == etag
+
+    def resolve_without_version(pathfinder, request):
+        pathfinder.version = None
+        return resolve(pathfinder, request)
+
+    # Unknown version: no ETag, never a 304
+    monkeypatch.setattr(navigation, "_resolve_endpoints", resolve_without_version)
+    resp = client.get("/api/navigation/route", params=params, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert "etag" not in resp.headers
+
+
+def test_route_coalescing_key_uses_the_loaded_graph_version(client, auth_headers, monkeypatch):
+    from app.api import navigation
+
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "ck-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "ck-b", x=10, y=0)
+    create_connection(client, auth_headers, "ck-a", "ck-b", distance=10)
+    payload = {"start_waypoint_id": "ck-a", "end_waypoint_id": "ck-b"}
+    assert client.post("/api/navigation/find-path", json=payload).status_code == 200
+    version = GraphCache.get_instance().version
+
+    keys = []
+    do = navigation._route_flights.do
+
+    def recording_do(key, fn):
+        keys.append(key)
+        return do(key, fn)
+
+    monkeypatch.setattr(navigation._route_flights, "do", recording_do)
+    resolve = navigation._resolve_endpoints
+
+    def resolve_then_clear(pathfinder, request):
+        endpoints = resolve(pathfinder, request)
+        GraphCache.get_instance().clear(reason="concurrent_write")
+        return endpoints
+
+    monkeypatch.setattr(navigation, "_resolve_endpoints", resolve_then_clear)
+    resp = client.post("/api/navigation/find-path", json=payload)
+    assert resp.status_code == 200
+    assert version is not None
+    assert keys == [("ck-a", "ck-b", "full", version)]
+
+
+def test_get_route_rejects_malformed_references(client, auth_headers):
+    create_floor(client, auth_headers)
+    for value in ("g-a", "room:abc", "point:1,2", "room:-1", "kiosk:9999"):
+        resp = client.get("/api/navigation/route", params={"from": value, "to": "wp:x"})
+        assert resp.status_code in (404, 422), value
+
+
+def test_debug_graph_requires_admin_and_reports_build_stats(client, auth_headers):
+    assert client.get("/api/navigation/debug/graph").status_code in (401, 403)
+
+    floor1 = create_floor(client, auth_headers, floor_number=1, name="1-qavat")
+    floor2 = create_floor(client, auth_headers, floor_number=2, name="2-qavat")
+    create_waypoint(client, auth_headers, floor1["id"], "dg-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor1["id"], "dg-s1", x=10, y=0, wp_type="stairs")
+    create_waypoint(
+        client, auth_headers, floor2["id"], "dg-s2", x=10, y=0, wp_type="stairs", connects_to_waypoint="dg-s1"
+    )
+    create_waypoint(client, auth_headers, floor2["id"], "dg-island", x=90, y=90)
+    create_connection(client, auth_headers, "dg-a", "dg-s1", distance=10)
+
+    resp = client.get("/api/navigation/debug/graph", headers=auth_headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    # Nothing built yet: stats are not computed on demand
+    assert data["initialized"] is False
+    assert data["stats"] == {}
+    assert data["last_invalidation"]["reason"] == "create_connection"
+
+    assert client.post(
+        "/api/navigation/find-path", json={"start_waypoint_id": "dg-a", "end_waypoint_id": "dg-s2"}
+    ).status_code == 200
+
+    data = client.get("/api/navigation/debug/graph", headers=auth_headers).json()
+    stats = data["stats"]
+    assert data["initialized"] is True
+    assert stats["nodes"] == 4
+    assert stats["edges"] == 4
+    assert stats["vertical_edges"] == 2
+    assert stats["components"] == 2
+    assert stats["largest_component"] == 3
+    assert stats["isolated_nodes"] == 1
+    assert stats["rebuild_reason"] == "create_connection"
+    assert stats["version"] and stats["build_seconds"] >= 0
+    assert stats["memory_bytes"]["graph"] > 0
+    assert stats["memory_bytes_total"] == sum(stats["memory_bytes"].values())
+
+
+def test_room_search_from_kiosk_ranks_by_walking_distance(client, auth_headers):
+    ground = create_floor(client, auth_headers, floor_number=1, name="1-qavat")
+    upper = create_floor(client, auth_headers, floor_number=2, name="2-qavat")
+    create_waypoint(client, auth_headers, ground["id"], "n-k", x=0, y=0)
+    create_waypoint(client, auth_headers, ground["id"], "n-near", x=10, y=0)
+    create_waypoint(client, auth_headers, ground["id"], "n-far", x=200, y=0)
+    create_waypoint(client, auth_headers, upper["id"], "n-s2", x=0, y=20, wp_type="stairs")
+    create_waypoint(
+        client, auth_headers, ground["id"], "n-s1", x=0, y=20, wp_type="stairs",
+        connects_to_floor=upper["id"], connects_to_waypoint="n-s2",
+    )
+    create_waypoint(client, auth_headers, upper["id"], "n-up", x=15, y=20)
+    create_connection(client, auth_headers, "n-k", "n-near", distance=10)
+    create_connection(client, auth_headers, "n-k", "n-far", distance=200)
+    create_connection(client, auth_headers, "n-k", "n-s1", distance=20)
+    create_connection(client, auth_headers, "n-s2", "n-up", distance=15)
+    create_room(client, auth_headers, "Kompyuter xonasi A", ground["id"], "n-far")
+    create_room(client, auth_headers, "Kompyuter xonasi B", upper["id"], "n-up")
+    create_room(client, auth_headers, "Kompyuter xonasi C", ground["id"], "n-near")
+    create_room(client, auth_headers, "Kompyuter xonasi D")
+    create_room(client, auth_headers, "Dekanat", ground["id"], "n-near")
+    kiosk = client.post(
+        "/api/kiosks/",
+        json={"name": "Kiosk", "floor_id": ground["id"], "waypoint_id": "n-k"},
+        headers=auth_headers,
+    ).json()
+
+    resp = client.get("/api/rooms/search", params={"query": "kompyuter", "kiosk_id": kiosk["id"]})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [(r["name"][-1], r["distance"]) for r in data] == [("C", 10.0), ("B", 85.0), ("A", 200.0), ("D", None)]
+    assert data[0]["estimated_time_minutes"] == 0.2
+    assert (data[1]["floor_number"], data[1]["floor_name"]) == (2, "2-qavat")
+    # One shortest-path tree per origin, reused by later keystrokes
+    cache = GraphCache.get_instance()
+    assert cache.distance_trees.get(("n-k", cache.version)) is not None
+
+    resp = client.get("/api/rooms/search", params={"query": "kompyuter", "waypoint_id": "n-up", "limit": 2})
+    assert [(r["name"][-1], r["distance"]) for r in resp.json()] == [("B", 0.0), ("C", 95.0)]
+
+    # Without an origin: text ranking, no distance
+    resp = client.get("/api/rooms/search", params={"query": "kompyuter"})
+    assert all(r["distance"] is None for r in resp.json())
+
+    assert client.get("/api/rooms/search", params={"query": "x", "kiosk_id": 9999}).status_code == 404
+    assert client.get("/api/rooms/search", params={"query": "x", "waypoint_id": "nope"}).status_code == 404
+
+
+def test_route_from_point_rejects_non_finite_and_out_of_range_coordinates(client, auth_headers):
+    floor = client.post(
+        "/api/floors/",
+        json={"name": "1-qavat", "floor_number": 1, "image_width": 800, "image_height": 600},
+        headers=auth_headers,
+    ).json()
+    create_waypoint(client, auth_headers, floor["id"], "pt-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "pt-b", x=100, y=0)
+    create_connection(client, auth_headers, "pt-a", "pt-b", distance=100)
+
+    def route(point):
+        return client.get("/api/navigation/route", params={"from": f"point:{floor['id']},{point}", "to": "wp:pt-b"})
+
+    for point in ("inf,0", "0,-inf", "nan,0", "1000000,1000000", "900,10", "10,-1"):
+        assert route(point).status_code == 422, point
+    resp = client.post(
+        "/api/navigation/find-path",
+        json={"start_point": {"floor_id": floor["id"], "x": 801, "y": 0}, "end_waypoint_id": "pt-b"},
+    )
+    assert resp.status_code == 422
+    # JSON parser accepts Infinity/NaN literals; the 422 body must still serialize
+    resp = client.post(
+        "/api/navigation/find-path",
+        content=b'{"start_point": {"floor_id": 1, "x": Infinity, "y": NaN}, "end_waypoint_id": "pt-b"}',
+        headers={"Content-Type": "application/json"},
+    )
+    assert resp.status_code == 422
+    assert route("30,10").json()["total_distance"] == pytest.approx(70.0)
+
+
+def test_route_from_point_far_outside_floor_without_image_size(client, auth_headers):
+    floor = create_floor(client, auth_headers)
+    create_waypoint(client, auth_headers, floor["id"], "far-a", x=0, y=0)
+    create_waypoint(client, auth_headers, floor["id"], "far-b", x=100, y=0)
+    create_connection(client, auth_headers, "far-a", "far-b", distance=100)
+
+    # The segment grid walk starts at the grid edge, not at the query cell
+    resp = client.get(
+        "/api/navigation/route", params={"from": f"point:{floor['id']},100000,100000", "to": "wp:far-a"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["path"][0]["x"] == 100
@@ -169,3 +169,115 @@ def test_find_path_multi_floor_stairs(clean_db):
         
     finally:
         db.close()
+
+
+def test_room_anchor_index_resolves_without_db(clean_db):
+    from tests.conftest import TestingSessionLocal
+    db = TestingSessionLocal()
+
+    try:
+        floor = create_floor(db)
+        floor.image_width = 200
+        floor.image_height = 100
+        db.commit()
+        # Label match wins even though another ROOM waypoint is nearer the centre
+        wp_label = create_waypoint(db, floor.id, 0, 0, "wp-label", WaypointType.ROOM)
+        wp_label.label = "101-B blok"
+        create_waypoint(db, floor.id, 100, 50, "wp-centre", WaypointType.ROOM)
+        create_waypoint(db, floor.id, 90, 40, "wp-hall", WaypointType.HALLWAY)
+        direct = create_waypoint(db, floor.id, 5, 5, "wp-direct", WaypointType.ROOM)
+
+        labelled = Room(name=" 101-b BLOK ", floor_id=floor.id)
+        unlabelled = Room(name="Dekanat", floor_id=floor.id)
+        attached = Room(name="Kutubxona", floor_id=floor.id, waypoint_id=direct.id)
+        floorless = Room(name="Arxiv")
+        db.add_all([labelled, unlabelled, attached, floorless])
+        db.commit()
+        room_ids = [r.id for r in (labelled, unlabelled, attached, floorless)]
+
+        finder = PathFinder(db)
+        db.close()  # anchors must come from the cache, not the session
+
+        assert [finder.find_nearest_waypoint_to_room(rid) for rid in room_ids] == [
+            "wp-label", "wp-centre", "wp-direct", None
+        ]
+        assert finder.find_nearest_waypoint_to_room(999) is None
+        assert finder.cache.version
+    finally:
+        db.close()
+
+
+def test_process_pool_matches_in_process_search(clean_db, monkeypatch):
+    from tests.conftest import TestingSessionLocal
+    from app.core.config import settings
+    from app.services.pathfinding_pool import shutdown_pathfinding_executor
+    db = TestingSessionLocal()
+
+    try:
+        f1 = create_floor(db, 1, "Floor 1")
+        f2 = create_floor(db, 2, "Floor 2")
+        create_waypoint(db, f1.id, 0, 0, "a")
+        create_waypoint(db, f1.id, 10, 0, "b")
+        create_waypoint(db, f1.id, 10, 10, "c")
+        stairs1 = create_waypoint(db, f1.id, 20, 0, "s1", WaypointType.STAIRS)
+        stairs2 = create_waypoint(db, f2.id, 20, 0, "s2", WaypointType.STAIRS)
+        create_waypoint(db, f2.id, 30, 0, "d")
+        create_waypoint(db, f2.id, 99, 99, "island")
+        create_connection(db, "a", "b", 10.0)
+        create_connection(db, "b", "c", 10.0)
+        create_connection(db, "b", "s1", 10.0)
+        create_connection(db, "s2", "d", 10.0)
+        stairs1.connects_to_waypoint = stairs2.id
+        stairs2.connects_to_waypoint = stairs1.id
+        db.commit()
+
+        pairs = [("a", "d"), ("c", "d"), ("d", "a"), ("a", "island"), ("a", "a")]
+        expected = [PathFinder(db).find_path(s, e) for s, e in pairs]
+
+        monkeypatch.setattr(settings, "PATHFINDING_PROCESS_WORKERS", 1)
+        try:
+            finder = PathFinder(db)
+            assert finder.compiled is not None
+            assert [finder.find_path(s, e) for s, e in pairs] == expected
+            # A map edit publishes a new snapshot version to the workers
+            create_connection(db, "c", "island", 5.0)
+            GraphCache.get_instance().clear()
+            path, distance = PathFinder(db).find_path("a", "island")
+            assert [p["waypoint_id"] for p in path] == ["a", "b", "c", "island"]
+            assert distance == 25.0
+        finally:
+            shutdown_pathfinding_executor()
+    finally:
+        db.close()
+
+
+def test_pathfinder_takes_one_graph_snapshot_despite_concurrent_clear(clean_db, monkeypatch):
+    from tests.conftest import TestingSessionLocal
+    db = TestingSessionLocal()
+    try:
+        floor = create_floor(db)
+        create_waypoint(db, floor.id, 0, 0, "a")
+        create_waypoint(db, floor.id, 10, 0, "b")
+        create_connection(db, "a", "b", 10.0)
+
+        cache = GraphCache.get_instance()
+        load_graph = GraphCache.load_graph
+
+        def load_then_clear(self, session):
+            # A map write in another thread lands right after this request loaded the graph
+            snapshot = load_graph(self, session)
+            self.clear(reason="concurrent_write")
+            return snapshot
+
+        monkeypatch.setattr(GraphCache, "load_graph", load_then_clear)
+        finder = PathFinder(db)
+
+        assert cache.snapshot is None
+        assert finder.version is not None and finder.version == finder.snapshot.version
+        assert finder.compiled is finder.snapshot.compiled
+        assert finder.waypoints_dict is finder.snapshot.waypoints_dict
+        path, distance = finder.find_path("a", "b")
+        assert [p["waypoint_id"] for p in path] == ["a", "b"]
+        assert distance == 10.0
+    finally:
+        db.close()
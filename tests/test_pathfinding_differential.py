@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.pathfinding import GraphCache
+from app.models.waypoint import WaypointType
+from tests.benchmarks.pathfinding_oracle import ENGINES, check_map, load_rows, random_map
+from app.utils.synthetic_campus import TIERS, generate_campus
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def clear_graph_cache():
+    GraphCache.get_instance().clear()
+    yield
+    GraphCache.get_instance().clear()
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_engines_match_reference_dijkstra(clean_db, seed):
+    rows = random_map(seed)
+    db = TestingSessionLocal()
+    try:
+        load_rows(db, rows)
+        expansions = check_map(db, rows, seed)
+    finally:
+        db.close()
+    assert set(ENGINES) <= set(expansions)
+
+
+def test_engines_match_reference_on_synthetic_campus(clean_db):
+    campus = generate_campus(TIERS["tiny"], seed=3)
+    rows = {"floors": campus.floors, "waypoints": campus.waypoints, "connections": campus.connections}
+    db = TestingSessionLocal()
+    try:
+        load_rows(db, rows)
+        check_map(db, rows, seed=3, pairs=40)
+        # Calibrated heuristic: pixel distance is exact, floors cost at least an elevator ride
+        cache = GraphCache.get_instance()
+        assert cache.heuristic_scale == pytest.approx(1.0)
+        assert cache.floor_heuristic_cost == pytest.approx(30.0)
+    finally:
+        db.close()
+
+
+def test_in_process_and_pool_engines_pick_the_same_route_among_ties(clean_db):
+    # Unit grid: almost every pair has many equal-cost shortest routes
+    size = 6
+    waypoints = [
+        {
+            "id": f"g{x}-{y}", "floor_id": 1, "x": x * 10, "y": y * 10, "type": WaypointType.HALLWAY,
+            "label": None, "connects_to_floor": None, "connects_to_waypoint": None,
+        }
+        for y in range(size) for x in range(size)
+    ]
+    connections = []
+    for y in range(size):
+        for x in range(size):
+            for nx, ny in ((x + 1, y), (x, y + 1)):
+                if nx < size and ny < size:
+                    connections.append({
+                        "id": f"c{len(connections)}", "from_waypoint_id": f"g{x}-{y}",
+                        "to_waypoint_id": f"g{nx}-{ny}", "distance": 10.0,
+                    })
+    rows = {"floors": [{"id": 1, "name": "F1", "floor_number": 1}], "waypoints": waypoints, "connections": connections}
+    db = TestingSessionLocal()
+    try:
+        load_rows(db, rows)
+        check_map(db, rows, seed=7, pairs=60)
+    finally:
+        db.close()
@@ -1,4 +1,4 @@
-from app.utils.room_parser import parse_room_name, format_room_name
+from app.utils.room_parser import parse_room_name, format_room_name, room_name_columns
 
 
 def test_parse_room_name_single_digit_floor():
@@ -25,3 +25,7 @@ def test_parse_room_name_accepts_spaces_and_block_variant():
 def test_format_room_name_normalizes_building_to_uppercase():
     assert format_room_name(10, "06", "b") == "1006-B blok"
 
+
+def test_room_name_columns_for_unparsed_name_are_empty():
+    assert room_name_columns("106-b blok") == {"floor_number": 1, "room_number": "06", "building": "B"}
+    assert room_name_columns("Dekanat") == {"floor_number": None, "room_number": None, "building": None}
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_create_room(client, auth_headers):
     floor_resp = client.post(
         "/api/floors/",
@@ -65,6 +68,103 @@ def test_search_rooms_by_id(client, auth_headers):
     assert room_id in ids
 
 
+def test_search_rooms_ranks_prefix_matches_and_applies_limit(client, auth_headers):
+    floor_id = client.post(
+        "/api/floors/",
+        json={"name": "Search Floor 3", "floor_number": 24},
+        headers=auth_headers,
+    ).json()["id"]
+    for name, keywords in (
+        ("Katta zal", None),
+        ("Zal 101", None),
+        ("205-A blok", "majlislar zali"),
+        ("Kutubxona", "kitob"),
+        ("50%_chegirma", None),
+    ):
+        resp = client.post("/api/rooms/", json={"name": name, "floor_id": floor_id}, headers=auth_headers)
+        assert resp.status_code == 200
+        if keywords:
+            resp = client.put(f"/api/rooms/{resp.json()['id']}", json={"keywords": keywords}, headers=auth_headers)
+            assert resp.status_code == 200
+
+    resp = client.get("/api/rooms/search", params={"query": "zal"})
+    assert [r["name"] for r in resp.json()] == ["Zal 101", "Katta zal", "205-A blok"]
+
+    resp = client.get("/api/rooms/search", params={"query": "zal", "limit": 1})
+    assert [r["name"] for r in resp.json()] == ["Zal 101"]
+
+    # LIKE wildcards in the query are literal
+    resp = client.get("/api/rooms/search", params={"query": "%_"})
+    assert [r["name"] for r in resp.json()] == ["50%_chegirma"]
+
+
+def test_autocomplete_normalizes_script_and_tracks_room_writes(client, auth_headers):
+    floor_id = client.post(
+        "/api/floors/",
+        json={"name": "Autocomplete Floor", "floor_number": 25},
+        headers=auth_headers,
+    ).json()["id"]
+    ids = {}
+    for name, keywords in (
+        ("Dekanat", "o'quv bo'limi"),
+        ("106-B blok", "oshxona"),
+        ("Dekan o'rinbosari", None),
+    ):
+        ids[name] = client.post("/api/rooms/", json={"name": name, "floor_id": floor_id}, headers=auth_headers).json()["id"]
+        if keywords:
+            client.put(f"/api/rooms/{ids[name]}", json={"keywords": keywords}, headers=auth_headers)
+
+    def names(q, **params):
+        resp = client.get("/api/rooms/autocomplete", params={"q": q, **params})
+        assert resp.status_code == 200
+        return [r["name"] for r in resp.json()]
+
+    assert names("dek") == ["Dekanat", "Dekan o'rinbosari"]
+    assert names("ДЕКАН") == ["Dekan o'rinbosari", "Dekanat"]  # exact token first
+    assert names("ўқув") == ["Dekanat"]  # keywords, Cyrillic o'/q
+    assert names("xona") == ["106-B blok"]  # infix
+    assert names("106b") == names("106 b") == ["106-B blok"]
+    assert names("dek", limit=1) == ["Dekanat"]
+    assert names("") == []
+
+    # Writes invalidate the index
+    client.put(f"/api/rooms/{ids['Dekanat']}", json={"name": "Rektorat"}, headers=auth_headers)
+    assert names("dek") == ["Dekan o'rinbosari"]
+    deputy_id = ids["Dekan o'rinbosari"]
+    client.delete(f"/api/rooms/{deputy_id}", headers=auth_headers)
+    assert names("dek") == []
+
+
+def test_autocomplete_drops_an_index_built_across_a_write(client, auth_headers, monkeypatch):
+    from app.models.room import Room
+    from app.services import room_autocomplete as autocomplete
+    from tests.conftest import TestingSessionLocal
+
+    floor_id = client.post(
+        "/api/floors/", json={"name": "Race Floor", "floor_number": 26}, headers=auth_headers
+    ).json()["id"]
+    client.post("/api/rooms/", json={"name": "Dekanat", "floor_id": floor_id}, headers=auth_headers)
+    build_index = autocomplete._Index
+
+    def build_then_write(rows):
+        # Another request commits a room (and invalidates) after this build's query ran
+        monkeypatch.setattr(autocomplete, "_Index", build_index)
+        db = TestingSessionLocal()
+        try:
+            db.add(Room(name="Dekan o'rinbosari", floor_id=floor_id))
+            db.commit()
+        finally:
+            db.close()
+        autocomplete.room_autocomplete.invalidate("create_room")
+        return build_index(rows)
+
+    monkeypatch.setattr(autocomplete, "_Index", build_then_write)
+    first = client.get("/api/rooms/autocomplete", params={"q": "dek"}).json()
+    assert [r["name"] for r in first] == ["Dekanat"]
+    second = client.get("/api/rooms/autocomplete", params={"q": "dek"}).json()
+    assert [r["name"] for r in second] == ["Dekanat", "Dekan o'rinbosari"]
+
+
 def test_get_rooms_building_filter_is_case_insensitive(client, auth_headers):
     floor_id = client.post(
         "/api/floors/",
@@ -89,3 +189,232 @@ def test_get_rooms_building_filter_is_case_insensitive(client, auth_headers):
     assert any("blok" in n.lower() and "-b" in n.lower() for n in names)
     assert all("-c" not in n.lower() for n in names)
 
+
+
+def test_get_rooms_filters_by_parsed_name_columns(client, auth_headers):
+    floor_id = client.post(
+        "/api/floors/",
+        json={"name": "Parsed Floor", "floor_number": 26},
+        headers=auth_headers,
+    ).json()["id"]
+    ids = {}
+    for name in ("106-B blok", "207-b blok", "1007-C block", "Dekanat"):
+        ids[name] = client.post(
+            "/api/rooms/", json={"name": name, "floor_id": floor_id}, headers=auth_headers
+        ).json()["id"]
+
+    def names(**params):
+        resp = client.get("/api/rooms/", params=params)
+        assert resp.status_code == 200
+        return sorted(r["name"] for r in resp.json())
+
+    assert names(building="b") == ["106-B blok", "207-b blok"]
+    assert names(floor_number=10) == ["1007-C block"]
+    assert names(room_number="07") == ["1007-C block", "207-b blok"]
+    assert names(building="B", floor_number=2) == ["207-b blok"]
+
+    # Renaming refills the columns; a name without the pattern clears them
+    client.put(f"/api/rooms/{ids['Dekanat']}", json={"name": "305-B blok"}, headers=auth_headers)
+    client.put(f"/api/rooms/{ids['106-B blok']}", json={"name": "Kutubxona"}, headers=auth_headers)
+    assert names(building="B") == ["207-b blok", "305-B blok"]
+
+
+def test_room_name_with_floor_number_beyond_integer_leaves_columns_empty(client, auth_headers):
+    from app.models.room import Room
+    from tests.conftest import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    try:
+        huge = Room(name="9999999999999-B blok")
+        edge = Room(name="214748364706-B blok")
+        assert (huge.floor_number, huge.room_number, huge.building) == (None, None, None)
+        assert (edge.floor_number, edge.room_number, edge.building) == (2**31 - 1, "06", "B")
+        db.add_all([huge, edge])
+        db.commit()
+        huge.name = "214748364806-C blok"
+        db.commit()
+        assert (huge.floor_number, huge.room_number, huge.building) == (None, None, None)
+    finally:
+        db.close()
+
+    resp = client.post("/api/rooms/", json={"name": "99999999999999-A blok"}, headers=auth_headers)
+    assert resp.status_code == 200
+
+
+def test_search_without_origin_leaves_floor_fields_null(client, auth_headers):
+    floor_id = client.post(
+        "/api/floors/", json={"name": "1-qavat", "floor_number": 1}, headers=auth_headers
+    ).json()["id"]
+    # Parsed floor (3) differs from the Floor row's floor_number (1)
+    client.post("/api/rooms/", json={"name": "305-B blok", "floor_id": floor_id}, headers=auth_headers)
+
+    resp = client.get("/api/rooms/search", params={"query": "305"})
+    assert resp.status_code == 200
+    [result] = resp.json()
+    assert result["floor_id"] == floor_id
+    assert result["floor_number"] is None
+    assert result["floor_name"] is None
+    assert result["distance"] is None
+
+
+def test_create_and_rename_room_assign_ground_floor_zero(client, auth_headers):
+    ground_id = client.post(
+        "/api/floors/", json={"name": "0-qavat", "floor_number": 0}, headers=auth_headers
+    ).json()["id"]
+    room = client.post("/api/rooms/", json={"name": "005-B blok"}, headers=auth_headers).json()
+    assert room["floor_id"] == ground_id
+
+    other = client.post("/api/rooms/", json={"name": "Arxiv"}, headers=auth_headers).json()
+    assert other["floor_id"] is None
+    renamed = client.put(f"/api/rooms/{other['id']}", json={"name": "007-B blok"}, headers=auth_headers)
+    assert renamed.json()["floor_id"] == ground_id
+
+
+def test_auto_assign_floors_reports_counts_and_unmatched_samples(client, auth_headers):
+    # Rooms first: create_room would otherwise pick the floor itself
+    ids = {}
+    for name in ("1306-B blok", "1407-A blok", "9905-A blok", "Arxiv xonasi"):
+        ids[name] = client.post("/api/rooms/", json={"name": name}, headers=auth_headers).json()["id"]
+    floor_ids = [
+        client.post(
+            "/api/floors/", json={"name": name, "floor_number": number}, headers=auth_headers
+        ).json()["id"]
+        for name, number in (("A 13-qavat", 13), ("B 13-qavat", 13), ("14-qavat", 14))
+    ]
+
+    resp = client.post("/api/rooms/auto-assign-floors", params={"sample_size": 5}, headers=auth_headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["updated_count"] == 2
+    assert data["unmatched_count"] == 2
+    assert data["unmatched_by_reason"] == {"unparsed_name": 1, "no_matching_floor": 1}
+    assert [(s["name"], s["reason"]) for s in data["unmatched_samples"]] == [
+        ("9905-A blok", "no_matching_floor"), ("Arxiv xonasi", "unparsed_name"),
+    ]
+    assert client.get(f"/api/rooms/{ids['1306-B blok']}").json()["floor_id"] == floor_ids[0]
+    assert client.get(f"/api/rooms/{ids['1407-A blok']}").json()["floor_id"] == floor_ids[2]
+
+    # Nothing left to assign
+    assert client.post("/api/rooms/auto-assign-floors", headers=auth_headers).json()["updated_count"] == 0
+
+
+def test_import_rooms_from_csv_and_ndjson(client, auth_headers):
+    floor_id = client.post(
+        "/api/floors/", json={"name": "1-qavat", "floor_number": 1}, headers=auth_headers
+    ).json()["id"]
+    csv_body = "\ufeffName,floor_id,keywords\n106-B blok,,ma'ruza\nDekanat,%d,\n\n" % floor_id
+    resp = client.post(
+        "/api/rooms/import", files={"file": ("rooms.csv", csv_body.encode(), "text/csv")}, headers=auth_headers
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["format"], data["rows_total"], data["imported"], data["committed"]) == ("csv", 2, 2, True)
+    rooms = {r["name"]: r for r in client.get("/api/rooms/").json()}
+    # floor_id resolved from the parsed floor number, like create_room
+    assert rooms["106-B blok"]["floor_id"] == floor_id
+    assert rooms["106-B blok"]["keywords"] == "ma'ruza"
+    assert client.get("/api/rooms/", params={"building": "B"}).json()[0]["name"] == "106-B blok"
+
+    ndjson_body = b'{"name": "Kutubxona", "floor_number": 1}\n{"name": "Arxiv"}\n'
+    resp = client.post(
+        "/api/rooms/import", files={"file": ("rooms.jsonl", ndjson_body, "application/x-ndjson")},
+        headers=auth_headers,
+    )
+    assert resp.json()["imported"] == 2
+    rooms = {r["name"]: r for r in client.get("/api/rooms/").json()}
+    assert rooms["Kutubxona"]["floor_id"] == floor_id
+    assert rooms["Arxiv"]["floor_id"] is None
+
+
+def test_import_rooms_from_xlsx(client, auth_headers):
+    import io
+    openpyxl = pytest.importorskip("openpyxl")
+
+    floor_id = client.post(
+        "/api/floors/", json={"name": "1-qavat", "floor_number": 1}, headers=auth_headers
+    ).json()["id"]
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Name", "Floor_number", "Keywords"])
+    sheet.append(["Kutubxona", 1, "kitob"])
+    sheet.append([None, None, None])
+    sheet.append(["Arxiv", 1.5, None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    resp = client.post(
+        "/api/rooms/import",
+        params={"skip_invalid": True},
+        files={"file": ("rooms.xlsx", buffer.getvalue(), "application/octet-stream")},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["format"], data["rows_total"], data["imported"]) == ("xlsx", 2, 1)
+    assert data["errors"] == [
+        {"line": 4, "name": "Arxiv", "errors": ["floor_number must be an integer in the INTEGER range"]}
+    ]
+    [room] = client.get("/api/rooms/").json()
+    assert (room["name"], room["floor_id"], room["keywords"]) == ("Kutubxona", floor_id, "kitob")
+
+
+def test_import_rooms_reports_errors_and_rolls_back(client, auth_headers):
+    client.post("/api/rooms/", json={"name": "Dekanat"}, headers=auth_headers)
+    body = b"\n".join([
+        b'{"name": "Kutubxona"}',
+        b'{"name": ""}',
+        b"not json",
+        b'{"name": "Dekanat"}',
+        b'{"name": "Oshxona", "floor_id": 999}',
+        b'{"name": "Kutubxona"}',
+        b'{"name": "Arxiv", "floor_id": 99999999999999999999}',
+        b'{"name": "99999999999999999999-B blok"}',
+    ])
+
+    def upload(**params):
+        return client.post(
+            "/api/rooms/import", params=params, files={"file": ("rooms.ndjson", body, "application/x-ndjson")},
+            headers=auth_headers,
+        ).json()
+
+    # Strict (default): one bad row and nothing is written
+    data = upload()
+    assert (data["valid_rows"], data["skipped_existing"], data["invalid_rows"]) == (1, 1, 6)
+    assert (data["imported"], data["committed"]) == (0, False)
+    assert [(e["line"], e["errors"]) for e in data["errors"]] == [
+        (2, ["name is required"]),
+        (3, [data["errors"][1]["errors"][0]]),
+        (5, ["floor 999 not found"]),
+        (6, ["duplicate of line 1"]),
+        (7, ["floor_id must be an integer in the INTEGER range"]),
+        (8, ["floor number in the name is out of range"]),
+    ]
+    assert data["errors"][1]["errors"][0].startswith("Invalid JSON")
+    assert sorted(r["name"] for r in client.get("/api/rooms/").json()) == ["Dekanat"]
+
+    assert upload(dry_run=True, skip_invalid=True)["committed"] is False
+    assert sorted(r["name"] for r in client.get("/api/rooms/").json()) == ["Dekanat"]
+
+    data = upload(skip_invalid=True)
+    assert (data["imported"], data["committed"]) == (1, True)
+    assert sorted(r["name"] for r in client.get("/api/rooms/").json()) == ["Dekanat", "Kutubxona"]
+
+    # Import-only idempotency: rooms already present are skipped, not duplicated
+    data = upload(skip_invalid=True)
+    assert (data["valid_rows"], data["skipped_existing"], data["imported"]) == (0, 3, 0)
+    assert sorted(r["name"] for r in client.get("/api/rooms/").json()) == ["Dekanat", "Kutubxona"]
+
+
+def test_import_rooms_rejects_unknown_files(client, auth_headers):
+    resp = client.post(
+        "/api/rooms/import", files={"file": ("rooms.txt", b"name\nDekanat\n", "text/plain")}, headers=auth_headers
+    )
+    assert resp.status_code == 400
+    resp = client.post(
+        "/api/rooms/import", params={"format": "csv"},
+        files={"file": ("rooms.txt", b"title\nDekanat\n", "text/plain")}, headers=auth_headers,
+    )
+    assert resp.status_code == 400
+    assert "name" in resp.json()["detail"]
+    resp = client.post("/api/rooms/import", files={"file": ("rooms.csv", b"name\nX\n", "text/csv")})
+    assert resp.status_code in (401, 403)
@@ -0,0 +1,73 @@
+import random
+
+from app.services.route_encoding import compact_route, decode_polyline, encode_polyline, simplify_path
+
+
+def _step(wp_id, x, y, floor_id=1, wp_type="hallway", instruction=None):
+    return {
+        "waypoint_id": wp_id, "floor_id": floor_id, "x": x, "y": y,
+        "type": wp_type, "label": None, "instruction": instruction,
+    }
+
+
+def test_polyline_roundtrip():
+    rng = random.Random(5)
+    for _ in range(50):
+        points = [(rng.randint(-5000, 5000), rng.randint(-5000, 5000)) for _ in range(rng.randint(0, 40))]
+        assert decode_polyline(encode_polyline(points)) == points
+
+
+def test_simplify_drops_only_plain_collinear_hallway_points():
+    path = [
+        _step("a", 0, 0, instruction="Boshlanish nuqtasi"),
+        _step("b", 10, 0),
+        _step("c", 20, 1),            # within tolerance of the a -> d line
+        _step("d", 30, 0, wp_type="room"),
+        _step("e", 40, 0),
+        _step("f", 40, 10, instruction="Chapga buriling"),
+        _step("g", 40, 20),
+        _step("h", 40, 30, instruction="Maqsadga yetdingiz"),
+    ]
+    assert [s["waypoint_id"] for s in simplify_path(path)] == ["a", "d", "e", "f", "h"]
+
+
+def test_compact_route_splits_legs_per_floor():
+    path = [
+        _step("a", 0, 0, instruction="Boshlanish nuqtasi"),
+        _step("b", 50, 0),
+        _step("s1", 100, 0, wp_type="stairs", instruction="Zina orqali yuqoriga chiqing"),
+        _step("s2", 100, 0, floor_id=2, wp_type="stairs"),
+        _step("c", 100, 50, floor_id=2),
+        _step("d", 100, 100, floor_id=2, instruction="Maqsadga yetdingiz"),
+    ]
+    body = compact_route(path, 250.0, 1, 5.0)
+    assert [(leg["floor_id"], leg["start"]) for leg in body["legs"]] == [(1, 0), (2, 2)]
+    assert decode_polyline(body["legs"][0]["polyline"]) == [(0, 0), (100, 0)]
+    assert decode_polyline(body["legs"][1]["polyline"]) == [(100, 0), (100, 100)]
+    assert body["instructions"] == [
+        [0, "Boshlanish nuqtasi"],
+        [1, "Zina orqali yuqoriga chiqing"],
+        [3, "Maqsadga yetdingiz"],
+    ]
+    assert (body["start_waypoint_id"], body["end_waypoint_id"]) == ("a", "d")
+
+
+def test_simplify_keeps_a_slow_arc_within_tolerance():
+    import math
+
+    # Quarter circle, 1 degree per point: each point is well within tolerance
+    # of its neighbours' chord, but not of a chord spanning the whole arc
+    radius = 1000
+    path = [
+        _step(f"p{deg}", round(radius * math.cos(math.radians(deg))), round(radius * math.sin(math.radians(deg))))
+        for deg in range(91)
+    ]
+    kept = simplify_path(path)
+    assert 2 < len(kept) < len(path)
+
+    positions = {s["waypoint_id"]: i for i, s in enumerate(path)}
+    for a, b in zip(kept, kept[1:]):
+        length = math.hypot(b["x"] - a["x"], b["y"] - a["y"])
+        for step in path[positions[a["waypoint_id"]] + 1:positions[b["waypoint_id"]]]:
+            offset = abs((b["x"] - a["x"]) * (step["y"] - a["y"]) - (b["y"] - a["y"]) * (step["x"] - a["x"])) / length
+            assert offset <= 1.0, step["waypoint_id"]
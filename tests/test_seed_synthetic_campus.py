@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+
+import app.database
+from app.database import Base
+from app.models.room import Room
+from app.models.waypoint import Waypoint
+from app.utils.synthetic_campus import TIERS, generate_campus
+from scripts import seed_synthetic_campus
+
+
+@pytest.fixture
+def seed_engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'campus.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(app.database, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_seed_small_tier_and_refuse_rerun_without_replace(seed_engine, capsys):
+    campus = generate_campus(TIERS["small"], seed=0)
+
+    assert seed_synthetic_campus.main(["--tier", "small"]) == 0
+    assert count(seed_engine, Waypoint) == len(campus.waypoints)
+    assert count(seed_engine, Room) == len(campus.rooms)
+    with seed_engine.connect() as conn:
+        row = conn.execute(
+            select(Room.name, Room.floor_number, Room.room_number, Room.building).order_by(Room.id)
+        ).first()
+    assert row == ("101-A blok", 1, "01", "A")
+
+    with pytest.raises(SystemExit, match="not empty; use --replace"):
+        seed_synthetic_campus.main(["--tier", "small"])
+    assert count(seed_engine, Waypoint) == len(campus.waypoints)
+
+    assert seed_synthetic_campus.main(["--tier", "small", "--replace"]) == 0
+    assert count(seed_engine, Room) == len(campus.rooms)
+    assert "Loaded into" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+import pytest
+
+from app.core import server_timing
+from app.core.config import settings
+from app.services.pathfinding import GraphCache
+from tests.conftest import engine
+
+
+@pytest.fixture(autouse=True)
+def clear_graph_cache():
+    GraphCache.get_instance().clear()
+    yield
+    GraphCache.get_instance().clear()
+
+
+def _phases(header):
+    return {part.split(";")[0].strip(): part.strip() for part in header.split(",")}
+
+
+def _seed_route(client, auth_headers):
+    floor = client.post("/api/floors/", json={"name": "1-qavat", "floor_number": 1}, headers=auth_headers).json()
+    for wp_id, x in (("st-a", 0), ("st-b", 10)):
+        resp = client.post(
+            "/api/waypoints/",
+            json={"id": wp_id, "floor_id": floor["id"], "x": x, "y": 0, "type": "hallway"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+    resp = client.post(
+        "/api/waypoints/connections",
+        json={"id": "st-c", "from_waypoint_id": "st-a", "to_waypoint_id": "st-b", "distance": 10},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+
+
+def test_server_timing_header_lists_request_phases(client, auth_headers, monkeypatch):
+    server_timing.install_db_timing(engine)
+    _seed_route(client, auth_headers)
+    monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+
+    resp = client.post("/api/navigation/find-path", json={"start_waypoint_id": "st-a", "end_waypoint_id": "st-b"})
+    assert resp.status_code == 200
+    phases = _phases(resp.headers["server-timing"])
+    assert {"db", "cache", "resolve", "search", "serialize", "app"} <= set(phases)
+    assert phases["search"].startswith("search;dur=")
+    assert resp.headers["timing-allow-origin"] == "*"
+
+
+def test_server_timing_is_off_by_default(client, auth_headers):
+    _seed_route(client, auth_headers)
+    resp = client.post("/api/navigation/find-path", json={"start_waypoint_id": "st-a", "end_waypoint_id": "st-b"})
+    assert resp.status_code == 200
+    assert "server-timing" not in resp.headers
+
+    # Hooks outside a request are no-ops
+    server_timing.record("search", 1.0)
+    with server_timing.timer("search"):
+        pass
+
+
+def test_format_header_reports_milliseconds_and_call_counts():
+    header = server_timing.format_header({"db": [0.0012, 3], "search": [0.0004, 1]}, 0.002)
+    assert header == 'db;dur=1.20;desc="3 calls", search;dur=0.40, app;dur=2.00'
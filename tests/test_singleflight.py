@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return b"route"
+
+    results = []
+    started = threading.Barrier(6)
+
+    def request():
+        started.wait()
+        results.append(flight.do(("a", "b"), work))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for t in threads:
+        t.start()
+    started.wait()
+    # Let all followers reach the in-flight call before the leader finishes
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _value, shared in results) == [False, True, True, True, True]
+    assert {value for value, _shared in results} == {b"route"}
+    assert flight.in_flight() == 0
+
+
+def test_errors_propagate_and_are_not_remembered():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("no path")
+
+    with pytest.raises(ValueError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: 42) == (42, False)
@@ -0,0 +1,58 @@
+import math
+import random
+
+from app.services.spatial_index import FloorSpatialIndex
+
+
+def _points(seed, n=300, span=1000):
+    rng = random.Random(seed)
+    return [(f"wp{i}", rng.randint(0, span), rng.randint(0, span)) for i in range(n)]
+
+
+def _brute(points, x, y):
+    return sorted(
+        (math.hypot(px - x, py - y), i, pid) for i, (pid, px, py) in enumerate(points)
+    )
+
+
+def test_nearest_matches_linear_scan():
+    points = _points(1)
+    index = FloorSpatialIndex(points)
+    rng = random.Random(2)
+    for _ in range(50):
+        # Include queries outside the bounding box
+        x, y = rng.uniform(-300, 1300), rng.uniform(-300, 1300)
+        expected = [(d, pid) for d, _i, pid in _brute(points, x, y)[:5]]
+        assert index.nearest(x, y, k=5) == expected
+
+
+def test_nearest_with_predicate_and_ties_keep_input_order():
+    points = [("a", 0, 0), ("b", 10, 0), ("c", -10, 0), ("d", 0, 3)]
+    index = FloorSpatialIndex(points)
+    assert index.nearest(0, 0, k=1, predicate=lambda pid: pid in {"b", "c"}) == [(10.0, "b")]
+    assert index.nearest(0, 0, k=10) == [(0.0, "a"), (3.0, "d"), (10.0, "b"), (10.0, "c")]
+
+
+def test_within_radius_matches_linear_scan():
+    points = _points(3)
+    index = FloorSpatialIndex(points)
+    rng = random.Random(4)
+    for _ in range(50):
+        x, y, r = rng.uniform(0, 1000), rng.uniform(0, 1000), rng.uniform(0, 250)
+        expected = [(d, pid) for d, _i, pid in _brute(points, x, y) if d <= r]
+        assert index.within_radius(x, y, r) == expected
+
+
+def test_empty_index():
+    index = FloorSpatialIndex([])
+    assert index.nearest(1, 1, k=3) == []
+    assert index.within_radius(1, 1, 100) == []
+
+
+def test_nearest_far_outside_the_grid():
+    points = _points(5)
+    index = FloorSpatialIndex(points)
+    # Rings are clipped to the grid: these would otherwise walk ~1e12 rings
+    for x, y in ((1e12, 1e12), (-1e12, 500), (500, 1e15)):
+        expected = [(d, pid) for d, _i, pid in _brute(points, x, y)[:3]]
+        assert index.nearest(x, y, k=3) == expected